@@ -1,9 +1,25 @@
+from typing import Optional, Union
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
 
     database_url: str = "sqlite:///./chat_messages.db"
+    # Derived from database_url (sqlite -> sqlite+aiosqlite) when not set.
+    async_database_url: Optional[str] = None
+
+    # SQLite PRAGMA preset ("default", "wal", "wal_durable"), applied on every
+    # new connection; sqlite_pragmas overrides individual values.
+    storage_profile: str = "wal"
+    sqlite_pragmas: dict[str, Union[int, str]] = {}
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_recycle: int = 3600
+    # Messages and session summaries hashed by session_id across these SQLite
+    # databases (each with its own pool); database_url then only holds the
+    # message_id -> session_id index and the archive index. Empty: one database.
+    shard_database_urls: list[str] = []
 
     app_name: str = "Message Processing API"
     app_version: str = "1.0.0"
@@ -11,8 +27,85 @@ class Settings(BaseSettings):
 
     default_page_size: int = 10
     max_page_size: int = 100
+    max_batch_size: int = 1000
+    # Re-posting an existing message_id returns the stored message instead
+    # of a MESSAGE_VALIDATION_ERROR.
+    idempotent_create: bool = False
+
+    # "sync": POST /api/messages commits before answering (201); "async":
+    # validated messages are queued (202) and written in batches by a
+    # background writer, one transaction per batch.
+    ingestion_mode: str = "sync"
+    ingestion_queue_size: int = 10000
+    ingestion_batch_size: int = 500
+    ingestion_flush_interval: float = 0.05
+    ingestion_status_max_entries: int = 100000
+
+    # Multi-process serving (python -m app.server --workers N): the API
+    # workers only read and forward writes over this Unix socket to a single
+    # writer process, which stores them in batches of up to writer_batch_size
+    # messages per transaction. None: every process writes to the database.
+    writer_socket: Optional[str] = None
+    writer_batch_size: int = 500
+    writer_flush_interval: float = 0.001
+    writer_timeout: float = 30.0
+
+    # Latency histograms and counters served on /metrics (Prometheus text
+    # format, per worker process).
+    metrics_enabled: bool = True
+
+    # Opt-in request profiling: requests sent with an X-Profile header (when
+    # allowed) or sampled at profiling_sample_rate get X-DB-Queries /
+    # X-DB-Time-ms headers and a report in profiling_dir; profiling_cpu (or
+    # "X-Profile: cpu") adds a cProfile dump. Statements slower than
+    # slow_query_threshold_ms are logged for every request (None: off).
+    profiling_header_enabled: bool = False
+    profiling_sample_rate: float = 0.0
+    profiling_cpu: bool = False
+    profiling_dir: str = "./profiles"
+    slow_query_threshold_ms: Optional[float] = None
+
+    # In-process cache of serialized GET responses (per worker). Entries are
+    # served for at most response_cache_max_age seconds (0: until
+    # invalidated), since writes from other processes do not invalidate them.
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 1000
+    response_cache_max_bytes: int = 32 * 1024 * 1024
+    response_cache_max_age: float = 5.0
+
+    # Message content and metadata at least compression_min_size bytes long
+    # are stored zlib-compressed; existing rows are read either way.
+    compression_enabled: bool = False
+    compression_min_size: int = 4096
+    compression_level: int = 6
+
+    # Messages older than retention_days are moved out of the table into
+    # gzip NDJSON files under archive_dir (None keeps everything). The job
+    # runs every retention_interval seconds in the API process (0: only via
+    # python -m app.tools.archive_messages).
+    retention_days: Optional[int] = None
+    retention_interval: float = 3600.0
+    retention_batch_size: int = 1000
+    retention_batch_pause: float = 0.05
+    archive_dir: str = "./archive"
 
     inappropriate_words: list[str] = ["bad", "inappropriate", "prohibited", "censored"]
+    # When set, the word list is read from this file (one word per line or a
+    # JSON list) and reloaded whenever it changes.
+    inappropriate_words_file: Optional[str] = None
+    inappropriate_words_reload_interval: float = 5.0
+    # "trie": single-pass alternation; "regex": one pattern per word (fallback).
+    content_filter_engine: str = "trie"
+
+    # Content at least content_filter_offload_min_size characters long is
+    # scanned in a pool of content_filter_workers processes, keeping the
+    # event loop free; smaller content stays inline (0 workers: all inline).
+    content_filter_workers: int = 0
+    content_filter_offload_min_size: int = 16384
+
+    content_filter_cache_enabled: bool = False
+    content_filter_cache_max_entries: int = 10000
+    content_filter_cache_max_bytes: int = 16 * 1024 * 1024
 
     class Config:
         env_file = ".env"
@@ -1,18 +1,27 @@
+from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.database import get_db
+from app.models.database import get_async_db
 from app.schemas.message import (
     MessageCreate,
+    MessageBatchCreate,
     MessageResponse,
     MessageListResponse,
+    MessageBatchResponse,
+    MessageStatusResponse,
+    MessageSearchResponse,
     ErrorResponse,
     SenderType,
 )
-from app.services.message_service import MessageService
+from app.services.async_message_service import AsyncMessageService
+from app.services.ingestion_queue import ingestion_queue
+from app.utils.metrics import STAGE_LATENCY
+from app.utils.response_cache import json_response
 
 router = APIRouter(prefix="/api/messages", tags=["messages"])
 
@@ -23,14 +32,107 @@ router = APIRouter(prefix="/api/messages", tags=["messages"])
     status_code=201,
     responses={
         201: {"description": "Message created successfully"},
+        202: {
+            "model": MessageStatusResponse,
+            "description": "Message queued for writing (ingestion_mode=async)",
+        },
         400: {"model": ErrorResponse, "description": "Invalid input"},
         422: {"model": ErrorResponse, "description": "Validation error"},
         500: {"model": ErrorResponse, "description": "Internal server error"},
+        503: {"model": ErrorResponse, "description": "Ingestion queue is full"},
     },
 )
-async def create_message(message_data: MessageCreate, db: Session = Depends(get_db)):
-    service = MessageService(db)
-    return service.create_message(message_data)
+# GET "" below would otherwise answer POST /api/messages with 405 instead of
+# the trailing-slash redirect.
+@router.post(
+    "", response_model=MessageResponse, status_code=201, include_in_schema=False
+)
+async def create_message(
+    message_data: MessageCreate, db: AsyncSession = Depends(get_async_db)
+):
+    service = AsyncMessageService(db)
+    if ingestion_queue.is_running:
+        status = await service.enqueue_message(message_data)
+        return JSONResponse(
+            status_code=202, content={"status": "accepted", "data": status}
+        )
+
+    result = await service.create_message(message_data)
+    # Serialized here rather than by FastAPI so the stage can be timed.
+    with STAGE_LATENCY.time("serialization"):
+        body = result.model_dump_json()
+    return Response(content=body, status_code=201, media_type="application/json")
+
+
+@router.post(
+    "/batch",
+    response_model=MessageBatchResponse,
+    responses={
+        200: {"description": "Batch processed, see per-item results"},
+        422: {"model": ErrorResponse, "description": "Validation error"},
+        500: {"model": ErrorResponse, "description": "Internal server error"},
+    },
+)
+async def create_messages_batch(
+    batch_data: MessageBatchCreate, db: AsyncSession = Depends(get_async_db)
+):
+    service = AsyncMessageService(db)
+    return await service.create_messages_batch(batch_data.messages)
+
+
+@router.get(
+    "",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Messages in the time range as newline-delimited JSON",
+            "content": {"application/x-ndjson": {}},
+        },
+        422: {"model": ErrorResponse, "description": "Validation error"},
+        500: {"model": ErrorResponse, "description": "Internal server error"},
+    },
+)
+@router.get("/", include_in_schema=False)
+async def get_messages_by_time_range(
+    start: Optional[datetime] = Query(
+        None, alias="from", description="Inclusive lower bound on timestamp"
+    ),
+    end: Optional[datetime] = Query(
+        None, alias="to", description="Exclusive upper bound on timestamp"
+    ),
+    sender: Optional[SenderType] = Query(None, description="Filter by sender"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of messages"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncMessageService(db)
+    lines = service.export_time_range(start, end, sender, limit)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+# Declared before /{session_id} so "search" is not taken as a session id.
+@router.get(
+    "/search",
+    response_model=MessageSearchResponse,
+    responses={
+        200: {"description": "Matching messages, best match first"},
+        404: {"model": ErrorResponse, "description": "Session not found"},
+        422: {"model": ErrorResponse, "description": "Validation error"},
+        500: {"model": ErrorResponse, "description": "Internal server error"},
+    },
+)
+async def search_messages(
+    q: str = Query(..., min_length=1, max_length=500, description="Words to search for"),
+    session_id: Optional[str] = Query(None, description="Search in one session"),
+    sender: Optional[SenderType] = Query(None, description="Filter by sender"),
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of messages"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor returned as next_cursor by the previous page"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncMessageService(db)
+    body = await service.search_messages_json(q, session_id, sender, limit, cursor)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get(
@@ -38,19 +140,27 @@ async def create_message(message_data: MessageCreate, db: Session = Depends(get_
     response_model=MessageListResponse,
     responses={
         200: {"description": "Messages retrieved successfully"},
+        304: {"description": "Not modified since the ETag sent in If-None-Match"},
         404: {"model": ErrorResponse, "description": "Session not found"},
         500: {"model": ErrorResponse, "description": "Internal server error"},
     },
 )
 async def get_messages_by_session(
+    request: Request,
     session_id: str,
     limit: int = Query(10, ge=1, le=100, description="Maximum number of messages"),
     offset: int = Query(0, ge=0, description="Number of messages to skip"),
     sender: Optional[SenderType] = Query(None, description="Filter by sender"),
-    db: Session = Depends(get_db),
+    before: Optional[str] = Query(
+        None, description="Cursor returned as next_cursor by the previous page"
+    ),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    service = MessageService(db)
-    return service.get_messages_by_session(session_id, limit, offset, sender)
+    service = AsyncMessageService(db)
+    cached = await service.get_messages_by_session_json(
+        session_id, limit, offset, sender, before
+    )
+    return json_response(request, cached)
 
 
 @router.get(
@@ -58,10 +168,81 @@ async def get_messages_by_session(
     response_model=MessageResponse,
     responses={
         200: {"description": "Mensaje recuperado exitosamente"},
+        304: {"description": "Sin cambios respecto al ETag de If-None-Match"},
         404: {"model": ErrorResponse, "description": "Mensaje no encontrado"},
         500: {"model": ErrorResponse, "description": "Error interno del servidor"},
     },
 )
-async def get_message_by_id(message_id: str, db: Session = Depends(get_db)):
-    service = MessageService(db)
-    return service.get_message_by_id(message_id)
+async def get_message_by_id(
+    request: Request, message_id: str, db: AsyncSession = Depends(get_async_db)
+):
+    service = AsyncMessageService(db)
+    cached = await service.get_message_by_id_json(message_id)
+    return json_response(request, cached)
+
+
+@router.get(
+    "/message/{message_id}/status",
+    response_model=MessageStatusResponse,
+    responses={
+        200: {"description": "queued, created, duplicate, rejected or failed"},
+        404: {"model": ErrorResponse, "description": "Message not found"},
+        500: {"model": ErrorResponse, "description": "Internal server error"},
+    },
+)
+async def get_message_status(
+    message_id: str, db: AsyncSession = Depends(get_async_db)
+):
+    service = AsyncMessageService(db)
+    status = await service.get_message_status(message_id)
+    return MessageStatusResponse(status="success", data=status)
+
+
+@router.get(
+    "/{session_id}/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Every message of the session as newline-delimited JSON",
+            "content": {"application/x-ndjson": {}},
+        },
+        404: {"model": ErrorResponse, "description": "Session not found"},
+        500: {"model": ErrorResponse, "description": "Internal server error"},
+    },
+)
+async def export_session(session_id: str, db: AsyncSession = Depends(get_async_db)):
+    service = AsyncMessageService(db)
+    lines = await service.export_session(session_id)
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": f'attachment; filename="{session_id}.ndjson"'
+        },
+    )
+
+
+@router.get(
+    "/{session_id}/archive",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Archived messages of the session as newline-delimited JSON",
+            "content": {"application/x-ndjson": {}},
+        },
+        404: {"model": ErrorResponse, "description": "Session has no archived messages"},
+        500: {"model": ErrorResponse, "description": "Internal server error"},
+    },
+)
+async def export_archived_session(
+    session_id: str, db: AsyncSession = Depends(get_async_db)
+):
+    service = AsyncMessageService(db)
+    lines = await service.export_archived_session(session_id)
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": f'attachment; filename="{session_id}.archive.ndjson"'
+        },
+    )
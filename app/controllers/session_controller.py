@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.database import get_async_db
+from app.schemas.message import ErrorResponse
+from app.schemas.session import SessionResponse
+from app.services.async_message_service import AsyncMessageService
+
+router = APIRouter(prefix="/api/sessions", tags=["sessions"])
+
+
+@router.get(
+    "/{session_id}",
+    response_model=SessionResponse,
+    responses={
+        200: {"description": "Session summary retrieved successfully"},
+        404: {"model": ErrorResponse, "description": "Session not found"},
+        500: {"model": ErrorResponse, "description": "Internal server error"},
+    },
+)
+async def get_session_summary(
+    session_id: str, db: AsyncSession = Depends(get_async_db)
+):
+    service = AsyncMessageService(db)
+    return await service.get_session_summary(session_id)
@@ -2,20 +2,75 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
 from app.config import settings
 from app.controllers.message_controller import router as message_router
-from app.models.database import create_tables
+from app.controllers.session_controller import router as session_router
+from app.models.database import SessionLocal, create_async_tables, create_tables
+from app.services.ingestion_queue import ingestion_queue
+from app.services.retention_service import RetentionWorker
+from app.services.writer import writer_client
+from app.utils.content_filter import content_filter
+from app.utils.content_filter_pool import content_filter_pool
 from app.utils.exceptions import MessageProcessingError
+from app.utils.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from app.utils.profiling import ProfilingMiddleware
+from app.utils.word_dictionary import DictionaryWatcher
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    create_tables()
+    # With a writer process, it owns the schema and every write; workers
+    # connect at startup to receive its cache invalidations.
+    if writer_client.enabled:
+        await writer_client.subscribe()
+    else:
+        create_tables()
+        await create_async_tables()
+
+    dictionary_watcher = None
+    if (
+        settings.inappropriate_words_file
+        and settings.inappropriate_words_reload_interval > 0
+    ):
+        dictionary_watcher = DictionaryWatcher(
+            content_filter,
+            settings.inappropriate_words_file,
+            settings.inappropriate_words_reload_interval,
+            on_reload=content_filter_pool.refresh,
+        )
+        dictionary_watcher.start()
+
+    retention_worker = None
+    if (
+        settings.retention_days is not None
+        and settings.retention_interval > 0
+        and not writer_client.enabled
+    ):
+        retention_worker = RetentionWorker(
+            SessionLocal, settings.retention_days, settings.retention_interval
+        )
+        retention_worker.start()
+
+    if settings.ingestion_mode == "async":
+        ingestion_queue.start()
+
+    content_filter_pool.start()
+
     print(f"🚀 {settings.app_name} v{settings.app_version} started successfully")
     yield
 
+    await ingestion_queue.stop()
+    await writer_client.close()
+    content_filter_pool.stop()
+
+    if retention_worker is not None:
+        retention_worker.stop()
+
+    if dictionary_watcher is not None:
+        dictionary_watcher.stop()
+
 
 app = FastAPI(
     lifespan=lifespan,
@@ -32,9 +87,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-DB-Queries", "X-DB-Time-ms", "X-Profile-Id"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
 
 app.include_router(message_router)
+app.include_router(session_router)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
 
 @app.exception_handler(MessageProcessingError)
 async def message_processing_exception_handler(request, exc: MessageProcessingError):
@@ -42,11 +106,7 @@ async def message_processing_exception_handler(request, exc: MessageProcessingEr
         status_code=exc.status_code,
         content={
             "status": "error",
-            "error": {
-                "code": exc.error_code,
-                "message": exc.message,
-                "details": exc.details,
-            }
+            "error": exc.to_dict(),
         },
     )
 
@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String
+from sqlalchemy.sql import func
+
+from app.models.database import Base
+
+
+class ArchiveSegment(Base):
+    """
+    One gzip member of a daily archive file
+
+    Archived messages of a day are appended to <archive_dir>/YYYY/MM/DD.ndjson.gz
+    one gzip member per retention batch; offset and length locate the member
+    so it can be read without decompressing the rest of the file. The index
+    is authoritative: bytes past the last indexed member are discarded.
+    """
+
+    __tablename__ = "archive_segments"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False, index=True)
+    path = Column(String(255), nullable=False)
+    offset = Column(Integer, nullable=False)
+    length = Column(Integer, nullable=False)
+    message_count = Column(Integer, nullable=False)
+    first_timestamp = Column(DateTime, nullable=False)
+    last_timestamp = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+
+    def __repr__(self):
+        return f"<ArchiveSegment(path='{self.path}', offset={self.offset}, message_count={self.message_count})>"
+
+
+class ArchivedSession(Base):
+    """Which archive segments hold messages of a session"""
+
+    __tablename__ = "archived_sessions"
+
+    session_id = Column(String(255), primary_key=True)
+    segment_id = Column(
+        Integer, ForeignKey("archive_segments.id"), primary_key=True
+    )
+    message_count = Column(Integer, nullable=False)
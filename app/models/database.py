@@ -1,14 +1,197 @@
-from sqlalchemy import create_engine
+import re
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 
 from app.config import settings
+from app.models.sharding import RoutedSession, ShardRouter
+from app.utils.metrics import registry
+
+# Per-connection PRAGMAs applied by each storage profile. "default" leaves
+# SQLite's own settings (rollback journal, synchronous=FULL).
+STORAGE_PROFILES = {
+    "default": {},
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+        "mmap_size": 268435456,
+    },
+    "wal_durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+        "mmap_size": 268435456,
+    },
+}
+
+PRAGMA_NAME = re.compile(r"[a-z_]+")
+# Values are interpolated into the PRAGMA statement: integers or bare keywords.
+PRAGMA_VALUE = re.compile(r"-?\d+|[A-Za-z_]+")
+
+
+def get_async_database_url(database_url):
+    if database_url.startswith("sqlite:"):
+        return database_url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    return database_url
+
+
+def get_storage_pragmas(profile, overrides=None):
+    try:
+        pragmas = dict(STORAGE_PROFILES[profile])
+    except KeyError:
+        raise ValueError(
+            f"unknown storage profile '{profile}', "
+            f"expected one of: {', '.join(STORAGE_PROFILES)}"
+        )
+
+    pragmas.update(overrides or {})
+
+    for name, value in pragmas.items():
+        if not PRAGMA_NAME.fullmatch(name):
+            raise ValueError(f"invalid SQLite pragma name '{name}'")
+        if isinstance(value, bool) or not PRAGMA_VALUE.fullmatch(str(value)):
+            raise ValueError(f"invalid value for SQLite pragma '{name}': {value!r}")
+
+    return pragmas
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def configure_sqlite_engine(sync_engine, pragmas):
+    if sync_engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, pragmas)
+
+
+def is_in_memory(database_url):
+    url = make_url(database_url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def get_pool_options(database_url):
+    # In-memory SQLite uses a singleton/static pool that takes no sizing.
+    if is_in_memory(database_url):
+        return {}
+
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+
+
+storage_pragmas = get_storage_pragmas(settings.storage_profile, settings.sqlite_pragmas)
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False}
+
+def build_engine(database_url):
+    sync_engine = create_engine(
+        database_url,
+        connect_args={"check_same_thread": False},
+        **get_pool_options(database_url),
+    )
+    configure_sqlite_engine(sync_engine, storage_pragmas)
+    return sync_engine
+
+
+def build_async_engine(async_database_url):
+    engine = create_async_engine(
+        async_database_url,
+        connect_args={"check_same_thread": False},
+        # aiosqlite defaults to NullPool, which opens a connection and a driver
+        # thread per request. An in-memory database lives in its connection,
+        # so every session has to share the same one.
+        poolclass=StaticPool
+        if is_in_memory(async_database_url)
+        else AsyncAdaptedQueuePool,
+        **get_pool_options(async_database_url),
+    )
+    configure_sqlite_engine(engine.sync_engine, storage_pragmas)
+    return engine
+
+
+engine = build_engine(settings.database_url)
+
+async_database_url = settings.async_database_url or get_async_database_url(
+    settings.database_url
+)
+async_engine = build_async_engine(async_database_url)
+
+# With shards configured, messages and session summaries live in the shard
+# databases and DATABASE_URL is the catalog (message locations, archive index).
+shard_router = async_shard_router = None
+if settings.shard_database_urls:
+    shard_router = ShardRouter(
+        build_engine(url) for url in settings.shard_database_urls
+    )
+    async_shard_router = ShardRouter(
+        build_async_engine(get_async_database_url(url)).sync_engine
+        for url in settings.shard_database_urls
+    )
+
+
+def pool_usage():
+    """
+    Checked out connections per engine pool, for the metrics endpoint
+
+    Returns:
+        dict: (engine, state) -> connections, state "checked_out" or "idle"
+    """
+    pools = {"sync": engine.pool, "async": async_engine.pool}
+    for shard_id, shard_engine in enumerate(shard_router.engines if shard_router else ()):
+        pools[f"shard{shard_id}"] = shard_engine.pool
+    for shard_id, shard_engine in enumerate(
+        async_shard_router.engines if async_shard_router else ()
+    ):
+        pools[f"async_shard{shard_id}"] = shard_engine.pool
+
+    usage = {}
+    for name, pool in pools.items():
+        # Static and null pools (in-memory SQLite) keep no counts.
+        if isinstance(pool, QueuePool):
+            usage[(name, "checked_out")] = pool.checkedout()
+            usage[(name, "idle")] = pool.checkedin()
+    return usage
+
+
+registry.gauge(
+    "db_pool_connections",
+    "Database pool connections by engine and state",
+    pool_usage,
+    ("engine", "state"),
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    class_=RoutedSession,
+    router=shard_router,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    sync_session_class=RoutedSession,
+    router=async_shard_router,
+    autoflush=False,
+    expire_on_commit=False,
+)
 Base = declarative_base()
 
 
@@ -20,5 +203,30 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def create_tables():
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    create_schema(engine)
+    for shard_engine in shard_router.engines if shard_router else ():
+        create_schema(shard_engine)
+
+
+async def create_async_tables():
+    # A file database already got its schema from create_tables; an in-memory
+    # one is private to the async engine's connection.
+    if is_in_memory(async_database_url):
+        async with async_engine.begin() as connection:
+            await connection.run_sync(create_schema)
+
+
+def create_schema(bind):
+    Base.metadata.create_all(bind=bind)
+
+    # create_all skips tables that already exist, so indexes added to a model
+    # later are built here on existing databases.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
@@ -1,18 +1,31 @@
-from sqlalchemy import Column, String, DateTime, Text, JSON
+from sqlalchemy import Column, String, DateTime, Index
 from sqlalchemy.sql import func
 
 from app.models.database import Base
+from app.models.types import CompressedJSON, CompressedText
 
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_session_timestamp", "session_id", "timestamp", "message_id"),
+        Index(
+            "ix_messages_session_sender_timestamp",
+            "session_id",
+            "sender",
+            "timestamp",
+            "message_id",
+        ),
+        # Time-range reads across sessions (GET /api/messages?from=&to=).
+        Index("ix_messages_timestamp", "timestamp", "message_id"),
+    )
     
     message_id = Column(String(255), primary_key=True, index=True)
     session_id = Column(String(255), index=True, nullable=False)
-    content = Column(Text, nullable=False)
+    content = Column(CompressedText, nullable=False)
     timestamp = Column(DateTime, nullable=False, default=func.now())
     sender = Column(String(50), nullable=False)
-    message_metadata = Column(JSON, nullable=True)
+    message_metadata = Column(CompressedJSON, nullable=True)
     processed_at = Column(DateTime, default=func.now())
     
     def __repr__(self):
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String
+
+from app.models.database import Base
+
+
+class MessageLocation(Base):
+    """
+    Global message_id -> session_id index of a sharded deployment
+
+    Lives in the catalog database (DATABASE_URL). A message's shard follows
+    from its session_id, so lookups by message_id find the shard with one
+    primary key read, and the primary key keeps message ids unique across
+    shards. The entries stay valid when the shard count changes.
+    """
+
+    __tablename__ = "message_locations"
+
+    message_id = Column(String(255), primary_key=True)
+    session_id = Column(String(255), nullable=False)
+
+    def __repr__(self):
+        return f"<MessageLocation(message_id='{self.message_id}', session_id='{self.session_id}')>"
@@ -0,0 +1,116 @@
+from sqlalchemy import Column, Integer, MetaData, String, Table, Text, event, text
+
+from app.models.database import Base
+from app.models.message import Message
+
+# Contentless FTS5 index over message content, kept in sync with messages by
+# triggers. It only stores the index, not a copy of the text, so compressed
+# messages stay compressed on disk. Its rowid is the rowid of the message:
+# messages has no INTEGER PRIMARY KEY, so VACUUM may renumber rowids and the
+# index has to be rebuilt afterwards (rebuild_search_index). session_id is
+# indexed too so session-scoped searches intersect with the session's
+# postings instead of ranking every match in the corpus. Contentless tables
+# return NULL for every column and rows can only be removed with the
+# 'delete' command and their original values, hence the triggers below.
+# Declared on its own MetaData because create_all cannot emit CREATE
+# VIRTUAL TABLE.
+messages_fts = Table(
+    "messages_fts",
+    MetaData(),
+    Column("rowid", Integer, primary_key=True),
+    Column("content", Text),
+    Column("session_id", String(255)),
+)
+
+# Tells the current definition apart from older ones in sqlite_master.
+CONTENTLESS_OPTION = "content = ''"
+
+SEARCH_INDEX_DDL = (
+    text(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+            content,
+            session_id,
+            {CONTENTLESS_OPTION},
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """
+    ),
+    # Triggers are recreated on every create_all so existing databases pick
+    # up changes to their definition. They index the decompressed text through
+    # stored_text(), which app.models.types registers on every SQLAlchemy
+    # connection: writes to messages from other SQLite clients fail without it.
+    text("DROP TRIGGER IF EXISTS messages_fts_insert"),
+    text("DROP TRIGGER IF EXISTS messages_fts_delete"),
+    text("DROP TRIGGER IF EXISTS messages_fts_update"),
+    text(
+        """
+        CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages
+        BEGIN
+            INSERT INTO messages_fts (rowid, content, session_id)
+            VALUES (new.rowid, stored_text(new.content), new.session_id);
+        END
+        """
+    ),
+    text(
+        """
+        CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages
+        BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, content, session_id)
+            VALUES ('delete', old.rowid, stored_text(old.content), old.session_id);
+        END
+        """
+    ),
+    text(
+        """
+        CREATE TRIGGER messages_fts_update
+        AFTER UPDATE OF content, session_id ON messages
+        BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, content, session_id)
+            VALUES ('delete', old.rowid, stored_text(old.content), old.session_id);
+            INSERT INTO messages_fts (rowid, content, session_id)
+            VALUES (new.rowid, stored_text(new.content), new.session_id);
+        END
+        """
+    ),
+)
+
+# Re-indexes every message; run after VACUUM, which may renumber rowids.
+REBUILD_SEARCH_INDEX_SQL = (
+    text("INSERT INTO messages_fts (messages_fts) VALUES ('delete-all')"),
+    text(
+        """
+        INSERT INTO messages_fts (rowid, content, session_id)
+        SELECT rowid, stored_text(content), session_id FROM messages
+        """
+    ),
+)
+
+
+def rebuild_search_index(connection):
+    for statement in REBUILD_SEARCH_INDEX_SQL:
+        connection.execute(statement)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_search_index(target, connection, tables=(), **kw):
+    definition = connection.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'")
+    ).scalar()
+    exists = definition is not None and CONTENTLESS_OPTION in definition
+    # An index with its own copy of the text is dropped and rebuilt.
+    if definition is not None and not exists:
+        connection.execute(text("DROP TABLE messages_fts"))
+
+    for statement in SEARCH_INDEX_DDL:
+        connection.execute(statement)
+
+    # Existing databases are indexed once, when the index is first created.
+    if not exists and Message.__table__ not in tables:
+        rebuild_search_index(connection)
+
+
+@event.listens_for(Base.metadata, "after_drop")
+def drop_search_index(target, connection, tables=(), **kw):
+    if Message.__table__ in tables:
+        connection.execute(text("DROP TABLE IF EXISTS messages_fts"))
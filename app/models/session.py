@@ -0,0 +1,71 @@
+from sqlalchemy import Column, String, DateTime, Integer, event, text
+from sqlalchemy.sql import func
+
+from app.models.database import Base
+
+
+class ChatSession(Base):
+    __tablename__ = "sessions"
+
+    session_id = Column(String(255), primary_key=True)
+    message_count = Column(Integer, nullable=False, default=0)
+    user_message_count = Column(Integer, nullable=False, default=0)
+    system_message_count = Column(Integer, nullable=False, default=0)
+    first_timestamp = Column(DateTime, nullable=True)
+    last_timestamp = Column(DateTime, nullable=True)
+    last_message_id = Column(String(255), nullable=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ChatSession(session_id='{self.session_id}', message_count={self.message_count})>"
+
+    def count_for(self, sender=None):
+        if sender is None:
+            return self.message_count
+        return getattr(self, f"{sender.value}_message_count")
+
+    def to_dict(self):
+        return {
+            "session_id": self.session_id,
+            "message_count": self.message_count,
+            "user_message_count": self.user_message_count,
+            "system_message_count": self.system_message_count,
+            "first_timestamp": self.first_timestamp.isoformat() if self.first_timestamp else None,
+            "last_timestamp": self.last_timestamp.isoformat() if self.last_timestamp else None,
+            "last_message_id": self.last_message_id,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+BACKFILL_SESSIONS_SQL = text(
+    """
+    INSERT INTO sessions (
+        session_id, message_count, user_message_count, system_message_count,
+        first_timestamp, last_timestamp, last_message_id, updated_at
+    )
+    SELECT
+        m.session_id,
+        COUNT(*),
+        SUM(m.sender = 'user'),
+        SUM(m.sender = 'system'),
+        MIN(m.timestamp),
+        MAX(m.timestamp),
+        (
+            SELECT l.message_id FROM messages l
+            WHERE l.session_id = m.session_id
+            ORDER BY l.timestamp DESC, l.message_id DESC
+            LIMIT 1
+        ),
+        CURRENT_TIMESTAMP
+    FROM messages m
+    GROUP BY m.session_id
+    """
+)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def backfill_session_summaries(target, connection, tables=(), **kw):
+    # Databases created before the summary table existed get it populated once,
+    # the first time create_all creates it.
+    if ChatSession.__table__ in tables:
+        connection.execute(BACKFILL_SESSIONS_SQL)
@@ -0,0 +1,54 @@
+import hashlib
+
+from sqlalchemy.orm import Session
+
+
+def shard_for_session(session_id, shard_count):
+    """
+    Shard index of a session
+
+    A stable hash of the session id (not Python's salted hash()), so every
+    process and every run maps a session to the same shard.
+    """
+    digest = hashlib.blake2b(session_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shard_count
+
+
+class ShardRouter:
+    """
+    Maps session ids onto a fixed list of shard engines
+
+    Each shard is a separate SQLite database holding the messages and
+    session summaries of the sessions that hash to it.
+    """
+
+    def __init__(self, engines):
+        self.engines = list(engines)
+
+    @property
+    def shard_count(self):
+        return len(self.engines)
+
+    def shard_for(self, session_id):
+        return shard_for_session(session_id, self.shard_count)
+
+
+class RoutedSession(Session):
+    """
+    Session that can run statements on a shard
+
+    Statements executed with bind_arguments={"shard_id": n} go to shard n of
+    the router; everything else (the message location index, archive tables)
+    uses the session's own bind, the catalog database. One session spans
+    several databases, and commit() commits them one after the other, so a
+    transaction is atomic per database only.
+    """
+
+    def __init__(self, router=None, **kwargs):
+        self.router = router
+        super().__init__(**kwargs)
+
+    def get_bind(self, mapper=None, *, shard_id=None, **kwargs):
+        if shard_id is not None:
+            return self.router.engines[shard_id]
+        return super().get_bind(mapper, **kwargs)
@@ -0,0 +1,103 @@
+import json
+import zlib
+
+from sqlalchemy import Text, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.types import TypeDecorator
+
+from app.config import settings
+
+# Values stored compressed are BLOBs whose first byte tells how to read the
+# rest. Uncompressed values stay plain TEXT, so rows written before
+# compression was enabled (or below the threshold) read back unchanged.
+RAW_FLAG = b"\x00"
+ZLIB_FLAG = b"\x01"
+
+
+def encode_stored_text(text):
+    """
+    Compresses text for storage when it is large enough to be worth it
+
+    Args:
+        text: Value to store
+
+    Returns:
+        Union[str, bytes, None]: the text itself, or flag byte + zlib data
+    """
+    if text is None or not settings.compression_enabled:
+        return text
+
+    data = text.encode("utf-8")
+    if len(data) < settings.compression_min_size:
+        return text
+
+    compressed = zlib.compress(data, settings.compression_level)
+    if len(compressed) + 1 >= len(data):
+        return text
+
+    return ZLIB_FLAG + compressed
+
+
+def decode_stored_text(value):
+    """
+    Reads a value written by encode_stored_text
+
+    Args:
+        value: TEXT or flagged BLOB as returned by the driver
+
+    Returns:
+        Optional[str]: The original text
+    """
+    if value is None or isinstance(value, str):
+        return value
+
+    flag, payload = value[:1], bytes(value[1:])
+    if flag == ZLIB_FLAG:
+        return zlib.decompress(payload).decode("utf-8")
+    if flag == RAW_FLAG:
+        return payload.decode("utf-8")
+
+    raise ValueError(f"unknown stored text flag {flag!r}")
+
+
+class CompressedText(TypeDecorator):
+    """Text column compressed at rest above compression_min_size bytes"""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return encode_stored_text(value)
+
+    def process_result_value(self, value, dialect):
+        return decode_stored_text(value)
+
+    def coerce_compared_value(self, op, value):
+        # LIKE patterns and other comparisons are bound as plain text.
+        return Text()
+
+
+class CompressedJSON(TypeDecorator):
+    """JSON column serialized to text and compressed like CompressedText"""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return encode_stored_text(json.dumps(value))
+
+    def process_result_value(self, value, dialect):
+        value = decode_stored_text(value)
+        return json.loads(value) if value is not None else None
+
+
+@event.listens_for(Engine, "connect")
+def register_sqlite_functions(dbapi_connection, connection_record):
+    # Lets SQL (the full-text index triggers) read compressed values. Every
+    # engine gets it, including the ones tools and tests create themselves.
+    if hasattr(dbapi_connection, "create_function"):
+        dbapi_connection.create_function(
+            "stored_text", 1, decode_stored_text, deterministic=True
+        )
@@ -0,0 +1,61 @@
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.archive import ArchivedSession, ArchiveSegment
+from app.repositories.message_repository import MessageRepository
+from app.utils.exceptions import DatabaseError
+
+
+class ArchiveRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def save_batch(self, segments, rows):
+        """
+        Indexes written archive segments and removes their messages
+
+        Both happen in one transaction, so a message is either in the table or
+        reachable through the index.
+
+        Args:
+            segments: (ArchiveSegment, {session_id: message_count}) pairs
+            rows: Archived message rows to delete from the table
+        """
+        try:
+            for segment, session_counts in segments:
+                self.db.add(segment)
+                self.db.flush()
+                self.db.execute(
+                    insert(ArchivedSession),
+                    [
+                        {
+                            "session_id": session_id,
+                            "segment_id": segment.id,
+                            "message_count": message_count,
+                        }
+                        for session_id, message_count in session_counts.items()
+                    ],
+                )
+
+            MessageRepository(self.db).delete_message_rows(rows)
+            self.db.commit()
+
+        except Exception as e:
+            self.db.rollback()
+            raise DatabaseError(f"Error archiving messages: {str(e)}", original_error=e)
+
+    def get_indexed_size(self, path):
+        return self.db.execute(
+            select(func.max(ArchiveSegment.offset + ArchiveSegment.length)).where(
+                ArchiveSegment.path == path
+            )
+        ).scalar() or 0
+
+    def get_session_segments(self, session_id):
+        return (
+            self.db.query(ArchiveSegment)
+            .join(ArchivedSession, ArchivedSession.segment_id == ArchiveSegment.id)
+            .filter(ArchivedSession.session_id == session_id)
+            .order_by(ArchiveSegment.day, ArchiveSegment.id)
+            .all()
+        )
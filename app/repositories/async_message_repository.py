@@ -0,0 +1,113 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories.message_repository import EXPORT_BATCH_SIZE, MessageRepository
+
+
+class AsyncMessageRepository:
+    """
+    Async variant of MessageRepository
+
+    Each call runs the sync repository through AsyncSession.run_sync, so the
+    queries are written once while the driver I/O is awaited on aiosqlite
+    instead of blocking the event loop. Streaming reads use AsyncSession.stream
+    directly so rows are fetched incrementally.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _run(self, method, *args):
+        return await self.db.run_sync(
+            lambda session: getattr(MessageRepository(session), method)(*args)
+        )
+
+    async def create_message(self, message_data, metadata):
+        return await self._run("create_message", message_data, metadata)
+
+    async def create_messages_bulk(self, messages):
+        return await self._run("create_messages_bulk", messages)
+
+    async def delete_message(self, message_id):
+        return await self._run("delete_message", message_id)
+
+    async def get_message_by_id(self, message_id: str):
+        return await self._run("get_message_by_id", message_id)
+
+    async def get_messages_by_session(
+        self, session_id, limit=10, offset=0, sender=None, before=None
+    ):
+        return await self._run(
+            "get_messages_by_session", session_id, limit, offset, sender, before
+        )
+
+    async def get_message_rows_by_time_range(
+        self, start=None, end=None, sender=None, after=None, limit=EXPORT_BATCH_SIZE
+    ):
+        return await self._run(
+            "get_message_rows_by_time_range", start, end, sender, after, limit
+        )
+
+    async def search_message_rows(
+        self, match_query, session_id=None, sender=None, limit=10, after=None
+    ):
+        return await self._run(
+            "search_message_rows", match_query, session_id, sender, limit, after
+        )
+
+    async def message_exists(self, message_id):
+        return await self._run("message_exists", message_id)
+
+    async def get_existing_message_ids(self, message_ids):
+        return await self._run("get_existing_message_ids", message_ids)
+
+    async def get_session_summary(self, session_id):
+        return await self._run("get_session_summary", session_id)
+
+    async def session_exists(self, session_id):
+        return await self._run("session_exists", session_id)
+
+    async def get_session_message_count(self, session_id):
+        return await self._run("get_session_message_count", session_id)
+
+    async def stream_session_messages(self, session_id, batch_size=EXPORT_BATCH_SIZE):
+        repository = MessageRepository(self.db.sync_session)
+        result = await self.db.stream(
+            repository.session_export_statement(session_id, batch_size),
+            bind_arguments=repository.session_shard(session_id),
+        )
+        async for partition in result.partitions():
+            yield partition
+
+    async def iter_messages_by_time_range(
+        self,
+        start=None,
+        end=None,
+        sender=None,
+        limit=None,
+        batch_size=EXPORT_BATCH_SIZE,
+    ):
+        """
+        Yields batches of rows in [start, end), oldest first
+
+        Each batch is a separate keyset query in its own short read
+        transaction, so a long range never pins a WAL snapshot for the whole
+        transfer.
+        """
+        after = None
+        remaining = limit
+
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            rows = await self.get_message_rows_by_time_range(
+                start, end, sender, after, size
+            )
+            await self.db.rollback()
+
+            if rows:
+                yield rows
+            if len(rows) < size:
+                return
+
+            after = (rows[-1].timestamp, rows[-1].message_id)
+            if remaining is not None:
+                remaining -= len(rows)
@@ -1,28 +1,107 @@
+import heapq
+from collections import defaultdict
+from itertools import islice
+
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import (
+    Text,
+    case,
+    delete,
+    desc,
+    func,
+    literal_column,
+    or_,
+    select,
+    tuple_,
+    type_coerce,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from app.models.message import Message
+from app.models.message_location import MessageLocation
+from app.models.search import messages_fts
+from app.models.session import ChatSession
 from app.utils.exceptions import DatabaseError
+from app.utils.metrics import STAGE_LATENCY
+
+# Keeps IN (...) lists below SQLite's bound-parameter limit on older builds.
+ID_LOOKUP_CHUNK_SIZE = 500
+
+# Plain columns for the read path that skips ORM hydration. content and
+# metadata come back as stored (text, or compressed bytes) and are decoded by
+# message_row_to_dict only for rows that are serialized; metadata is embedded
+# as JSON text without re-parsing.
+MESSAGE_ROW_COLUMNS = (
+    Message.message_id,
+    Message.session_id,
+    type_coerce(Message.content, Text).label("content"),
+    Message.timestamp,
+    Message.sender,
+    type_coerce(Message.message_metadata, Text).label("metadata"),
+    Message.processed_at,
+)
+
+SESSION_PAGE_ORDER = (desc(Message.timestamp), desc(Message.message_id))
+
+EXPORT_BATCH_SIZE = 500
+
+# bm25 is lower for better matches, so hits are returned in ascending order.
+# Only content terms count towards the score (column weights 1, 0).
+SEARCH_SCORE = func.bm25(literal_column(messages_fts.name), 1.0, 0.0)
+
+# The search index is keyed by the rowid of the message.
+MESSAGE_ROWID = literal_column(f"{Message.__tablename__}.rowid")
 
 
 class MessageRepository:
     def __init__(self, db: Session):
         self.db = db
+        # Set for a RoutedSession over shards; see app.models.sharding.
+        self.router = getattr(db, "router", None)
 
     def create_message(self, message_data, metadata):
+        """
+        Inserts a message unless its id is already stored
+
+        INSERT ... ON CONFLICT DO NOTHING RETURNING reports the conflict and
+        hands back the stored row in the same statement, so there is no
+        existence check before the write and no refresh after it.
+
+        Returns:
+            Optional[Message]: the new message, or None if the id already exists
+        """
+        row = {
+            "message_id": message_data.message_id,
+            "session_id": message_data.session_id,
+            "content": message_data.content,
+            "timestamp": message_data.timestamp,
+            "sender": message_data.sender.value,
+            "message_metadata": metadata,
+        }
+        statement = (
+            sqlite_insert(Message)
+            .values(row)
+            .on_conflict_do_nothing(index_elements=[Message.message_id])
+            .returning(Message)
+        )
+
         try:
-            db_message = Message(
-                message_id=message_data.message_id,
-                session_id=message_data.session_id,
-                content=message_data.content,
-                timestamp=message_data.timestamp,
-                sender=message_data.sender.value,
-                message_metadata=metadata,
-            )
+            with STAGE_LATENCY.time("insert"):
+                db_message = None
+                if self.router is None or self._claim_message_id(row):
+                    db_message = self.db.scalars(
+                        statement, bind_arguments=self.session_shard(row["session_id"])
+                    ).first()
 
-            self.db.add(db_message)
-            self.db.commit()
-            self.db.refresh(db_message)
+                if db_message is not None:
+                    self._record_session_messages([row])
+                    # Detached, the RETURNING values stay loaded past the commit.
+                    self.db.expunge(db_message)
+
+            # With no row written, this ends the transaction the INSERT opened.
+            with STAGE_LATENCY.time("commit"):
+                self.db.commit()
 
             return db_message
 
@@ -30,34 +109,515 @@ class MessageRepository:
             self.db.rollback()
             raise DatabaseError(f"Error creating message: {str(e)}", original_error=e)
 
+    def create_messages_bulk(self, messages):
+        """
+        Inserts (MessageCreate, metadata) pairs in one transaction
+
+        Ids stored since the caller checked for them (e.g. by a concurrent
+        single insert) are skipped with ON CONFLICT DO NOTHING instead of
+        failing the whole batch.
+
+        Returns:
+            List[str]: ids of the messages actually inserted
+        """
+        if not messages:
+            return []
+
+        rows = [
+            {
+                "message_id": message_data.message_id,
+                "session_id": message_data.session_id,
+                "content": message_data.content,
+                "timestamp": message_data.timestamp,
+                "sender": message_data.sender.value,
+                "message_metadata": metadata,
+            }
+            for message_data, metadata in messages
+        ]
+
+        try:
+            if self.router is not None:
+                claimed = set(
+                    self.db.scalars(
+                        sqlite_insert(MessageLocation.__table__)
+                        .on_conflict_do_nothing(index_elements=["message_id"])
+                        .returning(MessageLocation.__table__.c.message_id),
+                        [
+                            {"message_id": row["message_id"], "session_id": row["session_id"]}
+                            for row in rows
+                        ],
+                    )
+                )
+                rows = [row for row in rows if row["message_id"] in claimed]
+
+            # Table-level INSERT: ORM bulk inserts ignore bind_arguments.
+            statement = (
+                sqlite_insert(Message.__table__)
+                .on_conflict_do_nothing(index_elements=["message_id"])
+                .returning(Message.__table__.c.message_id)
+            )
+            inserted = []
+            with STAGE_LATENCY.time("insert"):
+                for shard, shard_rows in self._group_by_shard(rows):
+                    inserted.extend(
+                        self.db.scalars(statement, shard_rows, bind_arguments=shard)
+                    )
+                inserted_ids = set(inserted)
+                self._record_session_messages(
+                    [row for row in rows if row["message_id"] in inserted_ids]
+                )
+
+            with STAGE_LATENCY.time("commit"):
+                self.db.commit()
+
+            return inserted
+
+        except Exception as e:
+            self.db.rollback()
+            raise DatabaseError(f"Error creating messages: {str(e)}", original_error=e)
+
+    def delete_message(self, message_id):
+        try:
+            db_message = self.get_message_by_id(message_id)
+            if db_message is None:
+                return False
+
+            self.delete_message_rows([db_message])
+            self.db.commit()
+
+            return True
+
+        except Exception as e:
+            self.db.rollback()
+            raise DatabaseError(f"Error deleting message: {str(e)}", original_error=e)
+
+    def delete_message_rows(self, rows):
+        """
+        Deletes messages and updates their session summaries without committing
+
+        Args:
+            rows: Rows or objects with message_id, session_id, timestamp and
+                sender; the caller commits them together with its own changes
+        """
+        removed = [self._summary_row(row) for row in rows]
+
+        for shard, shard_rows in self._group_by_shard(removed):
+            self._delete_by_id(Message, [row["message_id"] for row in shard_rows], shard)
+        if self.router is not None:
+            self._delete_by_id(MessageLocation, [row["message_id"] for row in removed])
+
+        self._remove_session_messages(removed)
+
+    def _delete_by_id(self, model, message_ids, shard=None):
+        for start in range(0, len(message_ids), ID_LOOKUP_CHUNK_SIZE):
+            chunk = message_ids[start : start + ID_LOOKUP_CHUNK_SIZE]
+            self.db.execute(
+                delete(model).where(model.message_id.in_(chunk)),
+                bind_arguments=shard,
+            )
+
     def get_message_by_id(self, message_id: str):
-        return self.db.query(Message).filter(Message.message_id == message_id).first()
+        shard = self._message_shard(message_id)
+        if shard is None:
+            return None
+
+        return self._detach(
+            self.db.scalars(
+                select(Message).where(Message.message_id == message_id),
+                bind_arguments=shard,
+            ).first()
+        )
+
+    def get_messages_by_session(
+        self, session_id, limit=10, offset=0, sender=None, before=None
+    ):
+        summary = self.get_session_summary(session_id)
+        total_count = summary.count_for(sender) if summary else 0
+
+        messages = self.db.scalars(
+            select(Message)
+            .where(*self._session_page_criteria(session_id, sender, before))
+            .order_by(*SESSION_PAGE_ORDER)
+            .offset(offset if before is None else 0)
+            .limit(limit),
+            bind_arguments=self.session_shard(session_id),
+        ).all()
+
+        return [self._detach(message) for message in messages], total_count
+
+    def get_message_rows_by_session(
+        self, session_id, limit=10, offset=0, sender=None, before=None
+    ):
+        summary = self.get_session_summary(session_id)
+        total_count = summary.count_for(sender) if summary else 0
+
+        rows = self.db.execute(
+            select(*MESSAGE_ROW_COLUMNS)
+            .where(*self._session_page_criteria(session_id, sender, before))
+            .order_by(*SESSION_PAGE_ORDER)
+            .offset(offset if before is None else 0)
+            .limit(limit),
+            bind_arguments=self.session_shard(session_id),
+        ).all()
+
+        return rows, total_count
+
+    def get_message_row_by_id(self, message_id):
+        shard = self._message_shard(message_id)
+        if shard is None:
+            return None
+
+        return self.db.execute(
+            select(*MESSAGE_ROW_COLUMNS).where(Message.message_id == message_id),
+            bind_arguments=shard,
+        ).first()
+
+    @staticmethod
+    def session_export_statement(session_id, batch_size=EXPORT_BATCH_SIZE):
+        return (
+            select(*MESSAGE_ROW_COLUMNS)
+            .where(Message.session_id == session_id)
+            .order_by(Message.timestamp, Message.message_id)
+            .execution_options(yield_per=batch_size)
+        )
+
+    def iter_session_messages(self, session_id, batch_size=EXPORT_BATCH_SIZE):
+        result = self.db.execute(
+            self.session_export_statement(session_id, batch_size),
+            bind_arguments=self.session_shard(session_id),
+        )
+        for partition in result.partitions():
+            yield from partition
+
+    def get_message_rows_by_time_range(
+        self, start=None, end=None, sender=None, after=None, limit=EXPORT_BATCH_SIZE
+    ):
+        """
+        One keyset batch of messages in [start, end), across sessions
+
+        Args:
+            start: Optional inclusive lower bound on timestamp
+            end: Optional exclusive upper bound on timestamp
+            sender: Optional SenderType filter
+            after: Optional (timestamp, message_id) of the last row already read
+            limit: Batch size
+
+        Returns:
+            List[Row]: MESSAGE_ROW_COLUMNS, oldest first, merged across shards
+        """
+        criteria = []
+
+        if start is not None:
+            criteria.append(Message.timestamp >= _stored_timestamp(start))
+        if end is not None:
+            criteria.append(Message.timestamp < _stored_timestamp(end))
+        if sender:
+            criteria.append(Message.sender == sender.value)
+        if after is not None:
+            criteria.append(
+                tuple_(Message.timestamp, Message.message_id) > tuple_(*after)
+            )
+
+        statement = (
+            select(*MESSAGE_ROW_COLUMNS)
+            .where(*criteria)
+            .order_by(Message.timestamp, Message.message_id)
+            .limit(limit)
+        )
+
+        return self._merge_shards(
+            statement, lambda row: (row.timestamp, row.message_id), limit
+        )
+
+    def search_message_rows(
+        self, match_query, session_id=None, sender=None, limit=10, after=None
+    ):
+        """
+        Full-text search over message content, best matches first
 
-    def get_messages_by_session(self, session_id, limit=10, offset=0, sender=None):
-        query = self.db.query(Message).filter(Message.session_id == session_id)
+        Args:
+            match_query: FTS5 MATCH expression, see build_match_query
+            session_id: Optional session to search in; pass it to
+                build_match_query too so the index narrows the match
+            sender: Optional SenderType filter
+            limit: Maximum number of rows
+            after: Optional (score, message_id) of the last hit already returned
+
+        Returns:
+            List[Row]: MESSAGE_ROW_COLUMNS plus the bm25 score. Across shards,
+                scores use per-shard term statistics and are merged as is.
+        """
+        statement = (
+            select(*MESSAGE_ROW_COLUMNS, SEARCH_SCORE.label("score"))
+            .select_from(messages_fts)
+            .join(Message, MESSAGE_ROWID == messages_fts.c.rowid)
+            .where(literal_column(messages_fts.name).op("MATCH")(match_query))
+        )
 
+        if session_id is not None:
+            statement = statement.where(Message.session_id == session_id)
         if sender:
-            query = query.filter(Message.sender == sender.value)
+            statement = statement.where(Message.sender == sender.value)
+        if after is not None:
+            statement = statement.where(
+                tuple_(SEARCH_SCORE, Message.message_id) > tuple_(*after)
+            )
+
+        statement = statement.order_by(SEARCH_SCORE, Message.message_id).limit(
+            limit
+        )
 
-        total_count = query.count()
+        if session_id is not None:
+            return self.db.execute(
+                statement, bind_arguments=self.session_shard(session_id)
+            ).all()
 
-        messages = (
-            query.order_by(desc(Message.timestamp)).offset(offset).limit(limit).all()
+        return self._merge_shards(
+            statement, lambda row: (row.score, row.message_id), limit
         )
 
-        return messages, total_count
+    @staticmethod
+    def _session_page_criteria(session_id, sender, before):
+        criteria = [Message.session_id == session_id]
+
+        if sender:
+            criteria.append(Message.sender == sender.value)
+
+        if before is not None:
+            criteria.append(
+                tuple_(Message.timestamp, Message.message_id) < tuple_(*before)
+            )
+
+        return criteria
 
     def message_exists(self, message_id):
-        return (
-            self.db.query(Message).filter(Message.message_id == message_id).first()
-            is not None
+        return bool(self.get_existing_message_ids([message_id]))
+
+    def get_existing_message_ids(self, message_ids):
+        message_ids = list(dict.fromkeys(message_ids))
+        existing = set()
+        # Sharded, the catalog's location index knows every stored id.
+        model = Message if self.router is None else MessageLocation
+
+        for start in range(0, len(message_ids), ID_LOOKUP_CHUNK_SIZE):
+            chunk = message_ids[start : start + ID_LOOKUP_CHUNK_SIZE]
+            existing.update(
+                self.db.scalars(
+                    select(model.message_id).where(model.message_id.in_(chunk))
+                )
+            )
+
+        return existing
+
+    def get_session_summary(self, session_id):
+        return self._detach(
+            self.db.get(
+                ChatSession, session_id, bind_arguments=self.session_shard(session_id)
+            )
         )
 
-    def session_exists(self, session_id):
+    def get_session_bounds(self, session_id):
+        """
+        Oldest timestamp and newest message of a session, read from the table
+
+        Returns:
+            tuple: (first_timestamp, last) where last has timestamp and
+                message_id; (None, None) when the session has no messages
+        """
+        shard = self.session_shard(session_id)
+        first_timestamp = self.db.scalar(
+            select(func.min(Message.timestamp)).where(Message.session_id == session_id),
+            bind_arguments=shard,
+        )
+        last = self.db.execute(
+            select(Message.timestamp, Message.message_id)
+            .where(Message.session_id == session_id)
+            .order_by(desc(Message.timestamp), desc(Message.message_id))
+            .limit(1),
+            bind_arguments=shard,
+        ).first()
+
+        return first_timestamp, last
+
+    def session_shard(self, session_id):
+        """
+        bind_arguments that run a statement on the shard of a session
+
+        Returns:
+            dict: {"shard_id": n}, or {} when the database is not sharded
+        """
+        if self.router is None:
+            return {}
+        return {"shard_id": self.router.shard_for(session_id)}
+
+    def _message_shard(self, message_id):
+        # None when the location index does not know the id.
+        if self.router is None:
+            return {}
+
+        session_id = self.db.scalar(
+            select(MessageLocation.session_id).where(
+                MessageLocation.message_id == message_id
+            )
+        )
+        return None if session_id is None else self.session_shard(session_id)
+
+    def _claim_message_id(self, row):
+        # Registers the id in the location index; False if it is already taken.
         return (
-            self.db.query(Message).filter(Message.session_id == session_id).first()
+            self.db.scalar(
+                sqlite_insert(MessageLocation)
+                .values(message_id=row["message_id"], session_id=row["session_id"])
+                .on_conflict_do_nothing(index_elements=[MessageLocation.message_id])
+                .returning(MessageLocation.message_id)
+            )
             is not None
         )
 
+    def _group_by_shard(self, rows):
+        if self.router is None:
+            return [({}, rows)] if rows else []
+
+        groups = defaultdict(list)
+        for row in rows:
+            groups[self.router.shard_for(row["session_id"])].append(row)
+
+        return [({"shard_id": shard_id}, group) for shard_id, group in groups.items()]
+
+    def _merge_shards(self, statement, key, limit):
+        if self.router is None:
+            return self.db.execute(statement).all()
+
+        # Every shard returns its own first `limit` rows in order.
+        results = [
+            self.db.execute(statement, bind_arguments={"shard_id": shard_id}).all()
+            for shard_id in range(self.router.shard_count)
+        ]
+        return list(islice(heapq.merge(*results, key=key), limit))
+
+    def _detach(self, instance):
+        # Expired attributes of a sharded object would be reloaded from the
+        # catalog, so objects read from a shard are detached right away.
+        if self.router is not None and instance is not None:
+            self.db.expunge(instance)
+        return instance
+
+    def session_exists(self, session_id):
+        return self.get_session_summary(session_id) is not None
+
     def get_session_message_count(self, session_id):
-        return self.db.query(Message).filter(Message.session_id == session_id).count()
+        summary = self.get_session_summary(session_id)
+        return summary.message_count if summary else 0
+
+    @staticmethod
+    def _summary_row(message):
+        return {
+            "message_id": message.message_id,
+            "session_id": message.session_id,
+            "timestamp": message.timestamp,
+            "sender": message.sender,
+        }
+
+    def _record_session_messages(self, rows):
+        summaries = {}
+
+        for row in rows:
+            timestamp = _stored_timestamp(row["timestamp"])
+            summary = summaries.setdefault(
+                row["session_id"],
+                {
+                    "session_id": row["session_id"],
+                    "message_count": 0,
+                    "user_message_count": 0,
+                    "system_message_count": 0,
+                    "first_timestamp": timestamp,
+                    "last_timestamp": timestamp,
+                    "last_message_id": row["message_id"],
+                },
+            )
+            summary["message_count"] += 1
+            summary[f"{row['sender']}_message_count"] += 1
+            summary["first_timestamp"] = min(summary["first_timestamp"], timestamp)
+            if (timestamp, row["message_id"]) > (
+                summary["last_timestamp"],
+                summary["last_message_id"],
+            ):
+                summary["last_timestamp"] = timestamp
+                summary["last_message_id"] = row["message_id"]
+
+        stmt = sqlite_insert(ChatSession.__table__)
+        excluded = stmt.excluded
+        is_newer = or_(
+            ChatSession.last_timestamp.is_(None),
+            tuple_(excluded.last_timestamp, excluded.last_message_id)
+            > tuple_(ChatSession.last_timestamp, ChatSession.last_message_id),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ChatSession.session_id],
+            set_={
+                "message_count": ChatSession.message_count + excluded.message_count,
+                "user_message_count": ChatSession.user_message_count
+                + excluded.user_message_count,
+                "system_message_count": ChatSession.system_message_count
+                + excluded.system_message_count,
+                "first_timestamp": func.min(
+                    func.coalesce(ChatSession.first_timestamp, excluded.first_timestamp),
+                    excluded.first_timestamp,
+                ),
+                "last_timestamp": case(
+                    (is_newer, excluded.last_timestamp),
+                    else_=ChatSession.last_timestamp,
+                ),
+                "last_message_id": case(
+                    (is_newer, excluded.last_message_id),
+                    else_=ChatSession.last_message_id,
+                ),
+                "updated_at": func.now(),
+            },
+        )
+
+        for shard, shard_summaries in self._group_by_shard(list(summaries.values())):
+            self.db.execute(stmt, shard_summaries, bind_arguments=shard)
+
+    def _remove_session_messages(self, rows):
+        removed = {}
+
+        for row in rows:
+            counts = removed.setdefault(
+                row["session_id"],
+                {"message_count": 0, "user_message_count": 0, "system_message_count": 0},
+            )
+            counts["message_count"] += 1
+            counts[f"{row['sender']}_message_count"] += 1
+
+        for session_id, counts in removed.items():
+            shard = self.session_shard(session_id)
+            first_timestamp, last = self.get_session_bounds(session_id)
+
+            if last is None:
+                self.db.execute(
+                    delete(ChatSession).where(ChatSession.session_id == session_id),
+                    bind_arguments=shard,
+                )
+                continue
+
+            self.db.execute(
+                update(ChatSession)
+                .where(ChatSession.session_id == session_id)
+                .values(
+                    message_count=ChatSession.message_count - counts["message_count"],
+                    user_message_count=ChatSession.user_message_count
+                    - counts["user_message_count"],
+                    system_message_count=ChatSession.system_message_count
+                    - counts["system_message_count"],
+                    first_timestamp=first_timestamp,
+                    last_timestamp=last.timestamp,
+                    last_message_id=last.message_id,
+                ),
+                bind_arguments=shard,
+            )
+
+
+def _stored_timestamp(timestamp):
+    # SQLite DateTime columns keep the wall-clock value and drop the offset.
+    return timestamp.replace(tzinfo=None)
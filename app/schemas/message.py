@@ -2,10 +2,12 @@ from datetime import datetime
 
 from typing import Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 from enum import Enum
 
+from app.utils.metrics import STAGE_LATENCY
+
 
 class SenderType(str, Enum):
     USER = "user"
@@ -37,6 +39,12 @@ class MessageCreate(BaseModel):
             raise ValueError("content is required")
         return v.strip()
 
+    @model_validator(mode="wrap")
+    @classmethod
+    def time_validation(cls, values, handler):
+        with STAGE_LATENCY.time("validation"):
+            return handler(values)
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -49,6 +57,32 @@ class MessageCreate(BaseModel):
         }
 
 
+class MessageBatchCreate(BaseModel):
+    messages: list[MessageCreate] = Field(..., min_length=1)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "messages": [
+                    {
+                        "message_id": "msg_123456",
+                        "session_id": "session_789",
+                        "content": "Hola",
+                        "timestamp": "2023-12-01T10:00:00Z",
+                        "sender": "user",
+                    },
+                    {
+                        "message_id": "msg_123457",
+                        "session_id": "session_789",
+                        "content": "Hola, ¿en qué puedo ayudarte?",
+                        "timestamp": "2023-12-01T10:00:05Z",
+                        "sender": "system",
+                    },
+                ]
+            }
+        }
+
+
 class MessageResponse(BaseModel):
     status: str
     data: dict
@@ -71,6 +105,7 @@ class MessageResponse(BaseModel):
                         "inappropriate_words": [],
                         "processed": True,
                         "processing_version": "1.0",
+                        "dictionary_version": "3f9a1c0b7d2e",
                     },
                     "processed_at": "2025-07-31T00:53:48",
                 },
@@ -117,6 +152,7 @@ class MessageListResponse(BaseModel):
                                 "inappropriate_words": [],
                                 "processed": True,
                                 "processing_version": "1.0",
+                                "dictionary_version": "3f9a1c0b7d2e",
                             },
                             "processed_at": "2025-07-31T00:21:17",
                         }
@@ -125,11 +161,84 @@ class MessageListResponse(BaseModel):
                     "limit": 10,
                     "offset": 0,
                     "has_more": False,
+                    "next_cursor": None,
                 },
             }
         }
 
 
+class MessageSearchResponse(BaseModel):
+    status: str
+    data: dict
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "success",
+                "data": {
+                    "messages": [
+                        {
+                            "message_id": "msg_123456",
+                            "session_id": "session_abcdef",
+                            "content": "Hola, ¿cómo puedo ayudarte hoy?",
+                            "timestamp": "2023-06-15T14:30:00",
+                            "sender": "system",
+                            "metadata": {"word_count": 6, "character_count": 32},
+                            "processed_at": "2023-06-15T14:30:01",
+                            "score": -1.27,
+                        }
+                    ],
+                    "limit": 10,
+                    "has_more": True,
+                    "next_cursor": "Wy0xLjI3LCJtc2dfMTIzNDU2Il0",
+                },
+            }
+        }
+
+
+class MessageBatchResponse(BaseModel):
+    status: str
+    data: dict
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "success",
+                "data": {
+                    "results": [
+                        {"message_id": "msg_123456", "status": "created"},
+                        {"message_id": "msg_123457", "status": "duplicate"},
+                        {
+                            "message_id": "msg_123458",
+                            "status": "rejected",
+                            "error": {
+                                "code": "CONTENT_FILTER_ERROR",
+                                "message": "content contains inappropriate words: bad",
+                                "details": {"filtered_content": "*** content"},
+                            },
+                        },
+                    ],
+                    "created": 1,
+                    "duplicates": 1,
+                    "rejected": 1,
+                },
+            }
+        }
+
+
+class MessageStatusResponse(BaseModel):
+    status: str
+    data: dict
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "accepted",
+                "data": {"message_id": "msg_123456", "status": "queued"},
+            }
+        }
+
+
 class ErrorResponse(BaseModel):
     status: str
     error: dict
@@ -153,6 +262,9 @@ class MessageQueryParams(BaseModel):
     )
     offset: Optional[int] = Field(0, ge=0, description="Number of messages to skip")
     sender: Optional[SenderType] = Field(None, description="Filter by sender")
+    before: Optional[str] = Field(
+        None, description="Cursor returned as next_cursor by the previous page"
+    )
 
     class Config:
         json_schema_extra = {"example": {"limit": 10, "offset": 0, "sender": "user"}}
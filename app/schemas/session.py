@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+
+
+class SessionResponse(BaseModel):
+    status: str
+    data: dict
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "success",
+                "data": {
+                    "session_id": "session_789",
+                    "message_count": 5,
+                    "user_message_count": 3,
+                    "system_message_count": 2,
+                    "first_timestamp": "2023-12-01T10:00:00",
+                    "last_timestamp": "2023-12-01T10:04:00",
+                    "last_message_id": "msg_123460",
+                    "updated_at": "2025-07-31T00:53:48",
+                },
+            }
+        }
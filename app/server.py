@@ -0,0 +1,130 @@
+"""
+Runs the API on several worker processes with a single writer process
+
+    python -m app.server --host 0.0.0.0 --port 8000 --workers 4
+
+With more than one worker, a writer process is started first: it creates
+the schema, runs the retention job and is the only process that writes to
+the database. The uvicorn workers get WRITER_SOCKET and forward every write
+to it, so reads scale with the workers while SQLite keeps a single writer.
+With one worker this is plain uvicorn.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import time
+
+import uvicorn
+
+from app.config import settings
+from app.models.database import AsyncSessionLocal, SessionLocal, create_tables
+from app.services.retention_service import RetentionWorker
+from app.services.writer import WriteServer
+
+# Seconds the launcher waits for the writer socket to appear.
+WRITER_STARTUP_TIMEOUT = 30.0
+
+
+async def run_writer(path):
+    create_tables()
+
+    retention_worker = None
+    if settings.retention_days is not None and settings.retention_interval > 0:
+        retention_worker = RetentionWorker(
+            SessionLocal, settings.retention_days, settings.retention_interval
+        )
+        retention_worker.start()
+
+    server = WriteServer(
+        path,
+        AsyncSessionLocal,
+        settings.writer_batch_size,
+        settings.writer_flush_interval,
+    )
+    await server.start()
+
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    await stop.wait()
+
+    await server.stop()
+    if retention_worker is not None:
+        retention_worker.stop()
+
+
+def _writer_process(path):
+    # Ctrl+C reaches the whole process group; the launcher stops the writer
+    # with SIGTERM once the workers are gone, so their last writes land.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(run_writer(path))
+
+
+def start_writer(path):
+    if os.path.exists(path):
+        os.unlink(path)
+
+    writer = multiprocessing.get_context("spawn").Process(
+        target=_writer_process, args=(path,), name="writer"
+    )
+    writer.start()
+
+    deadline = time.monotonic() + WRITER_STARTUP_TIMEOUT
+    while not os.path.exists(path):
+        if not writer.is_alive() or time.monotonic() > deadline:
+            writer.terminate()
+            raise RuntimeError(f"writer process did not start listening on {path}")
+        time.sleep(0.05)
+
+    return writer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.server",
+        description="Runs the API workers and, with several workers, the writer process",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("WEB_CONCURRENCY", "1")),
+        help="API worker processes (default: $WEB_CONCURRENCY or 1)",
+    )
+    parser.add_argument(
+        "--socket",
+        default=settings.writer_socket
+        or os.path.join(tempfile.gettempdir(), "chat-writer.sock"),
+        help="Unix socket of the writer process",
+    )
+    args = parser.parse_args(argv)
+
+    if args.workers <= 1:
+        uvicorn.run("app.main:app", host=args.host, port=args.port)
+        return 0
+
+    try:
+        writer = start_writer(args.socket)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    # Read by app.config in the spawned workers.
+    os.environ["WRITER_SOCKET"] = args.socket
+    try:
+        uvicorn.run(
+            "app.main:app", host=args.host, port=args.port, workers=args.workers
+        )
+    finally:
+        writer.terminate()
+        writer.join()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.repositories.async_message_repository import AsyncMessageRepository
+from app.schemas.message import MessageBatchResponse
+from app.services.ingestion_queue import ingestion_queue
+from app.services.message_service import MessageService
+from app.services.retention_service import RetentionService
+from app.services.writer import writer_client
+from app.utils.content_filter_pool import content_filter_pool
+from app.utils.exceptions import (
+    MessageNotFoundError,
+    MessageProcessingError,
+    MessageValidationError,
+    SessionNotFoundError,
+)
+from app.utils.metrics import MESSAGE_DUPLICATES
+from app.utils.serialization import dumps, message_row_to_dict
+
+
+class AsyncMessageService:
+    """
+    Async variant of MessageService used by the API controllers
+
+    Business rules live in MessageService; each call runs it on the sync
+    session behind the AsyncSession so database round-trips are awaited.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repository = AsyncMessageRepository(db)
+
+    async def _run(self, method, *args):
+        return await self.db.run_sync(
+            lambda session: getattr(MessageService(session), method)(*args)
+        )
+
+    async def create_message(self, message_data):
+        # Large content is scanned in the filter pool, off the event loop.
+        analysis = await content_filter_pool.analyze(message_data.content)
+        if writer_client.enabled:
+            return await self._forward_message(message_data, analysis)
+        return await self._run("create_message", message_data, analysis)
+
+    async def _forward_message(self, message_data, analysis=None):
+        """
+        create_message for API workers that hand writes to the writer process
+
+        The message is validated and filtered here, so that work scales with
+        the workers; the writer re-checks duplicates when it stores it, and
+        the stored message is then read back.
+        """
+        message_id = message_data.message_id
+        if settings.idempotent_create and await self.repository.message_exists(
+            message_id
+        ):
+            MESSAGE_DUPLICATES.inc()
+            return await self.get_message_by_id(message_id)
+
+        analysis = await self._run("validate_new_message", message_data, analysis)
+        outcome = await writer_client.ingest([message_data], [analysis])
+        result = outcome["results"][0]
+
+        if result["status"] == "duplicate" and not settings.idempotent_create:
+            raise MessageService.duplicate_error(message_data)
+        if result["status"] == "rejected":
+            error = result["error"]
+            raise MessageProcessingError(
+                error["message"], error["code"], details=error["details"]
+            )
+
+        # The snapshot read by the checks above predates the writer's commit.
+        await self.db.rollback()
+        return await self.get_message_by_id(message_id)
+
+    async def enqueue_message(self, message_data):
+        """
+        Validates a message and hands it to the write-behind queue
+
+        Duplicate ids and filtered content are rejected here, as in
+        create_message; the writer re-checks duplicates when it stores the
+        batch.
+        """
+        analysis = await content_filter_pool.analyze(message_data.content)
+        analysis = await self._run("validate_new_message", message_data, analysis)
+        return ingestion_queue.put(message_data, analysis)
+
+    async def get_message_status(self, message_id):
+        status = ingestion_queue.get_status(message_id)
+        if status is not None:
+            return status
+
+        if not await self.repository.message_exists(message_id):
+            raise MessageNotFoundError(message_id)
+
+        return {"message_id": message_id, "status": "created"}
+
+    async def create_messages_batch(self, messages):
+        MessageService.check_batch_size(messages)
+        analyses = await content_filter_pool.analyze_many(messages)
+
+        if writer_client.enabled:
+            outcome = await writer_client.ingest(
+                messages, MessageService.analyze_messages(messages, analyses)
+            )
+            return MessageBatchResponse(status="success", data=outcome)
+
+        return await self._run("create_messages_batch", messages, analyses)
+
+    async def get_messages_by_session(
+        self,
+        session_id,
+        limit=10,
+        offset=0,
+        sender=None,
+        before=None,
+    ):
+        return await self._run(
+            "get_messages_by_session", session_id, limit, offset, sender, before
+        )
+
+    async def get_messages_by_session_json(
+        self,
+        session_id,
+        limit=10,
+        offset=0,
+        sender=None,
+        before=None,
+    ):
+        return await self._run(
+            "get_messages_by_session_json", session_id, limit, offset, sender, before
+        )
+
+    async def search_messages_json(
+        self, query, session_id=None, sender=None, limit=10, cursor=None
+    ):
+        return await self._run(
+            "search_messages_json", query, session_id, sender, limit, cursor
+        )
+
+    async def get_session_summary(self, session_id):
+        return await self._run("get_session_summary", session_id)
+
+    async def get_message_by_id(self, message_id):
+        return await self._run("get_message_by_id", message_id)
+
+    async def get_message_by_id_json(self, message_id):
+        return await self._run("get_message_by_id_json", message_id)
+
+    async def export_session(self, session_id):
+        """
+        Checks the session and returns an NDJSON byte stream of its messages
+
+        The existence check runs before streaming starts so a missing session
+        is still reported as a 404; rows are then fetched and encoded one
+        partition at a time, oldest first.
+        """
+        if not await self.repository.session_exists(session_id):
+            raise SessionNotFoundError(session_id)
+
+        return self._export_lines(session_id)
+
+    async def export_archived_session(self, session_id):
+        """
+        Returns the archived messages of a session as NDJSON chunks
+
+        The archive index is read here; the returned iterator only reads
+        archive files, so StreamingResponse can drain it in a worker thread.
+        """
+        return await self.db.run_sync(
+            lambda session: RetentionService(session).archived_session_lines(
+                session_id
+            )
+        )
+
+    async def _export_lines(self, session_id):
+        async for rows in self.repository.stream_session_messages(session_id):
+            yield b"".join(dumps(message_row_to_dict(row)) + b"\n" for row in rows)
+
+    def export_time_range(self, start=None, end=None, sender=None, limit=None):
+        """
+        Returns an NDJSON byte stream of the messages in [start, end)
+
+        Args:
+            start: Optional inclusive lower bound on timestamp
+            end: Optional exclusive upper bound on timestamp
+            sender: Optional SenderType filter
+            limit: Optional maximum number of messages
+
+        Returns:
+            AsyncIterator[bytes]: One chunk per keyset batch, oldest first
+        """
+        if (
+            start is not None
+            and end is not None
+            and start.replace(tzinfo=None) >= end.replace(tzinfo=None)
+        ):
+            raise MessageValidationError(
+                "from must be earlier than to",
+                details={"field": "from", "issue": "empty time range"},
+            )
+
+        return self._time_range_lines(start, end, sender, limit)
+
+    async def _time_range_lines(self, start, end, sender, limit):
+        async for rows in self.repository.iter_messages_by_time_range(
+            start, end, sender, limit
+        ):
+            yield b"".join(dumps(message_row_to_dict(row)) + b"\n" for row in rows)
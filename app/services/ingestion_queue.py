@@ -0,0 +1,182 @@
+import asyncio
+import logging
+from collections import OrderedDict
+
+from app.config import settings
+from app.models.database import AsyncSessionLocal
+from app.services.message_service import MessageService
+from app.services.writer import writer_client
+from app.utils.exceptions import (
+    DatabaseError,
+    IngestionQueueFullError,
+    MessageProcessingError,
+    MessageValidationError,
+)
+from app.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionQueue:
+    """
+    Write-behind queue for POST /api/messages (ingestion_mode="async")
+
+    Requests validate the message and enqueue it; a background task drains
+    the queue and stores up to batch_size messages per transaction, flushing
+    a partial batch once flush_interval seconds have passed since its first
+    message. The outcome of every message is kept in a bounded status map so
+    clients can poll it. stop() writes everything still queued before
+    returning. With a writer process (writer_socket), batches are sent to it
+    instead of being written here.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        max_size,
+        batch_size,
+        flush_interval,
+        status_max_entries,
+    ):
+        self.session_factory = session_factory
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.status_max_entries = status_max_entries
+        self._statuses = OrderedDict()
+        self._queue = None
+        self._task = None
+
+    @property
+    def is_running(self):
+        return self._task is not None
+
+    @property
+    def depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(self.max_size)
+        self._task = asyncio.create_task(self._run(), name="ingestion-writer")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        self._queue = None
+
+    def put(self, message_data, analysis):
+        """
+        Queues an already validated message
+
+        Args:
+            message_data: MessageCreate
+            analysis: ContentAnalysis computed during validation
+
+        Returns:
+            dict: message_id and its "queued" status
+        """
+        message_id = message_data.message_id
+        if self._statuses.get(message_id, {}).get("status") == "queued":
+            raise MessageValidationError(
+                f"message {message_id} already exists",
+                details={"message_id": message_id},
+            )
+
+        try:
+            self._queue.put_nowait((message_data, analysis))
+        except asyncio.QueueFull:
+            raise IngestionQueueFullError(self.max_size)
+
+        return self._set_status({"message_id": message_id, "status": "queued"})
+
+    def get_status(self, message_id):
+        return self._statuses.get(message_id)
+
+    def _set_status(self, result):
+        message_id = result["message_id"]
+        self._statuses[message_id] = result
+        self._statuses.move_to_end(message_id)
+        while len(self._statuses) > self.status_max_entries:
+            self._statuses.popitem(last=False)
+        return result
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._write(batch)
+
+    async def _write(self, batch):
+        messages = [message_data for message_data, _ in batch]
+        analyses = [analysis for _, analysis in batch]
+
+        try:
+            if writer_client.enabled:
+                outcome = await writer_client.ingest(messages, analyses)
+            else:
+                async with self.session_factory() as db:
+                    outcome = await db.run_sync(
+                        lambda session: MessageService(session).ingest_messages(
+                            messages, analyses
+                        )
+                    )
+        except Exception as e:
+            logger.exception("could not write %d queued messages", len(batch))
+            if not isinstance(e, MessageProcessingError):
+                e = DatabaseError("error storing queued messages", e)
+            for message_data in messages:
+                self._set_status(
+                    {
+                        "message_id": message_data.message_id,
+                        "status": "failed",
+                        "error": e.to_dict(),
+                    }
+                )
+            return
+
+        for result in outcome["results"]:
+            self._set_status(result)
+
+
+ingestion_queue = IngestionQueue(
+    AsyncSessionLocal,
+    max_size=settings.ingestion_queue_size,
+    batch_size=settings.ingestion_batch_size,
+    flush_interval=settings.ingestion_flush_interval,
+    status_max_entries=settings.ingestion_status_max_entries,
+)
+
+registry.gauge(
+    "ingestion_queue_depth",
+    "Messages waiting for the write-behind writer",
+    lambda: ingestion_queue.depth,
+)
@@ -1,14 +1,33 @@
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.repositories.message_repository import MessageRepository
 from app.schemas.message import (
     MessageCreate,
     MessageResponse,
     MessageListResponse,
+    MessageBatchResponse,
     SenderType,
 )
+from app.schemas.session import SessionResponse
 from app.utils.content_filter import content_filter
+from app.utils.metrics import (
+    FILTER_REJECTIONS,
+    MESSAGE_DUPLICATES,
+    MESSAGES_CREATED,
+    STAGE_LATENCY,
+)
+from app.utils.pagination import (
+    encode_cursor,
+    decode_cursor,
+    encode_search_cursor,
+    decode_search_cursor,
+)
+from app.utils.response_cache import make_cached_response, response_cache
+from app.utils.search_query import build_match_query
+from app.utils.serialization import dumps, message_row_to_dict
 from app.utils.exceptions import (
+    MessageProcessingError,
     MessageValidationError,
     ContentFilterError,
     MessageNotFoundError,
@@ -21,19 +40,156 @@ class MessageService:
         self.db = db
         self.repository = MessageRepository(db)
 
-    def create_message(self, message_data):
-        if self.repository.message_exists(message_data.message_id):
+    def create_message(self, message_data, analysis=None):
+        try:
+            analysis = self._validate_message_content(message_data.content, analysis)
+        except MessageProcessingError:
+            # An existing id is reported as a duplicate whatever the content,
+            # as validate_new_message does; only the rejection path pays for
+            # the lookup.
+            if not self.repository.message_exists(message_data.message_id):
+                raise
+            return self._duplicate_response(message_data)
+
+        metadata = self._process_message(analysis)
+        db_message = self.repository.create_message(message_data, metadata)
+        if db_message is None:
+            return self._duplicate_response(message_data)
+
+        MESSAGES_CREATED.inc()
+        self._invalidate_cached_responses([message_data])
+
+        return MessageResponse.from_orm(db_message)
+
+    def _duplicate_response(self, message_data):
+        MESSAGE_DUPLICATES.inc()
+        if not settings.idempotent_create:
+            raise self.duplicate_error(message_data)
+        db_message = self.repository.get_message_by_id(message_data.message_id)
+        return MessageResponse.from_orm(db_message)
+
+    def validate_new_message(self, message_data, analysis=None):
+        with STAGE_LATENCY.time("exists_check"):
+            exists = self.repository.message_exists(message_data.message_id)
+        if exists:
+            MESSAGE_DUPLICATES.inc()
+            raise self.duplicate_error(message_data)
+
+        return self._validate_message_content(message_data.content, analysis)
+
+    @staticmethod
+    def duplicate_error(message_data):
+        return MessageValidationError(
+            f"message {message_data.message_id} already exists",
+            details={"message_id": message_data.message_id},
+        )
+
+    def create_messages_batch(self, messages, analyses=None):
+        self.check_batch_size(messages)
+
+        return MessageBatchResponse(
+            status="success", data=self.ingest_messages(messages, analyses)
+        )
+
+    @staticmethod
+    def check_batch_size(messages):
+        if len(messages) > settings.max_batch_size:
             raise MessageValidationError(
-                f"message {message_data.message_id} already exists",
-                details={"message_id": message_data.message_id},
+                f"batch size exceeds the maximum of {settings.max_batch_size} messages",
+                details={"field": "messages", "issue": "too many items"},
             )
 
-        self._validate_message_content(message_data.content)
+    @staticmethod
+    def analyze_messages(messages, analyses=None):
+        """
+        Runs the content filter on each message, for ingest_messages
 
-        metadata = self._process_message(message_data.content)
-        db_message = self.repository.create_message(message_data, metadata)
+        Args:
+            messages: MessageCreate items
+            analyses: Optional ContentAnalysis per message already computed
+                (e.g. in the filter pool); None entries are analyzed here
 
-        return MessageResponse.from_orm(db_message)
+        Returns:
+            list: ContentAnalysis per message, None for empty content (which
+                ingest_messages rejects)
+        """
+        results = []
+        for index, message_data in enumerate(messages):
+            content = message_data.content
+            analysis = analyses[index] if analyses else None
+            if analysis is None and content and content.strip():
+                with STAGE_LATENCY.time("content_filter"):
+                    analysis = content_filter.analyze(content)
+            results.append(analysis)
+        return results
+
+    def ingest_messages(self, messages, analyses=None):
+        """
+        Stores a batch of messages in one transaction, item by item outcome
+
+        Args:
+            messages: MessageCreate items
+            analyses: Optional ContentAnalysis per message, already computed
+                elsewhere (e.g. in worker processes); computed here otherwise
+
+        Returns:
+            dict: per-item results and created / duplicates / rejected counts
+        """
+        with STAGE_LATENCY.time("exists_check"):
+            existing_ids = self.repository.get_existing_message_ids(
+                [message_data.message_id for message_data in messages]
+            )
+
+        results = []
+        accepted_ids = set()
+        to_insert = []
+
+        for index, message_data in enumerate(messages):
+            message_id = message_data.message_id
+
+            if message_id in existing_ids or message_id in accepted_ids:
+                results.append({"message_id": message_id, "status": "duplicate"})
+                continue
+
+            try:
+                analysis = self._validate_message_content(
+                    message_data.content, analyses[index] if analyses else None
+                )
+            except MessageProcessingError as e:
+                results.append(
+                    {"message_id": message_id, "status": "rejected", "error": e.to_dict()}
+                )
+                continue
+
+            metadata = self._process_message(analysis)
+
+            accepted_ids.add(message_id)
+            to_insert.append((message_data, metadata))
+            results.append({"message_id": message_id, "status": "created"})
+
+        inserted_ids = set(self.repository.create_messages_bulk(to_insert))
+        # Ids stored by a concurrent write after the existence check.
+        for result in results:
+            if result["status"] == "created" and result["message_id"] not in inserted_ids:
+                result["status"] = "duplicate"
+        self._invalidate_cached_responses(
+            [
+                message_data
+                for message_data, _ in to_insert
+                if message_data.message_id in inserted_ids
+            ]
+        )
+
+        duplicates = sum(1 for r in results if r["status"] == "duplicate")
+        MESSAGES_CREATED.inc(amount=len(inserted_ids))
+        MESSAGE_DUPLICATES.inc(amount=duplicates)
+
+        return {
+            "results": results,
+            "created": len(inserted_ids),
+            "duplicates": duplicates,
+            "rejected": sum(1 for r in results if r["status"] == "rejected"),
+        }
 
     def get_messages_by_session(
         self,
@@ -41,18 +197,17 @@ class MessageService:
         limit=10,
         offset=0,
         sender=None,
+        before=None,
     ):
-        if not self.repository.session_exists(session_id):
-            raise SessionNotFoundError(session_id)
+        summary, cursor = self._prepare_session_page(session_id, offset, before)
 
         messages, total_count = self.repository.get_messages_by_session(
-            session_id, limit, offset, sender
+            session_id, limit + 1, offset, sender, cursor
         )
+        messages, has_more, next_cursor = self._trim_page(messages, limit)
 
         message_responses = [MessageResponse.from_orm(msg).data for msg in messages]
 
-        has_more = (offset + limit) < total_count
-
         return MessageListResponse(
             status="success",
             data={
@@ -61,9 +216,84 @@ class MessageService:
                 "limit": limit,
                 "offset": offset,
                 "has_more": has_more,
+                "next_cursor": next_cursor,
             },
         )
 
+    def get_messages_by_session_json(
+        self,
+        session_id,
+        limit=10,
+        offset=0,
+        sender=None,
+        before=None,
+    ):
+        params = (limit, offset, sender.value if sender else None, before)
+        generation = response_cache.session_generation(session_id)
+
+        cached = response_cache.get_session_page(session_id, generation, params)
+        if cached is None:
+            body = self._render_messages_by_session(
+                session_id, limit, offset, sender, before
+            )
+            cached = make_cached_response(body)
+            response_cache.set_session_page(session_id, generation, params, cached)
+
+        return cached
+
+    def search_messages_json(
+        self, query, session_id=None, sender=None, limit=10, cursor=None
+    ):
+        """
+        Ranked full-text search, encoded straight to JSON bytes
+
+        Args:
+            query: Search text; every word must match
+            session_id: Optional session to search in
+            sender: Optional SenderType filter
+            limit: Page size
+            cursor: next_cursor of the previous page
+
+        Returns:
+            bytes: Response body with the hits, best match first
+        """
+        match_query = build_match_query(query, session_id)
+        after = decode_search_cursor(cursor) if cursor is not None else None
+
+        if session_id is not None and not self.repository.session_exists(session_id):
+            raise SessionNotFoundError(session_id)
+
+        rows = self.repository.search_message_rows(
+            match_query, session_id, sender, limit + 1, after
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_search_cursor(rows[-1].score, rows[-1].message_id)
+
+        return dumps(
+            {
+                "status": "success",
+                "data": {
+                    "messages": [
+                        {**message_row_to_dict(row), "score": row.score} for row in rows
+                    ],
+                    "limit": limit,
+                    "has_more": has_more,
+                    "next_cursor": next_cursor,
+                },
+            }
+        )
+
+    def get_session_summary(self, session_id):
+        summary = self.repository.get_session_summary(session_id)
+        if summary is None:
+            raise SessionNotFoundError(session_id)
+
+        return SessionResponse(status="success", data=summary.to_dict())
+
     def get_message_by_id(self, message_id):
         message = self.repository.get_message_by_id(message_id)
         if not message:
@@ -71,25 +301,107 @@ class MessageService:
 
         return MessageResponse.from_orm(message)
 
-    def _validate_message_content(self, content):
+    def get_message_by_id_json(self, message_id):
+        cached = response_cache.get_message(message_id)
+        if cached is None:
+            row = self.repository.get_message_row_by_id(message_id)
+            if row is None:
+                raise MessageNotFoundError(message_id)
+
+            body = dumps({"status": "success", "data": message_row_to_dict(row)})
+            cached = make_cached_response(body)
+            response_cache.set_message(message_id, cached)
+
+        return cached
+
+    def _render_messages_by_session(self, session_id, limit, offset, sender, before):
+        # Same payload as get_messages_by_session, built from plain column
+        # tuples and encoded straight to bytes without ORM or pydantic models.
+        summary, cursor = self._prepare_session_page(session_id, offset, before)
+
+        rows, total_count = self.repository.get_message_rows_by_session(
+            session_id, limit + 1, offset, sender, cursor
+        )
+        rows, has_more, next_cursor = self._trim_page(rows, limit)
+
+        return dumps(
+            {
+                "status": "success",
+                "data": {
+                    "messages": [message_row_to_dict(row) for row in rows],
+                    "total_count": total_count,
+                    "limit": limit,
+                    "offset": offset,
+                    "has_more": has_more,
+                    "next_cursor": next_cursor,
+                },
+            }
+        )
+
+    def _prepare_session_page(self, session_id, offset, before):
+        if before is not None and offset:
+            raise MessageValidationError(
+                "offset cannot be combined with a pagination cursor",
+                details={"field": "offset", "issue": "use either offset or before"},
+            )
+
+        cursor = decode_cursor(before) if before is not None else None
+
+        # The repository reads total_count from this same summary row, which
+        # stays in the session's identity map while the caller holds it.
+        summary = self.repository.get_session_summary(session_id)
+        if summary is None:
+            raise SessionNotFoundError(session_id)
+
+        return summary, cursor
+
+    def _trim_page(self, items, limit):
+        has_more = len(items) > limit
+        items = items[:limit]
+
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(items[-1].timestamp, items[-1].message_id)
+
+        return items, has_more, next_cursor
+
+    def _invalidate_cached_responses(self, messages):
+        for message_data in messages:
+            response_cache.invalidate_session(message_data.session_id)
+            response_cache.invalidate_message(message_data.message_id)
+
+    def _validate_message_content(self, content, analysis=None):
         if not content or not content.strip():
             raise MessageValidationError(
                 "content cannot be empty",
                 details={"field": "content", "issue": "required field"},
             )
 
-        is_appropriate, inappropriate_words = content_filter.check_content(content)
+        if analysis is None:
+            with STAGE_LATENCY.time("content_filter"):
+                analysis = content_filter.analyze(content)
 
-        if not is_appropriate:
-            filtered_content = content_filter.filter_content(content, "***")
+        if not analysis.is_appropriate:
+            for word in analysis.inappropriate_words:
+                FILTER_REJECTIONS.inc(word)
+            filtered_content = content_filter.mask(content, analysis.spans, "***")
             raise ContentFilterError(
-                f"content contains inappropriate words: {', '.join(inappropriate_words)}",
+                "content contains inappropriate words: "
+                f"{', '.join(analysis.inappropriate_words)}",
                 filtered_content,
             )
 
-    def _process_message(self, content):
-        metadata = content_filter.get_content_metadata(content)
+        return analysis
 
-        metadata.update({"processed": True, "processing_version": "1.0"})
+    def _process_message(self, analysis):
+        metadata = dict(analysis.metadata)
+
+        metadata.update(
+            {
+                "processed": True,
+                "processing_version": "1.0",
+                "dictionary_version": analysis.version,
+            }
+        )
 
         return metadata
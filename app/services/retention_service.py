@@ -0,0 +1,209 @@
+import gzip
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+import orjson
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.archive import ArchiveSegment
+from app.repositories.archive_repository import ArchiveRepository
+from app.repositories.message_repository import MessageRepository
+from app.utils.exceptions import SessionNotFoundError
+from app.utils.response_cache import response_cache
+from app.utils.serialization import dumps, message_row_to_dict
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionService:
+    """
+    Moves old messages out of the table into compressed daily archive files
+
+    Each batch reads the oldest rows before the cutoff, appends them to
+    <archive_dir>/YYYY/MM/DD.ndjson.gz as one gzip member per day, then
+    indexes the members and deletes the rows in a single short transaction.
+    Only one archiver should run against a database at a time.
+    """
+
+    def __init__(self, db: Session, archive_dir=None):
+        self.db = db
+        self.archive_dir = archive_dir or settings.archive_dir
+        self.messages = MessageRepository(db)
+        self.archive = ArchiveRepository(db)
+
+    def archive_older_than(self, days, batch_size=None, pause=None, stop=None):
+        """
+        Archives every message older than the given number of days
+
+        Args:
+            days: Messages with a timestamp before now - days are archived
+            batch_size: Messages per transaction
+            pause: Seconds to sleep between batches so writers get the lock
+            stop: Optional threading.Event checked between batches
+
+        Returns:
+            dict: cutoff, number of archived messages and batches
+        """
+        batch_size = batch_size or settings.retention_batch_size
+        pause = settings.retention_batch_pause if pause is None else pause
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+
+        archived = batches = 0
+        while True:
+            count = self.archive_batch(cutoff, batch_size)
+            if count == 0:
+                break
+
+            archived += count
+            batches += 1
+            if count < batch_size:
+                break
+            if stop is not None and stop.wait(pause):
+                break
+            if stop is None and pause:
+                time.sleep(pause)
+
+        return {"cutoff": cutoff.isoformat(), "archived": archived, "batches": batches}
+
+    def archive_batch(self, cutoff, batch_size):
+        rows = self.messages.get_message_rows_by_time_range(
+            end=cutoff, limit=batch_size
+        )
+        if not rows:
+            return 0
+
+        rows_by_day = defaultdict(list)
+        for row in rows:
+            rows_by_day[row.timestamp.date()].append(row)
+
+        segments = [
+            self._write_segment(day, day_rows)
+            for day, day_rows in rows_by_day.items()
+        ]
+        self.archive.save_batch(segments, rows)
+
+        for row in rows:
+            response_cache.invalidate_session(row.session_id)
+            response_cache.invalidate_message(row.message_id)
+
+        return len(rows)
+
+    def archived_session_lines(self, session_id):
+        """
+        Looks up the archive segments of a session
+
+        Args:
+            session_id: ID of the session
+
+        Returns:
+            Iterator[bytes]: NDJSON chunks with the archived messages of the
+                session, one per segment; reading them does not use the
+                database session
+        """
+        segments = [
+            (segment.path, segment.offset, segment.length)
+            for segment in self.archive.get_session_segments(session_id)
+        ]
+        if not segments:
+            raise SessionNotFoundError(session_id)
+
+        return self._read_session_lines(session_id, segments)
+
+    def _read_session_lines(self, session_id, segments):
+        for path, offset, length in segments:
+            with open(os.path.join(self.archive_dir, path), "rb") as archive_file:
+                archive_file.seek(offset)
+                member = gzip.decompress(archive_file.read(length))
+
+            yield b"".join(
+                line + b"\n"
+                for line in member.splitlines()
+                if orjson.loads(line)["session_id"] == session_id
+            )
+
+    def _write_segment(self, day, rows):
+        path = f"{day:%Y/%m/%d}.ndjson.gz"
+        full_path = os.path.join(self.archive_dir, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        member = gzip.compress(
+            b"".join(dumps(message_row_to_dict(row)) + b"\n" for row in rows)
+        )
+
+        # Bytes left behind by a batch that failed before it was indexed are
+        # overwritten, so the file only ever holds indexed members.
+        offset = self.archive.get_indexed_size(path)
+        with open(full_path, "r+b" if os.path.exists(full_path) else "wb") as archive_file:
+            archive_file.truncate(offset)
+            archive_file.seek(offset)
+            archive_file.write(member)
+            archive_file.flush()
+            os.fsync(archive_file.fileno())
+
+        segment = ArchiveSegment(
+            day=day,
+            path=path,
+            offset=offset,
+            length=len(member),
+            message_count=len(rows),
+            first_timestamp=rows[0].timestamp,
+            last_timestamp=rows[-1].timestamp,
+        )
+        return segment, Counter(row.session_id for row in rows)
+
+
+class RetentionWorker:
+    """
+    Runs RetentionService.archive_older_than periodically on a daemon thread
+    """
+
+    def __init__(self, session_factory, days, interval):
+        self.session_factory = session_factory
+        self.days = days
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        try:
+            with self.session_factory() as db:
+                stats = RetentionService(db).archive_older_than(
+                    self.days, stop=self._stop
+                )
+        except Exception:
+            logger.exception("retention run failed")
+            return None
+
+        if stats["archived"]:
+            logger.info(
+                "archived %d messages older than %s in %d batches",
+                stats["archived"],
+                stats["cutoff"],
+                stats["batches"],
+            )
+        return stats
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="retention-worker", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
@@ -0,0 +1,432 @@
+import asyncio
+import logging
+import os
+import struct
+from collections import deque
+from typing import NamedTuple
+
+import orjson
+
+from app.config import settings
+from app.schemas.message import MessageCreate
+from app.services.message_service import MessageService
+from app.utils.content_filter import ContentAnalysis
+from app.utils.exceptions import (
+    DatabaseError,
+    MessageProcessingError,
+    MessageValidationError,
+    WriterUnavailableError,
+)
+from app.utils.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+# Frames on the writer socket: 4-byte big-endian length, then a JSON object.
+_FRAME_HEADER = struct.Struct(">I")
+
+# Seconds between attempts to reopen a lost subscription to the writer.
+RECONNECT_INTERVAL = 1.0
+
+
+def encode_frame(payload):
+    body = orjson.dumps(payload)
+    return _FRAME_HEADER.pack(len(body)) + body
+
+
+async def read_frame(reader):
+    header = await reader.readexactly(_FRAME_HEADER.size)
+    (length,) = _FRAME_HEADER.unpack(header)
+    return orjson.loads(await reader.readexactly(length))
+
+
+def summarize_results(results):
+    return {
+        "results": results,
+        "created": sum(1 for r in results if r["status"] == "created"),
+        "duplicates": sum(1 for r in results if r["status"] == "duplicate"),
+        "rejected": sum(1 for r in results if r["status"] == "rejected"),
+    }
+
+
+class _PendingWrite(NamedTuple):
+    request_id: int
+    messages: list
+    analyses: list
+    stream: asyncio.StreamWriter
+
+
+class WriteServer:
+    """
+    Single writer serving the writes of every API worker
+
+    Workers send validated messages over a Unix socket. Requests from all
+    connections are queued and stored together, up to batch_size messages
+    per transaction (waiting at most flush_interval seconds for a batch to
+    fill), so the database only ever sees this one writer. Each request is
+    answered with its own slice of the per-item results. Response cache
+    invalidations made here are broadcast to every connected worker before
+    the replies go out.
+    """
+
+    def __init__(
+        self, path, session_factory, batch_size, flush_interval, cache=response_cache
+    ):
+        self.path = path
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.cache = cache
+        self._streams = set()
+        # Appended from any thread (e.g. the retention worker).
+        self._invalidations = deque()
+        self._broadcast_scheduled = False
+        self._loop = None
+        self._queue = None
+        self._server = None
+        self._task = None
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self.cache.add_listener(self._record_invalidation)
+        self._server = await asyncio.start_unix_server(
+            self._serve_connection, path=self.path
+        )
+        os.chmod(self.path, 0o600)
+        self._task = asyncio.create_task(self._run(), name="writer")
+
+    async def stop(self):
+        """Stops accepting requests and stores everything already queued"""
+        if self._task is None:
+            return
+
+        self._server.close()
+        await self._queue.put(None)
+        await self._task
+        self.cache.remove_listener(self._record_invalidation)
+        for stream in list(self._streams):
+            stream.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._task = None
+
+    async def _serve_connection(self, reader, stream):
+        self._streams.add(stream)
+        try:
+            while True:
+                try:
+                    request = await read_frame(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                try:
+                    write = _PendingWrite(
+                        request["id"],
+                        [MessageCreate.model_validate(m) for m in request["messages"]],
+                        [
+                            ContentAnalysis(*analysis) if analysis is not None else None
+                            for analysis in request["analyses"]
+                        ],
+                        stream,
+                    )
+                except (KeyError, TypeError, ValueError) as e:
+                    self._reply(
+                        _PendingWrite(
+                            request.get("id") if isinstance(request, dict) else None,
+                            [],
+                            [],
+                            stream,
+                        ),
+                        error=MessageValidationError(f"malformed write request: {e}"),
+                    )
+                    continue
+
+                self._queue.put_nowait(write)
+        finally:
+            self._streams.discard(stream)
+            stream.close()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            write = await self._queue.get()
+            if write is None:
+                break
+
+            batch = [write]
+            count = len(write.messages)
+            deadline = loop.time() + self.flush_interval
+            while count < self.batch_size:
+                try:
+                    write = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        write = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+
+                if write is None:
+                    stopping = True
+                    break
+                batch.append(write)
+                count += len(write.messages)
+
+            await self._write(batch)
+
+    async def _write(self, batch):
+        messages = [message for write in batch for message in write.messages]
+        analyses = [analysis for write in batch for analysis in write.analyses]
+
+        try:
+            async with self.session_factory() as db:
+                outcome = await db.run_sync(
+                    lambda session: MessageService(session).ingest_messages(
+                        messages, analyses
+                    )
+                )
+        except Exception as e:
+            logger.exception("could not write %d forwarded messages", len(messages))
+            if not isinstance(e, MessageProcessingError):
+                e = DatabaseError("error storing messages", e)
+            for write in batch:
+                self._reply(write, error=e)
+            return
+
+        self._broadcast()
+
+        start = 0
+        for write in batch:
+            end = start + len(write.messages)
+            self._reply(write, result=summarize_results(outcome["results"][start:end]))
+            start = end
+
+    def _reply(self, write, result=None, error=None):
+        if write.stream.is_closing():
+            return
+
+        if error is None:
+            payload = {"id": write.request_id, "result": result}
+        else:
+            payload = {
+                "id": write.request_id,
+                "error": error.to_dict(),
+                "status_code": error.status_code,
+            }
+        write.stream.write(encode_frame(payload))
+
+    def _record_invalidation(self, kind, key):
+        self._invalidations.append((kind, key))
+        if not self._broadcast_scheduled:
+            self._broadcast_scheduled = True
+            self._loop.call_soon_threadsafe(self._broadcast)
+
+    def _broadcast(self):
+        self._broadcast_scheduled = False
+        if not self._invalidations:
+            return
+
+        sessions, messages = set(), set()
+        while self._invalidations:
+            kind, key = self._invalidations.popleft()
+            (sessions if kind == "session" else messages).add(key)
+
+        frame = encode_frame(
+            {"invalidate": {"sessions": sorted(sessions), "messages": sorted(messages)}}
+        )
+        for stream in self._streams:
+            if not stream.is_closing():
+                stream.write(frame)
+
+
+class WriterClient:
+    """
+    API worker end of the writer socket
+
+    All requests of a worker share one connection (per event loop); replies
+    are matched to requests by id, and invalidations pushed by the writer
+    are applied to this worker's response cache. The connection is opened by
+    subscribe() at startup, so workers that only serve reads get the
+    invalidations too. When it drops, invalidations may have been missed:
+    the whole cache is cleared, and cleared again once the connection is
+    reopened in the background.
+    """
+
+    def __init__(self, path, timeout, cache=response_cache):
+        self.path = path
+        self.timeout = timeout
+        self.cache = cache
+        self._loop = None
+        self._lock = None
+        self._stream = None
+        self._reader_task = None
+        self._reconnect_task = None
+        self._subscribed = False
+        self._pending = {}
+        self._next_id = 0
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    async def ingest(self, messages, analyses):
+        """
+        Stores messages through the writer process
+
+        Args:
+            messages: MessageCreate items
+            analyses: ContentAnalysis per message, or None to have the writer
+                analyze it
+
+        Returns:
+            dict: ingest_messages outcome for these messages
+        """
+        stream = await self._connect()
+
+        self._next_id += 1
+        request_id = self._next_id
+        future = self._loop.create_future()
+        self._pending[request_id] = future
+
+        try:
+            stream.write(
+                encode_frame(
+                    {
+                        "id": request_id,
+                        "messages": [m.model_dump(mode="json") for m in messages],
+                        "analyses": [
+                            list(analysis) if analysis is not None else None
+                            for analysis in analyses
+                        ],
+                    }
+                )
+            )
+            await stream.drain()
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            raise WriterUnavailableError(f"no answer within {self.timeout} seconds")
+        except ConnectionError as e:
+            raise WriterUnavailableError(str(e))
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def subscribe(self):
+        """
+        Connects to the writer now and keeps the connection open
+
+        A writer that is not reachable yet is retried in the background
+        every RECONNECT_INTERVAL seconds.
+        """
+        self._subscribed = True
+        try:
+            await self._connect()
+        except WriterUnavailableError as e:
+            logger.warning("writer process not reachable, retrying: %s", e)
+            self._reconnect_later()
+
+    async def close(self):
+        if self._loop is not asyncio.get_running_loop():
+            return
+
+        self._subscribed = False
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            await asyncio.gather(self._reconnect_task, return_exceptions=True)
+            self._reconnect_task = None
+        if self._stream is not None:
+            self._stream.close()
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+
+    async def _connect(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A connection cannot outlive its event loop.
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._stream = None
+            self._reconnect_task = None
+            self._pending = {}
+
+        async with self._lock:
+            if self._stream is None:
+                try:
+                    reader, stream = await asyncio.open_unix_connection(self.path)
+                except OSError as e:
+                    raise WriterUnavailableError(str(e))
+                self._stream = stream
+                self._reader_task = loop.create_task(self._read_replies(reader, stream))
+
+        return self._stream
+
+    async def _read_replies(self, reader, stream):
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if "invalidate" in frame:
+                    self._invalidate(frame["invalidate"])
+                    continue
+
+                future = self._pending.get(frame["id"])
+                if future is None or future.done():
+                    continue
+                if "error" in frame:
+                    error = frame["error"]
+                    future.set_exception(
+                        MessageProcessingError(
+                            error["message"],
+                            error["code"],
+                            frame["status_code"],
+                            error["details"],
+                        )
+                    )
+                else:
+                    future.set_result(frame["result"])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if self._stream is stream:
+                self._stream = None
+            lost = not stream.is_closing()
+            stream.close()
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(
+                        WriterUnavailableError("connection to the writer process lost")
+                    )
+            # Not closed by close(): invalidations may have been missed.
+            if lost:
+                self.cache.clear()
+                if self._subscribed:
+                    self._reconnect_later()
+
+    def _reconnect_later(self):
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = self._loop.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        while self._subscribed:
+            await asyncio.sleep(RECONNECT_INTERVAL)
+            try:
+                await self._connect()
+            except WriterUnavailableError:
+                continue
+            # Entries cached while disconnected may already be stale.
+            self.cache.clear()
+            logger.info("reconnected to the writer process at %s", self.path)
+            return
+
+    def _invalidate(self, invalidation):
+        for session_id in invalidation["sessions"]:
+            self.cache.invalidate_session(session_id)
+        for message_id in invalidation["messages"]:
+            self.cache.invalidate_message(message_id)
+
+
+writer_client = WriterClient(settings.writer_socket, settings.writer_timeout)
@@ -0,0 +1,23 @@
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import SessionLocal, build_engine, create_schema, create_tables
+
+
+def get_session_factory(database_url=None):
+    """
+    Session factory for command line tools, with the tables created
+
+    Args:
+        database_url: Optional database to use instead of DATABASE_URL (and
+            its shards)
+
+    Returns:
+        sessionmaker: Sync session factory
+    """
+    if not database_url:
+        create_tables()
+        return SessionLocal
+
+    engine = build_engine(database_url)
+    create_schema(engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -0,0 +1,59 @@
+"""
+Moves old messages from the table to compressed daily archive files
+
+Runs the same job as the API's background retention worker, once:
+
+    python -m app.tools.archive_messages --older-than-days 90 --batch-size 1000
+
+Running API workers keep their in-process response caches; cached pages of
+archived sessions are refreshed on the session's next write.
+"""
+import argparse
+import json
+import sys
+
+from app.config import settings
+from app.services.retention_service import RetentionService
+from app.tools import get_session_factory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.tools.archive_messages",
+        description="Moves old messages to compressed daily archive files",
+    )
+    parser.add_argument(
+        "--older-than-days",
+        type=int,
+        default=settings.retention_days,
+        required=settings.retention_days is None,
+        help="defaults to RETENTION_DAYS",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.retention_batch_size,
+        help="messages per transaction",
+    )
+    parser.add_argument(
+        "--pause",
+        type=float,
+        default=settings.retention_batch_pause,
+        help="seconds between batches",
+    )
+    parser.add_argument("--archive-dir", default=settings.archive_dir)
+    parser.add_argument("--database-url", help="defaults to DATABASE_URL")
+    args = parser.parse_args(argv)
+
+    session_factory = get_session_factory(args.database_url)
+    with session_factory() as db:
+        stats = RetentionService(db, args.archive_dir).archive_older_than(
+            args.older_than_days, args.batch_size, args.pause
+        )
+
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
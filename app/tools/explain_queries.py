@@ -0,0 +1,300 @@
+"""
+Checks the query plan of every query MessageRepository issues
+
+Each case calls a repository read method (every sender / pagination /
+range combination) on the target database, captures the SQL it runs and
+checks EXPLAIN QUERY PLAN against the manifest below: the expected indexes
+must be used, no table may be scanned in full and hot paths may not sort
+through a temporary B-tree.
+
+    python -m app.tools.explain_queries --database-url sqlite:///./chat_messages.db
+
+File databases are opened read-only, so the tool can be pointed at a copy of
+production data. Sample ids are taken from the largest session. The exit
+code is 1 when any case fails.
+"""
+import argparse
+import json
+import re
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, NamedTuple
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.session import ChatSession
+from app.repositories.message_repository import MessageRepository
+from app.schemas.message import SenderType
+from app.utils.search_query import build_match_query
+
+# Acceptable indexes per access path; a case passes an entry if any of the
+# names shows up in its plans.
+MESSAGE_ID = ("sqlite_autoindex_messages_1", "ix_messages_message_id")
+SESSION_SUMMARY = ("sqlite_autoindex_sessions_1",)
+SESSION = ("ix_messages_session_timestamp",)
+SESSION_SENDER = ("ix_messages_session_sender_timestamp",)
+TIMESTAMP = ("ix_messages_timestamp",)
+FULL_TEXT = ("messages_fts",)
+# Search hits are joined to their message by rowid.
+ROWID = ("INTEGER PRIMARY KEY",)
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+TEMP_BTREE = "USE TEMP B-TREE"
+
+
+class QueryCase(NamedTuple):
+    name: str
+    run: Callable
+    expected: tuple
+    # Hot paths must return rows in index order, without a sort step.
+    hot: bool = True
+
+
+class Sample(NamedTuple):
+    session_id: str
+    message_id: str
+    first_timestamp: datetime
+    last_timestamp: datetime
+
+    @property
+    def cursor(self):
+        return (self.last_timestamp, self.message_id)
+
+
+def load_sample(db):
+    summary = db.execute(
+        select(ChatSession).order_by(ChatSession.message_count.desc()).limit(1)
+    ).scalar()
+    if summary is None or summary.last_timestamp is None:
+        # Plans do not depend on the values; an empty database still checks.
+        return Sample(
+            "sample_session", "sample_message", datetime(2024, 1, 1), datetime(2024, 1, 2)
+        )
+
+    return Sample(
+        summary.session_id,
+        summary.last_message_id,
+        summary.first_timestamp,
+        summary.last_timestamp,
+    )
+
+
+def build_cases(sample):
+    cases = [
+        QueryCase("message_by_id", lambda r: r.get_message_by_id(sample.message_id), (MESSAGE_ID,)),
+        QueryCase(
+            "message_row_by_id",
+            lambda r: r.get_message_row_by_id(sample.message_id),
+            (MESSAGE_ID,),
+        ),
+        QueryCase(
+            "existing_message_ids",
+            lambda r: r.get_existing_message_ids([sample.message_id, "missing"]),
+            (MESSAGE_ID,),
+        ),
+        QueryCase(
+            "session_summary",
+            lambda r: r.get_session_summary(sample.session_id),
+            (SESSION_SUMMARY,),
+        ),
+        QueryCase(
+            "session_bounds", lambda r: r.get_session_bounds(sample.session_id), (SESSION,)
+        ),
+        QueryCase(
+            "session_export",
+            lambda r: next(r.iter_session_messages(sample.session_id), None),
+            (SESSION,),
+        ),
+    ]
+
+    for sender in (None, SenderType.USER):
+        scope = "sender" if sender else "all"
+        index = SESSION_SENDER if sender else SESSION
+        for mode, offset, before in (("offset", 20, None), ("cursor", 0, sample.cursor)):
+            for method in ("get_messages_by_session", "get_message_rows_by_session"):
+                cases.append(
+                    QueryCase(
+                        f"{method}.{scope}.{mode}",
+                        lambda r, m=method, s=sender, o=offset, b=before: getattr(r, m)(
+                            sample.session_id, 10, o, s, b
+                        ),
+                        (SESSION_SUMMARY, index),
+                    )
+                )
+
+    for start in (None, sample.first_timestamp):
+        for end in (None, sample.last_timestamp):
+            for sender in (None, SenderType.USER):
+                for after in (None, (sample.first_timestamp, sample.message_id)):
+                    name = "time_range.{}.{}.{}.{}".format(
+                        "from" if start else "-",
+                        "to" if end else "-",
+                        "sender" if sender else "all",
+                        "after" if after else "first",
+                    )
+                    cases.append(
+                        QueryCase(
+                            name,
+                            lambda r, a=start, b=end, s=sender, c=after: (
+                                r.get_message_rows_by_time_range(a, b, s, c, 100)
+                            ),
+                            (TIMESTAMP,),
+                        )
+                    )
+
+    for session_id in (None, sample.session_id):
+        for sender in (None, SenderType.USER):
+            for after in (None, (-1.0, sample.message_id)):
+                name = "search.{}.{}.{}".format(
+                    "session" if session_id else "global",
+                    "sender" if sender else "all",
+                    "after" if after else "first",
+                )
+                cases.append(
+                    QueryCase(
+                        name,
+                        lambda r, i=session_id, s=sender, a=after: r.search_message_rows(
+                            build_match_query("hola", i), i, s, 10, a
+                        ),
+                        (FULL_TEXT, ROWID),
+                        # bm25 ranking always sorts the matches.
+                        hot=False,
+                    )
+                )
+
+    return cases
+
+
+@contextmanager
+def capture_statements(connection):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+
+
+def check_plan(case, plans):
+    problems = []
+    details = [detail for plan in plans for detail in plan["plan"]]
+
+    for detail in details:
+        scan = FULL_SCAN.match(detail)
+        if scan:
+            problems.append(f"full scan of {scan.group(1)}")
+        if case.hot and detail.startswith(TEMP_BTREE):
+            problems.append(f"sort on a hot path: {detail}")
+
+    for alternatives in case.expected:
+        if not any(
+            re.search(rf"\b{name}\b", detail) for name in alternatives for detail in details
+        ):
+            problems.append(f"expected index not used: {' or '.join(alternatives)}")
+
+    return problems
+
+
+class QueryPlanChecker:
+    """
+    Runs every query case on a connection and checks its plans
+
+    Args:
+        connection: SQLAlchemy Connection to the database to check
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def run(self):
+        db = Session(bind=self.connection, autoflush=False)
+        try:
+            repository = MessageRepository(db)
+            return [self._check(case, repository) for case in build_cases(load_sample(db))]
+        finally:
+            db.close()
+
+    def _check(self, case, repository):
+        with capture_statements(self.connection) as statements:
+            case.run(repository)
+
+        plans = []
+        for statement, parameters in statements:
+            if not statement.lstrip().upper().startswith("SELECT"):
+                continue
+            rows = self.connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            ).all()
+            plans.append(
+                {"statement": " ".join(statement.split()), "plan": [row[3] for row in rows]}
+            )
+
+        problems = check_plan(case, plans)
+        return {
+            "case": case.name,
+            "ok": not problems,
+            "problems": problems,
+            "plans": plans,
+        }
+
+
+def create_read_only_engine(database_url):
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return create_engine(database_url)
+
+    return create_engine(
+        "sqlite://",
+        creator=lambda: sqlite3.connect(
+            f"file:{url.database}?mode=ro", uri=True, check_same_thread=False
+        ),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.tools.explain_queries",
+        description="Checks the query plan of every repository query",
+    )
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    parser.add_argument(
+        "--verbose", action="store_true", help="print the plans of passing cases too"
+    )
+    args = parser.parse_args(argv)
+
+    engine = create_read_only_engine(args.database_url)
+    with engine.connect() as connection:
+        results = QueryPlanChecker(connection).run()
+    engine.dispose()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print(f"{'ok  ' if result['ok'] else 'FAIL'}  {result['case']}")
+            for problem in result["problems"]:
+                print(f"        {problem}")
+            if args.verbose or not result["ok"]:
+                for plan in result["plans"]:
+                    print(f"        {plan['statement']}")
+                    for detail in plan["plan"]:
+                        print(f"          {detail}")
+
+        failed = sum(not result["ok"] for result in results)
+        print(f"{len(results) - failed} of {len(results)} query cases passed")
+
+    return 1 if any(not result["ok"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
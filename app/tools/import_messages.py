@@ -0,0 +1,198 @@
+"""
+Bulk import of JSONL message dumps
+
+Each line holds one message in the POST /api/messages format. Lines are
+validated with MessageCreate, run through the content filter (optionally in
+worker processes) and stored through MessageService.ingest_messages, one
+transaction per chunk.
+
+    python -m app.tools.import_messages messages.jsonl --chunk-size 5000 --workers 4
+
+Running API workers keep their in-process response caches; sessions that
+were cached there are refreshed on their next write.
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+
+from pydantic import ValidationError
+
+from app.schemas.message import MessageCreate
+from app.services.message_service import MessageService
+from app.tools import get_session_factory
+from app.utils.content_filter import content_filter
+from app.utils.content_filter_pool import analyze_in_worker, init_worker
+
+
+def read_messages(lines):
+    """
+    Parses and validates JSONL lines
+
+    Args:
+        lines: Iterable of text lines
+
+    Returns:
+        Iterator[Tuple[int, Optional[MessageCreate], Optional[dict]]]:
+            (line number, message, error) for every non-blank line
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            yield line_number, MessageCreate(**json.loads(line)), None
+        except json.JSONDecodeError as e:
+            yield line_number, None, {"code": "INVALID_JSON", "message": str(e)}
+        except (TypeError, ValidationError) as e:
+            yield line_number, None, {"code": "MESSAGE_VALIDATION_ERROR", "message": str(e)}
+
+
+class MessageImporter:
+    def __init__(
+        self,
+        session_factory,
+        chunk_size=5000,
+        workers=1,
+        skip_duplicates=False,
+        report=None,
+        progress=None,
+    ):
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.skip_duplicates = skip_duplicates
+        self.report = report
+        self.progress = progress
+        self.stats = {"rows": 0, "created": 0, "duplicates": 0, "rejected": 0, "invalid": 0}
+        self._pool = None
+        self._started = None
+
+    def run(self, lines):
+        self._started = time.perf_counter()
+        if self.workers > 1:
+            self._pool = multiprocessing.Pool(
+                self.workers,
+                initializer=init_worker,
+                initargs=(content_filter.inappropriate_words, content_filter.engine),
+            )
+
+        try:
+            chunk = []
+            for line_number, message_data, error in read_messages(lines):
+                self.stats["rows"] += 1
+                if error is not None:
+                    self.stats["invalid"] += 1
+                    self._write_report(line_number, None, "invalid", error)
+                    continue
+
+                chunk.append((line_number, message_data))
+                if len(chunk) >= self.chunk_size:
+                    self._import_chunk(chunk)
+                    chunk = []
+
+            if chunk:
+                self._import_chunk(chunk)
+        finally:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool.join()
+                self._pool = None
+
+        return self.stats
+
+    def _import_chunk(self, chunk):
+        messages = [message_data for _, message_data in chunk]
+
+        analyses = None
+        if self._pool is not None:
+            analyses = self._pool.map(
+                analyze_in_worker,
+                [message_data.content for message_data in messages],
+                chunksize=max(1, len(messages) // (self.workers * 4)),
+            )
+
+        with self.session_factory() as db:
+            outcome = MessageService(db).ingest_messages(messages, analyses)
+
+        self.stats["created"] += outcome["created"]
+        self.stats["duplicates"] += outcome["duplicates"]
+        self.stats["rejected"] += outcome["rejected"]
+
+        for (line_number, _), result in zip(chunk, outcome["results"]):
+            if result["status"] == "created":
+                continue
+            if result["status"] == "duplicate" and self.skip_duplicates:
+                continue
+            self._write_report(
+                line_number, result["message_id"], result["status"], result.get("error")
+            )
+
+        if self.progress is not None:
+            elapsed = time.perf_counter() - self._started
+            self.progress.write(
+                f"{self.stats['rows']} rows | {self.stats['created']} created | "
+                f"{self.stats['duplicates']} duplicates | "
+                f"{self.stats['rejected']} rejected | {self.stats['invalid']} invalid | "
+                f"{self.stats['rows'] / elapsed:.0f} rows/s\n"
+            )
+            self.progress.flush()
+
+    def _write_report(self, line_number, message_id, status, error):
+        if self.report is None:
+            return
+
+        entry = {"line": line_number, "message_id": message_id, "status": status}
+        if error is not None:
+            entry["error"] = error
+        self.report.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.tools.import_messages",
+        description="Bulk import of JSONL message dumps",
+    )
+    parser.add_argument("path", help="JSONL file, one message per line ('-' for stdin)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="rows per transaction")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="processes used for content filtering"
+    )
+    parser.add_argument(
+        "--report", help="JSONL file listing invalid, rejected and duplicate rows"
+    )
+    parser.add_argument(
+        "--skip-duplicates",
+        action="store_true",
+        help="count duplicate message_ids without listing them in the report",
+    )
+    parser.add_argument("--database-url", help="defaults to DATABASE_URL")
+    args = parser.parse_args(argv)
+
+    session_factory = get_session_factory(args.database_url)
+
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+    report = open(args.report, "w", encoding="utf-8") if args.report else None
+
+    try:
+        stats = MessageImporter(
+            session_factory,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            skip_duplicates=args.skip_duplicates,
+            report=report,
+            progress=sys.stderr,
+        ).run(source)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if report is not None:
+            report.close()
+
+    print(json.dumps(stats))
+    return 0 if stats["invalid"] == 0 and stats["rejected"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+Moves sessions to their shard after the list of shard databases changes
+
+A session lives on shard blake2b(session_id) % N, so changing N relocates
+most sessions. With the API stopped, point the tool at the databases the data
+is in now and at the new shard list, in the order they will be configured:
+
+    python -m app.tools.rebalance_shards \
+        --from sqlite:///./shard0.db --from sqlite:///./shard1.db \
+        --to sqlite:///./shard0.db --to sqlite:///./shard1.db --to sqlite:///./shard2.db
+
+--to defaults to SHARD_DATABASE_URLS. To split a single database into shards,
+pass DATABASE_URL as the only --from. Every visited message is also
+registered in the catalog's message location index.
+
+Each session is copied to its new shard in one transaction and then removed
+from the old one; copies skip rows that are already there, so an interrupted
+run can be started again.
+"""
+import argparse
+import json
+import sys
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.config import settings
+from app.models.database import build_engine, create_schema
+from app.models.message import Message
+from app.models.message_location import MessageLocation
+from app.models.session import ChatSession
+from app.models.sharding import shard_for_session
+
+
+class ShardRebalancer:
+    """
+    Copies every session of the source databases that hashes to a different
+    target database, then deletes it from the source
+
+    Args:
+        catalog_engine: Database with the message location index
+        source_engines: Databases the messages are in now
+        target_engines: New shard databases, in shard order
+        batch_size: Messages per copied batch
+        dry_run: Only count the sessions and messages that would move
+    """
+
+    def __init__(
+        self, catalog_engine, source_engines, target_engines, batch_size=500, dry_run=False
+    ):
+        self.catalog_engine = catalog_engine
+        self.source_engines = source_engines
+        self.target_engines = target_engines
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+
+    def run(self):
+        stats = {"sessions": 0, "moved_sessions": 0, "moved_messages": 0}
+
+        # Listed up front: a session moved onto a later source is not revisited.
+        placements = []
+        for source in self.source_engines:
+            with source.connect() as connection:
+                placements.append(
+                    (source, connection.scalars(select(ChatSession.session_id)).all())
+                )
+
+        for source, session_ids in placements:
+            for session_id in session_ids:
+                stats["sessions"] += 1
+                target = self.target_engines[
+                    shard_for_session(session_id, len(self.target_engines))
+                ]
+
+                if not self.dry_run:
+                    self._index_session(source, session_id)
+                if _same_database(source, target):
+                    continue
+
+                stats["moved_sessions"] += 1
+                stats["moved_messages"] += self._move_session(source, target, session_id)
+
+        return stats
+
+    def _session_messages(self, connection, session_id):
+        result = connection.execution_options(yield_per=self.batch_size).execute(
+            select(Message.__table__).where(Message.session_id == session_id)
+        )
+        for partition in result.partitions():
+            yield [row._asdict() for row in partition]
+
+    def _index_session(self, source, session_id):
+        with source.connect() as connection, self.catalog_engine.begin() as catalog:
+            for rows in self._session_messages(connection, session_id):
+                catalog.execute(
+                    sqlite_insert(MessageLocation).on_conflict_do_nothing(),
+                    [
+                        {"message_id": row["message_id"], "session_id": session_id}
+                        for row in rows
+                    ],
+                )
+
+    def _move_session(self, source, target, session_id):
+        moved = 0
+
+        with source.connect() as connection:
+            if self.dry_run:
+                return connection.scalar(
+                    select(ChatSession.message_count).where(
+                        ChatSession.session_id == session_id
+                    )
+                ) or 0
+
+            with target.begin() as copy:
+                for rows in self._session_messages(connection, session_id):
+                    copy.execute(
+                        sqlite_insert(Message.__table__).on_conflict_do_nothing(), rows
+                    )
+                    moved += len(rows)
+
+                summary = connection.execute(
+                    select(ChatSession.__table__).where(
+                        ChatSession.session_id == session_id
+                    )
+                ).first()
+                copy.execute(
+                    sqlite_insert(ChatSession.__table__).on_conflict_do_nothing(),
+                    summary._asdict(),
+                )
+
+        with source.begin() as connection:
+            connection.execute(delete(Message).where(Message.session_id == session_id))
+            connection.execute(
+                delete(ChatSession).where(ChatSession.session_id == session_id)
+            )
+
+        return moved
+
+
+def _same_database(first, second):
+    return first.url == second.url
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.tools.rebalance_shards",
+        description="Moves sessions to their shard after the shard list changes",
+    )
+    parser.add_argument(
+        "--from",
+        dest="sources",
+        action="append",
+        required=True,
+        help="database the messages are in now (repeat for each shard)",
+    )
+    parser.add_argument(
+        "--to",
+        dest="targets",
+        action="append",
+        help="new shard database, in order (defaults to SHARD_DATABASE_URLS)",
+    )
+    parser.add_argument("--catalog-url", default=settings.database_url)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only count what would be moved"
+    )
+    args = parser.parse_args(argv)
+
+    targets = args.targets or settings.shard_database_urls
+    if not targets:
+        parser.error("no target shards: pass --to or set SHARD_DATABASE_URLS")
+
+    urls = [args.catalog_url, *args.sources, *targets]
+    engines = {url: build_engine(url) for url in urls}
+    if not args.dry_run:
+        for url in [args.catalog_url, *targets]:
+            create_schema(engines[url])
+
+    stats = ShardRebalancer(
+        engines[args.catalog_url],
+        [engines[url] for url in args.sources],
+        [engines[url] for url in targets],
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+    ).run()
+
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,45 +1,146 @@
-import re
+import hashlib
+from typing import NamedTuple
 
 from app.config import settings
+from app.utils.keyword_matcher import build_matcher
+from app.utils.lru_cache import LRUCache
+from app.utils.metrics import register_cache
+from app.utils.word_dictionary import load_word_list
+
+
+class ContentAnalysis(NamedTuple):
+    is_appropriate: bool
+    inappropriate_words: list
+    spans: list
+    metadata: dict
+    version: str
+
+
+class CompiledDictionary(NamedTuple):
+    words: list
+    matcher: object
+    word_order: dict
+    version: str
 
 
 class ContentFilter:
-    def __init__(self, inappropriate_words):
-        self.inappropriate_words = inappropriate_words or settings.inappropriate_words
-        self._compile_patterns()
+    def __init__(self, inappropriate_words, engine=None, cache=None):
+        self.engine = engine or settings.content_filter_engine
+        self.cache = cache
+        self._dictionary = self._compile_patterns(
+            inappropriate_words or settings.inappropriate_words
+        )
+
+    @property
+    def inappropriate_words(self):
+        return self._dictionary.words
+
+    @property
+    def matcher(self):
+        return self._dictionary.matcher
+
+    @property
+    def version(self):
+        return self._dictionary.version
+
+    def _compile_patterns(self, inappropriate_words):
+        matcher = build_matcher(self.engine, inappropriate_words)
+        version = hashlib.blake2b(
+            "\n".join([self.engine, *matcher.words]).encode(), digest_size=6
+        ).hexdigest()
+
+        return CompiledDictionary(
+            list(inappropriate_words),
+            matcher,
+            {word: index for index, word in enumerate(matcher.words)},
+            version,
+        )
+
+    def reload(self, inappropriate_words):
+        """
+        Compiles a new word list and swaps it in atomically
 
-    def _compile_patterns(self):
-        patterns = []
-        for word in self.inappropriate_words:
-            pattern = r"\b" + re.escape(word.lower()) + r"\b"
-            patterns.append(pattern)
+        Calls that already started keep scanning with the dictionary they
+        picked up, so in-flight requests finish on the previous version.
 
-        self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+        Args:
+            inappropriate_words: New word list; an empty list falls back to
+                settings.inappropriate_words, as in the constructor
 
-    def check_content(self, content):
+        Returns:
+            str: Version of the dictionary now in use
         """
-        Checks if the content contains inappropriate words
+        self._dictionary = self._compile_patterns(
+            inappropriate_words or settings.inappropriate_words
+        )
+
+        return self._dictionary.version
+
+    def analyze(self, content):
+        """
+        Scans the content once and derives everything the filter reports
+
+        Results are memoized in the optional cache, keyed by a hash of the
+        content and the word-list version. Cached results are shared and must
+        be treated as read-only.
 
         Args:
-            content: Content to verify
+            content: Content to analyze
 
         Returns:
-            Tuple[bool, List[str]]: (is_appropriate, found_words)
+            ContentAnalysis: check result, match spans for masking, metadata
+                and the dictionary version used
         """
+        dictionary = self._dictionary
+
+        if self.cache is None or not content:
+            return self._scan(content, dictionary)
+
+        content_hash = hashlib.blake2b(
+            content.encode("utf-8", "surrogatepass"), digest_size=16
+        ).digest()
+        key = (content_hash, dictionary.version)
+        analysis = self.cache.get(key)
+        if analysis is None:
+            analysis = self._scan(content, dictionary)
+            self.cache.set(key, analysis, _analysis_size(analysis))
+
+        return analysis
+
+    def _scan(self, content, dictionary):
         if not content:
-            return True, []
+            return ContentAnalysis(
+                True, [], [], self._build_metadata(content, []), dictionary.version
+            )
+
+        matches = dictionary.matcher.find(content)
+        found_words = sorted(
+            dict.fromkeys(word for _, _, word in matches),
+            key=lambda word: dictionary.word_order.get(word, len(dictionary.word_order)),
+        )
+        spans = [(start, end) for start, end, _ in matches]
+
+        return ContentAnalysis(
+            len(found_words) == 0,
+            found_words,
+            spans,
+            self._build_metadata(content, found_words),
+            dictionary.version,
+        )
 
-        found_words = []
-        content_lower = content.lower()
+    def check_content(self, content):
+        """
+        Checks if the content contains inappropriate words
 
-        for pattern in self.patterns:
-            if pattern.search(content_lower):
-                matches = pattern.findall(content_lower)
-                found_words.extend(matches)
+        Args:
+            content: Content to verify
 
-        unique_found_words = list(dict.fromkeys(found_words))
+        Returns:
+            Tuple[bool, List[str]]: (is_appropriate, found_words)
+        """
+        analysis = self.analyze(content)
 
-        return len(unique_found_words) == 0, unique_found_words
+        return analysis.is_appropriate, analysis.inappropriate_words
 
     def filter_content(self, content, replacement):
         """
@@ -55,12 +156,33 @@ class ContentFilter:
         if not content:
             return content
 
-        filtered_content = content
+        return self.mask(content, self.analyze(content).spans, replacement)
 
-        for pattern in self.patterns:
-            filtered_content = pattern.sub(replacement, filtered_content)
+    def mask(self, content, spans, replacement):
+        """
+        Replaces already located matches without scanning the content again
 
-        return filtered_content
+        Args:
+            content: Content the spans were found in
+            spans: (start, end) pairs from analyze
+            replacement: Replacement text for inappropriate words
+
+        Returns:
+            str: Filtered content
+        """
+        parts = []
+        position = 0
+
+        for start, end in spans:
+            if start < position:
+                continue
+            parts.append(content[position:start])
+            parts.append(replacement)
+            position = end
+
+        parts.append(content[position:])
+
+        return "".join(parts)
 
     def get_content_metadata(self, content):
         """
@@ -72,6 +194,9 @@ class ContentFilter:
         Returns:
             dict: Content metadata
         """
+        return self.analyze(content).metadata
+
+    def _build_metadata(self, content, inappropriate_words):
         if not content:
             return {
                 "length": 0,
@@ -86,15 +211,32 @@ class ContentFilter:
 
         character_count = len(content)
 
-        is_appropriate, inappropriate_words = self.check_content(content)
-
         return {
             "length": len(content),
             "word_count": word_count,
             "character_count": character_count,
-            "has_inappropriate_content": not is_appropriate,
+            "has_inappropriate_content": len(inappropriate_words) > 0,
             "inappropriate_words": inappropriate_words,
         }
 
 
-content_filter = ContentFilter(settings.inappropriate_words)
+def _analysis_size(analysis):
+    # Rough footprint of the cached tuple, its metadata dict and word strings.
+    words_size = sum(64 + len(word) for word in analysis.inappropriate_words)
+    return 512 + 64 * len(analysis.spans) + words_size
+
+
+content_filter = ContentFilter(
+    load_word_list(settings.inappropriate_words_file)
+    if settings.inappropriate_words_file
+    else settings.inappropriate_words,
+    cache=LRUCache(
+        settings.content_filter_cache_max_entries,
+        settings.content_filter_cache_max_bytes,
+    )
+    if settings.content_filter_cache_enabled
+    else None,
+)
+
+if content_filter.cache is not None:
+    register_cache("content_filter", content_filter.cache)
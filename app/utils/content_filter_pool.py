@@ -0,0 +1,180 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config import settings
+from app.utils.content_filter import ContentFilter, content_filter
+from app.utils.metrics import STAGE_LATENCY
+
+# Filter used by analyze_in_worker, set once per worker process by init_worker.
+_worker_filter = None
+
+# Seconds a new pool may take to spawn its workers and compile the dictionary.
+WORKER_STARTUP_TIMEOUT = 60.0
+
+
+def init_worker(words, engine, ready=None):
+    global _worker_filter
+    # Importing this module already compiled the shared filter from the same
+    # settings; it is only compiled again when the dictionary differs.
+    if content_filter.engine == engine and content_filter.inappropriate_words == words:
+        _worker_filter = content_filter
+    else:
+        _worker_filter = ContentFilter(words, engine=engine)
+
+    if ready is not None:
+        ready.put(os.getpid())
+
+
+def analyze_in_worker(content):
+    return _worker_filter.analyze(content)
+
+
+class ContentFilterPool:
+    """
+    Worker processes for the content filter of large messages
+
+    Scanning multi-kilobyte content is pure Python and holds the GIL, which
+    stalls every other request on the event loop. Content at least min_size
+    characters long is analyzed in a process pool instead; each worker
+    compiles the dictionary once, when it starts. When the filter's word
+    list is reloaded, refresh() starts a replacement pool off the request
+    path and swaps it in once every worker is ready; until then, large
+    content is analyzed inline so workers never scan with an old dictionary.
+
+    Args:
+        content_filter: ContentFilter whose dictionary the workers load
+        workers: Number of worker processes (0: everything runs inline)
+        min_size: Content length from which the work is offloaded
+    """
+
+    def __init__(self, content_filter, workers, min_size):
+        self.content_filter = content_filter
+        self.workers = workers
+        self.min_size = min_size
+        # (executor, dictionary version), replaced as a whole on refresh.
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self):
+        return self._pool is not None
+
+    def start(self):
+        with self._lock:
+            if self.workers > 0 and self._pool is None:
+                self._pool = self._create_pool()
+
+    def stop(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool[0].shutdown(wait=True)
+                self._pool = None
+
+    def refresh(self):
+        """
+        Replaces the workers if the filter's dictionary changed
+
+        Blocks while the new workers start, so it runs on the thread that
+        reloaded the dictionary (see DictionaryWatcher) or on a background
+        thread, never in a request. Queued scans finish on the old pool.
+
+        Returns:
+            bool: Whether the pool was replaced
+        """
+        with self._lock:
+            if self._pool is None or self._pool[1] == self.content_filter.version:
+                return False
+            old_executor = self._pool[0]
+            self._pool = self._create_pool()
+
+        old_executor.shutdown(wait=False)
+        return True
+
+    def _refresh_in_background(self):
+        if not self._lock.locked():
+            threading.Thread(
+                target=self.refresh, name="content-filter-pool-refresh", daemon=True
+            ).start()
+
+    def _create_pool(self):
+        # Read before the words: a reload in between only triggers a refresh.
+        version = self.content_filter.version
+        # Forking a process that already runs threads is unsafe.
+        context = multiprocessing.get_context("spawn")
+        ready = context.Queue()
+        executor = ProcessPoolExecutor(
+            self.workers,
+            mp_context=context,
+            initializer=init_worker,
+            initargs=(
+                self.content_filter.inappropriate_words,
+                self.content_filter.engine,
+                ready,
+            ),
+        )
+
+        # Workers are spawned on submit, one per task while none is idle.
+        try:
+            for _ in range(self.workers):
+                executor.submit(int)
+            for _ in range(self.workers):
+                ready.get(timeout=WORKER_STARTUP_TIMEOUT)
+        except Exception:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+        return executor, version
+
+    async def analyze(self, content):
+        """
+        Analyzes large content in a worker process
+
+        Args:
+            content: Message content
+
+        Returns:
+            Optional[ContentAnalysis]: The analysis, or None when the content
+                is small enough (or the pool is off or being replaced) to be
+                analyzed inline
+        """
+        pool = self._pool
+        if pool is None or not content or len(content) < self.min_size:
+            return None
+
+        executor, version = pool
+        if version != self.content_filter.version:
+            self._refresh_in_background()
+            return None
+
+        loop = asyncio.get_running_loop()
+        with STAGE_LATENCY.time("content_filter"):
+            return await loop.run_in_executor(executor, analyze_in_worker, content)
+
+    async def analyze_many(self, messages):
+        """
+        analyze() for every message of a batch
+
+        Args:
+            messages: MessageCreate items
+
+        Returns:
+            list: ContentAnalysis or None per message
+        """
+        if self._pool is None:
+            return [None] * len(messages)
+
+        return list(
+            await asyncio.gather(
+                *(self.analyze(message_data.content) for message_data in messages)
+            )
+        )
+
+
+content_filter_pool = ContentFilterPool(
+    content_filter,
+    workers=settings.content_filter_workers,
+    min_size=settings.content_filter_offload_min_size,
+)
@@ -1,3 +1,6 @@
+from app.utils.metrics import DATABASE_ERRORS
+
+
 class MessageProcessingError(Exception):
     def __init__(
         self,
@@ -12,6 +15,13 @@ class MessageProcessingError(Exception):
         self.details = details or {}
         super().__init__(self.message)
 
+    def to_dict(self):
+        return {
+            "code": self.error_code,
+            "message": self.message,
+            "details": self.details,
+        }
+
 
 class MessageValidationError(MessageProcessingError):
     def __init__(self, message, details=None):
@@ -59,9 +69,31 @@ class DatabaseError(MessageProcessingError):
         if original_error:
             details["original_error"] = str(original_error)
 
+        DATABASE_ERRORS.inc(type(original_error).__name__ if original_error else "")
+
         super().__init__(
             message=message,
             error_code="DATABASE_ERROR",
             status_code=500,
             details=details,
         )
+
+
+class IngestionQueueFullError(MessageProcessingError):
+    def __init__(self, max_size):
+        super().__init__(
+            message="ingestion queue is full, retry later",
+            error_code="INGESTION_QUEUE_FULL",
+            status_code=503,
+            details={"max_size": max_size},
+        )
+
+
+class WriterUnavailableError(MessageProcessingError):
+    def __init__(self, reason):
+        super().__init__(
+            message="writer process unavailable, retry later",
+            error_code="WRITER_UNAVAILABLE",
+            status_code=503,
+            details={"reason": reason},
+        )
@@ -0,0 +1,109 @@
+import re
+
+
+class RegexKeywordMatcher:
+    """
+    Matches whole words with one compiled pattern per word
+
+    Cost grows with the size of the word list; kept as a fallback engine.
+    """
+
+    def __init__(self, words):
+        self.words = [word.lower() for word in words]
+        self.patterns = [
+            re.compile(r"\b" + re.escape(word) + r"\b", re.IGNORECASE)
+            for word in self.words
+        ]
+
+    def find(self, content):
+        """
+        Finds every whole-word occurrence of the word list
+
+        Args:
+            content: Text to scan
+
+        Returns:
+            List[Tuple[int, int, str]]: (start, end, lowercased word) sorted by start
+        """
+        matches = []
+        for pattern in self.patterns:
+            for match in pattern.finditer(content):
+                matches.append((match.start(), match.end(), match.group().lower()))
+
+        matches.sort()
+        return matches
+
+
+class TrieKeywordMatcher:
+    """
+    Matches whole words with a single trie-compiled alternation
+
+    Words are merged into a prefix tree and rendered as one regex, so each
+    position of the content is tried against the tree once instead of once
+    per word and scanning cost does not depend on the size of the word list.
+    """
+
+    def __init__(self, words):
+        self.words = [word.lower() for word in words]
+        trie = {}
+        for word in self.words:
+            if not word:
+                continue
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = True
+
+        body = self._to_regex(trie) if trie else "(?!)"
+        self.pattern = re.compile(r"\b(?:" + body + r")\b", re.IGNORECASE)
+
+    def _to_regex(self, node):
+        is_terminal = "" in node
+        branches = []
+        for char in sorted(key for key in node if key):
+            child = node[char]
+            suffix = self._to_regex(child) if len(child) > 1 or "" not in child else ""
+            branches.append(re.escape(char) + suffix)
+
+        if len(branches) == 1:
+            result = branches[0]
+            if is_terminal:
+                result = "(?:" + result + ")?" if len(result) > 1 else result + "?"
+        else:
+            result = "(?:" + "|".join(branches) + ")"
+            if is_terminal:
+                result += "?"
+
+        return result
+
+    def find(self, content):
+        """
+        Finds every whole-word occurrence of the word list in one pass
+
+        Args:
+            content: Text to scan
+
+        Returns:
+            List[Tuple[int, int, str]]: (start, end, lowercased word) sorted by start
+        """
+        return [
+            (match.start(), match.end(), match.group().lower())
+            for match in self.pattern.finditer(content)
+        ]
+
+
+MATCHER_ENGINES = {
+    "regex": RegexKeywordMatcher,
+    "trie": TrieKeywordMatcher,
+}
+
+
+def build_matcher(engine, words):
+    try:
+        matcher_class = MATCHER_ENGINES[engine]
+    except KeyError:
+        raise ValueError(
+            f"unknown content filter engine '{engine}', "
+            f"expected one of: {', '.join(MATCHER_ENGINES)}"
+        )
+    return matcher_class(words)
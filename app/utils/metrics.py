@@ -0,0 +1,312 @@
+import threading
+import time
+from bisect import bisect_left
+
+from app.config import settings
+
+# Seconds; sized for in-process work (sub-millisecond filter runs) up to slow
+# commits waiting on the SQLite write lock.
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ""
+
+    escaped = (
+        (name, str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\""))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues):
+        return self._values.get(labelvalues, 0)
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for labelvalues, value in values:
+            yield self.name, _format_labels(self.labelnames, labelvalues), value
+
+
+class _Timer:
+    __slots__ = ("histogram", "labelvalues", "start")
+
+    def __init__(self, histogram, labelvalues):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labelvalues)
+
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram
+
+    observe() is a bisect and a few additions under a lock, so it is cheap
+    enough for every request.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS
+    ):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labelvalues -> [per-bucket counts (last one is +Inf), sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        if not self.registry.enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def time(self, *labelvalues):
+        return _Timer(self, labelvalues)
+
+    def count(self, *labelvalues):
+        state = self._values.get(labelvalues)
+        return sum(state[0]) if state else 0
+
+    def samples(self):
+        with self._lock:
+            values = [
+                (labelvalues, list(counts), total)
+                for labelvalues, (counts, total) in self._values.items()
+            ]
+
+        for labelvalues, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames, labelvalues, [("le", _format_value(float(bound)))]
+                )
+                yield f"{self.name}_bucket", labels, cumulative
+
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Gauge:
+    """
+    Gauge read from a callback when the metrics are scraped
+
+    The callback returns a number, or a {labelvalues: number} dict when the
+    gauge has labels.
+    """
+
+    type = "gauge"
+
+    def __init__(self, registry, name, documentation, function, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        values = self.function()
+        if not self.labelnames:
+            values = {(): values}
+
+        for labelvalues, value in values.items():
+            yield self.name, _format_labels(self.labelnames, labelvalues), value
+
+
+class MetricsRegistry:
+    """
+    Process-local metrics in the Prometheus text exposition format
+
+    Each worker process keeps its own values; scrape every worker (or run a
+    single one) to see the whole picture.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._metrics = {}
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, function, labelnames=()):
+        return self._register(Gauge(self, name, documentation, function, labelnames))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+registry = MetricsRegistry(enabled=settings.metrics_enabled)
+
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+STAGE_LATENCY = registry.histogram(
+    "message_stage_duration_seconds",
+    "Latency of each stage of storing a message",
+    ("stage",),
+)
+MESSAGES_CREATED = registry.counter("messages_created_total", "Messages stored")
+MESSAGE_DUPLICATES = registry.counter(
+    "message_duplicates_total", "Messages rejected or skipped as duplicate ids"
+)
+FILTER_REJECTIONS = registry.counter(
+    "content_filter_rejections_total",
+    "Messages rejected by the content filter, by matched word",
+    ("word",),
+)
+DATABASE_ERRORS = registry.counter(
+    "database_errors_total", "Failed database operations by driver error", ("error",)
+)
+
+
+# In-process caches reported on /metrics, by name; see register_cache.
+_caches = {}
+
+
+def register_cache(name, cache):
+    """
+    Reports the hit, miss and eviction counts of a cache on /metrics
+
+    Args:
+        name: Value of the cache label
+        cache: Object with an LRUCache-style stats() method
+    """
+    _caches[name] = cache
+
+
+def _cache_stat(key):
+    return lambda: {(name,): cache.stats()[key] for name, cache in _caches.items()}
+
+
+registry.gauge(
+    "cache_hits",
+    "Lookups answered by an in-process cache",
+    _cache_stat("hits"),
+    ("cache",),
+)
+registry.gauge(
+    "cache_misses",
+    "Lookups an in-process cache could not answer",
+    _cache_stat("misses"),
+    ("cache",),
+)
+registry.gauge(
+    "cache_evictions",
+    "Entries evicted from an in-process cache to stay within its limits",
+    _cache_stat("evictions"),
+    ("cache",),
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency of every HTTP request
+
+    Requests are labelled with the matched route template, not the raw path,
+    so session and message ids do not create new series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status,
+            )
@@ -0,0 +1,85 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from app.utils.exceptions import MessageValidationError
+
+
+def _encode(values):
+    payload = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode()
+
+
+def _decode(cursor):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def _invalid_cursor(field):
+    return MessageValidationError(
+        "invalid pagination cursor",
+        details={"field": field, "issue": "malformed cursor"},
+    )
+
+
+def encode_cursor(timestamp, message_id):
+    """
+    Encodes the position of a message as an opaque keyset cursor
+
+    Args:
+        timestamp: Timestamp of the last message of a page
+        message_id: Id of the last message of a page
+
+    Returns:
+        str: URL-safe cursor
+    """
+    return _encode([timestamp.isoformat(), message_id])
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor produced by encode_cursor
+
+    Args:
+        cursor: Cursor sent by the client
+
+    Returns:
+        Tuple[datetime, str]: (timestamp, message_id)
+    """
+    try:
+        timestamp, message_id = _decode(cursor)
+        return datetime.fromisoformat(timestamp), str(message_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise _invalid_cursor("before")
+
+
+def encode_search_cursor(score, message_id):
+    """
+    Encodes the position of a search hit as an opaque keyset cursor
+
+    Args:
+        score: bm25 score of the last hit of a page
+        message_id: Id of the last hit of a page
+
+    Returns:
+        str: URL-safe cursor
+    """
+    return _encode([score, message_id])
+
+
+def decode_search_cursor(cursor):
+    """
+    Decodes a cursor produced by encode_search_cursor
+
+    Args:
+        cursor: Cursor sent by the client
+
+    Returns:
+        Tuple[float, str]: (score, message_id)
+    """
+    try:
+        score, message_id = _decode(cursor)
+        return float(score), str(message_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise _invalid_cursor("cursor")
@@ -0,0 +1,198 @@
+import cProfile
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+
+# Statement text kept per query in written profiles.
+MAX_STATEMENT_LENGTH = 2000
+
+_current_profile = ContextVar("request_profile", default=None)
+
+# cProfile hooks the whole thread, so only one request is CPU-profiled at a
+# time; concurrent ones still get query accounting.
+_cpu_profile_lock = threading.Lock()
+
+
+class RequestProfile:
+    """
+    SQL statements run on behalf of one request
+
+    The cursor event hooks find the profile through a context variable,
+    which follows the request into AsyncSession.run_sync greenlets and
+    threadpool calls.
+    """
+
+    def __init__(self, method, path):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.queries = []
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    @property
+    def query_time_ms(self):
+        return sum(duration for _, duration in self.queries)
+
+    def to_dict(self, status, duration_ms):
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "duration_ms": round(duration_ms, 3),
+            "db_queries": self.query_count,
+            "db_time_ms": round(self.query_time_ms, 3),
+            "queries": [
+                {
+                    "statement": statement[:MAX_STATEMENT_LENGTH],
+                    "duration_ms": round(duration, 3),
+                }
+                for statement, duration in self.queries
+            ],
+        }
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if settings.slow_query_threshold_ms is None and _current_profile.get() is None:
+        return
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    duration_ms = (time.perf_counter() - start_times.pop()) * 1000
+
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.queries.append((statement, duration_ms))
+
+    threshold = settings.slow_query_threshold_ms
+    if threshold is not None and duration_ms >= threshold:
+        logger.warning(
+            "slow query (%.1f ms, %s): %s",
+            duration_ms,
+            conn.engine.url.database,
+            " ".join(statement.split()),
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_query_timer(exception_context):
+    # after_cursor_execute does not run for a failed statement. A connection
+    # runs one statement at a time, so a timer left on it belongs to the one
+    # that failed; errors raised before the cursor ran left none.
+    connection = exception_context.connection
+    if connection is not None:
+        start_times = connection.info.get("query_start_time")
+        if start_times:
+            start_times.pop()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware for opt-in per-request profiling
+
+    A request is profiled when it carries an X-Profile header (and
+    profiling_header_enabled is set) or is picked by profiling_sample_rate.
+    Profiled responses get X-DB-Queries and X-DB-Time-ms headers, and a JSON
+    report with every statement is written to profiling_dir. With
+    profiling_cpu, or "X-Profile: cpu", the handler also runs under cProfile
+    and the stats are written next to the report (<id>.prof, readable with
+    pstats or snakeviz); they include whatever else the event loop ran in
+    the meantime.
+
+    Headers are sent when the response starts, so for streamed responses
+    they only count the queries issued before the first chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _requested(self, scope):
+        if settings.profiling_header_enabled:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return value.decode("latin-1").strip().lower() or "1"
+
+        rate = settings.profiling_sample_rate
+        if rate > 0 and random.random() < rate:
+            return "1"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = self._requested(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = _current_profile.set(profile)
+        profiler = None
+        if (settings.profiling_cpu or mode == "cpu") and _cpu_profile_lock.acquire(
+            blocking=False
+        ):
+            profiler = cProfile.Profile()
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-db-queries", str(profile.query_count).encode()),
+                    (b"x-db-time-ms", f"{profile.query_time_ms:.3f}".encode()),
+                    (b"x-profile-id", profile.id.encode()),
+                ]
+            await send(message)
+
+        try:
+            if profiler is not None:
+                profiler.enable()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                _cpu_profile_lock.release()
+            _current_profile.reset(token)
+            self._write(profile, status, (time.perf_counter() - start) * 1000, profiler)
+
+    def _write(self, profile, status, duration_ms, profiler):
+        directory = settings.profiling_dir
+        try:
+            os.makedirs(directory, exist_ok=True)
+            name = f"{time.strftime('%Y%m%dT%H%M%S')}-{profile.id}"
+            path = os.path.join(directory, name)
+            with open(f"{path}.json", "w") as report:
+                json.dump(profile.to_dict(status, duration_ms), report, indent=2)
+            if profiler is not None:
+                profiler.dump_stats(f"{path}.prof")
+        except OSError:
+            logger.exception("could not write request profile to %s", directory)
@@ -0,0 +1,157 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from fastapi import Response
+
+from app.config import settings
+from app.utils.lru_cache import LRUCache
+from app.utils.metrics import register_cache
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def make_cached_response(body):
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    return CachedResponse(body, etag)
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+
+    return False
+
+
+def json_response(request, cached):
+    """
+    Builds the HTTP response for a serialized body, honouring If-None-Match
+
+    Args:
+        request: Incoming request
+        cached: CachedResponse to send
+
+    Returns:
+        Response: 304 without body when the client's ETag matches, else 200
+    """
+    headers = {"ETag": cached.etag}
+
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """
+    In-process cache of serialized GET responses
+
+    Session pages are keyed by the session's generation, which every write
+    to the session bumps, so invalidation is O(1) and stale pages simply age
+    out of the LRU. A page computed while a write landed is not stored.
+    Generations are tracked for a bounded number of sessions; sessions that
+    fall out share a floor generation at least as new as any evicted one.
+    Only writes made through this process (or pushed by the writer process)
+    invalidate entries, so max_age bounds how long writes from anywhere else
+    (other workers, the import and retention CLIs) can go unnoticed.
+    """
+
+    def __init__(
+        self, max_entries, max_bytes, max_tracked_sessions=100000, max_age=None
+    ):
+        self.enabled = max_entries > 0
+        self.max_tracked_sessions = max_tracked_sessions
+        self._cache = LRUCache(max_entries, max_bytes, max_age)
+        self._generations = OrderedDict()
+        self._counter = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """
+        Registers callback(kind, key), called after every invalidation
+
+        kind is "session" or "message"; the writer process uses this to pass
+        its invalidations on to the API workers.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        self._listeners.remove(callback)
+
+    def session_generation(self, session_id):
+        with self._lock:
+            return self._generations.get(session_id, self._floor)
+
+    def get_session_page(self, session_id, generation, params):
+        if not self.enabled:
+            return None
+        return self._cache.get(("session", session_id, generation, params))
+
+    def set_session_page(self, session_id, generation, params, cached):
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._generations.get(session_id, self._floor) != generation:
+                return
+        self._cache.set(
+            ("session", session_id, generation, params), cached, len(cached.body)
+        )
+
+    def get_message(self, message_id):
+        if not self.enabled:
+            return None
+        return self._cache.get(("message", message_id))
+
+    def set_message(self, message_id, cached):
+        if self.enabled:
+            self._cache.set(("message", message_id), cached, len(cached.body))
+
+    def invalidate_session(self, session_id):
+        with self._lock:
+            self._counter += 1
+            self._generations[session_id] = self._counter
+            self._generations.move_to_end(session_id)
+
+            while len(self._generations) > self.max_tracked_sessions:
+                _, generation = self._generations.popitem(last=False)
+                self._floor = max(self._floor, generation)
+
+        for callback in self._listeners:
+            callback("session", session_id)
+
+    def invalidate_message(self, message_id):
+        self._cache.delete(("message", message_id))
+
+        for callback in self._listeners:
+            callback("message", message_id)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._generations.clear()
+            self._floor = self._counter
+
+    def stats(self):
+        return self._cache.stats()
+
+
+response_cache = ResponseCache(
+    settings.response_cache_max_entries if settings.response_cache_enabled else 0,
+    settings.response_cache_max_bytes,
+    max_age=settings.response_cache_max_age or None,
+)
+
+register_cache("response", response_cache)
@@ -0,0 +1,43 @@
+import re
+
+from app.utils.exceptions import MessageValidationError
+
+TERM_PATTERN = re.compile(r"\w+\*?")
+
+
+def quote_term(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def build_match_query(query, session_id=None):
+    """
+    Turns free text into an FTS5 MATCH expression
+
+    Every word becomes a quoted term, so FTS5 operators and punctuation in
+    user input are searched literally instead of being parsed; all terms must
+    match. A trailing * keeps prefix search ("mens*"). The terms are limited
+    to the content column; session_id adds a filter on the indexed session.
+
+    Args:
+        query: Search text sent by the client
+        session_id: Optional session to restrict the match to
+
+    Returns:
+        str: FTS5 query
+    """
+    terms = []
+    for term in TERM_PATTERN.findall(query):
+        prefix = term.endswith("*")
+        terms.append(quote_term(term.rstrip("*")) + ("*" if prefix else ""))
+
+    if not terms:
+        raise MessageValidationError(
+            "search query must contain at least one word",
+            details={"field": "q", "issue": "no searchable terms"},
+        )
+
+    match_query = "content : (" + " ".join(terms) + ")"
+    if session_id is not None:
+        match_query += " AND session_id : " + quote_term(session_id)
+
+    return match_query
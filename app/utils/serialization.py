@@ -0,0 +1,41 @@
+import orjson
+
+from app.models.types import decode_stored_text
+
+
+def message_row_to_dict(row):
+    """
+    Maps a row selected with MESSAGE_ROW_COLUMNS to the API message shape
+
+    Compressed content and metadata are decompressed here, so rows that are
+    read but not serialized never pay for it.
+
+    Args:
+        row: Row with the message columns, content and metadata as stored
+
+    Returns:
+        dict: Message data as returned by MessageResponse
+    """
+    metadata = decode_stored_text(row.metadata)
+    return {
+        "message_id": row.message_id,
+        "session_id": row.session_id,
+        "content": decode_stored_text(row.content),
+        "timestamp": row.timestamp,
+        "sender": row.sender,
+        "metadata": orjson.Fragment(metadata) if metadata is not None else None,
+        "processed_at": row.processed_at,
+    }
+
+
+def dumps(payload):
+    """
+    Serializes a response payload straight to JSON bytes
+
+    Args:
+        payload: dict made of JSON types, datetimes and orjson fragments
+
+    Returns:
+        bytes: UTF-8 encoded JSON
+    """
+    return orjson.dumps(payload)
@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def load_word_list(path):
+    """
+    Loads a banned-word dictionary file
+
+    Args:
+        path: JSON file with a list of words, or a text file with one word per
+            line (blank lines and lines starting with # are ignored)
+
+    Returns:
+        List[str]: Words in file order
+    """
+    with open(path, encoding="utf-8") as dictionary_file:
+        if path.endswith(".json"):
+            words = json.load(dictionary_file)
+            if not isinstance(words, list):
+                raise ValueError(f"{path} must contain a JSON list of words")
+            return [str(word).strip() for word in words if str(word).strip()]
+
+        return [
+            line.strip()
+            for line in dictionary_file
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+
+
+class DictionaryWatcher:
+    """
+    Polls a dictionary file and hot-swaps the content filter's word list
+
+    The new matcher is compiled on the watcher thread and swapped in with
+    ContentFilter.reload, so request handling never waits for a reload. A file
+    that fails to load is logged and the current dictionary stays in use.
+    on_reload, if given, runs on the watcher thread after each reload (e.g.
+    ContentFilterPool.refresh, to restart its workers with the new words).
+    """
+
+    def __init__(self, content_filter, path, interval, on_reload=None):
+        self.content_filter = content_filter
+        self.path = path
+        self.interval = interval
+        self.on_reload = on_reload
+        self._last_signature = self._signature()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self):
+        signature = self._signature()
+        if signature is None or signature == self._last_signature:
+            return False
+
+        self._last_signature = signature
+        try:
+            words = load_word_list(self.path)
+            version = self.content_filter.reload(words)
+        except Exception:
+            logger.exception("could not reload banned-word dictionary %s", self.path)
+            return False
+
+        logger.info(
+            "banned-word dictionary %s reloaded: %d words, version %s",
+            self.path,
+            len(self.content_filter.inappropriate_words),
+            version,
+        )
+
+        if self.on_reload is not None:
+            try:
+                self.on_reload()
+            except Exception:
+                logger.exception("on_reload failed after reloading %s", self.path)
+
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="dictionary-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
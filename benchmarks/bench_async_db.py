@@ -0,0 +1,171 @@
+"""
+Concurrent-request throughput of the blocking and the async database paths
+
+Serves GET /api/messages/{session_id} in-process through httpx's ASGI
+transport, once with the previous handler shape (async def calling the sync
+MessageService) and once with the AsyncSession-backed controllers, while a
+heartbeat task measures how long the event loop is held.
+
+    python -m benchmarks.bench_async_db --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.main import app as async_app
+from app.models.database import Base, get_async_db
+from app.repositories.message_repository import MessageRepository
+from app.schemas.message import MessageCreate, SenderType
+from app.services.message_service import MessageService
+from app.utils.exceptions import MessageProcessingError
+
+
+def seed(engine, session_id, count):
+    Base.metadata.create_all(bind=engine)
+    start = datetime(2024, 1, 1)
+    messages = [
+        (
+            MessageCreate(
+                message_id=f"bench_{i:07d}",
+                session_id=session_id,
+                content=f"benchmark message number {i}",
+                timestamp=start + timedelta(seconds=i),
+                sender=SenderType.USER if i % 2 else SenderType.SYSTEM,
+            ),
+            {"processed": True},
+        )
+        for i in range(count)
+    ]
+    with sessionmaker(bind=engine)() as db:
+        MessageRepository(db).create_messages_bulk(messages)
+
+
+def build_blocking_app(session_factory):
+    blocking_app = FastAPI()
+
+    @blocking_app.get("/api/messages/{session_id}")
+    async def get_messages_by_session(session_id: str, limit: int = 10):
+        db = session_factory()
+        try:
+            return MessageService(db).get_messages_by_session(session_id, limit)
+        except MessageProcessingError as e:
+            return {"status": "error", "error": e.to_dict()}
+        finally:
+            db.close()
+
+    return blocking_app
+
+
+async def heartbeat(lags, stop, interval=0.001):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(loop.time() - started - interval)
+
+
+async def run_load(app, url, total_requests, concurrency):
+    lags = []
+    stop = asyncio.Event()
+    queue = asyncio.Queue()
+    for _ in range(total_requests):
+        queue.put_nowait(url)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker():
+            while not queue.empty():
+                response = await client.get(queue.get_nowait())
+                response.raise_for_status()
+
+        beat = asyncio.create_task(heartbeat(lags, stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await beat
+
+    lags.sort()
+    return {
+        "requests_per_second": total_requests / elapsed,
+        "loop_lag_p50_ms": statistics.median(lags) * 1000 if lags else 0.0,
+        "loop_lag_p99_ms": lags[int(len(lags) * 0.99) - 1] * 1000 if lags else 0.0,
+        "loop_lag_max_ms": lags[-1] * 1000 if lags else 0.0,
+        "heartbeats": len(lags),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = create_engine(
+            f"sqlite:///{path}", connect_args={"check_same_thread": False}
+        )
+        seed(engine, "bench_session", args.messages)
+
+        async_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{path}",
+            connect_args={"check_same_thread": False},
+            poolclass=AsyncAdaptedQueuePool,
+        )
+        async_session_factory = async_sessionmaker(
+            bind=async_engine, autoflush=False, expire_on_commit=False
+        )
+
+        async def override_get_async_db():
+            async with async_session_factory() as db:
+                yield db
+
+        async_app.dependency_overrides[get_async_db] = override_get_async_db
+        url = f"/api/messages/bench_session?limit={args.limit}"
+
+        results = {
+            "blocking": asyncio.run(
+                run_load(
+                    build_blocking_app(sessionmaker(bind=engine, autoflush=False)),
+                    url,
+                    args.requests,
+                    args.concurrency,
+                )
+            ),
+            "async": asyncio.run(
+                run_load(async_app, url, args.requests, args.concurrency)
+            ),
+        }
+        async_app.dependency_overrides.clear()
+        asyncio.run(async_engine.dispose())
+        engine.dispose()
+
+    print(
+        f"{'mode':<10}{'req/s':>10}{'lag p50 ms':>12}{'lag p99 ms':>12}"
+        f"{'lag max ms':>12}{'beats':>8}"
+    )
+    for mode, result in results.items():
+        print(
+            f"{mode:<10}{result['requests_per_second']:>10.1f}"
+            f"{result['loop_lag_p50_ms']:>12.2f}{result['loop_lag_p99_ms']:>12.2f}"
+            f"{result['loop_lag_max_ms']:>12.2f}{result['heartbeats']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Database size and read latency with content compression on and off
+
+Seeds one SQLite file per mode with log-like messages of --size bytes, then
+reports the total size of the database files (main file and WAL), the size
+of the messages table and of the full-text index, and the latency of reading
+a session page (Core path, which decompresses only the rows it serializes)
+and single messages (ORM path).
+
+    python -m benchmarks.bench_compression --messages 20000 --size 8192
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.models.database import Base
+from app.repositories.message_repository import MessageRepository
+from app.schemas.message import MessageCreate, SenderType
+from app.services.message_service import MessageService
+
+SESSION_SIZE = 100
+LEVELS = ["INFO", "WARN", "ERROR", "DEBUG"]
+SERVICES = ["payments", "auth", "search", "billing", "gateway"]
+
+
+def log_content(generator, size):
+    lines = []
+    length = 0
+    while length < size:
+        line = (
+            f"2024-01-01T{generator.randrange(24):02d}:{generator.randrange(60):02d}:"
+            f"{generator.randrange(60):02d} {generator.choice(LEVELS)} "
+            f"[{generator.choice(SERVICES)}] request {generator.getrandbits(32):08x} "
+            f"took {generator.randrange(2000)}ms status={generator.choice([200, 404, 500])}"
+        )
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)[:size]
+
+
+def seed(session_factory, count, size):
+    generator = random.Random(7)
+    metadata = {"processed": True, "processing_version": "1.0"}
+    for start in range(0, count, 1000):
+        messages = [
+            (
+                MessageCreate(
+                    message_id=f"bench_{i:07d}",
+                    session_id=f"session_{i // SESSION_SIZE:05d}",
+                    content=log_content(generator, size),
+                    timestamp=datetime(2024, 1, 1) + timedelta(seconds=i),
+                    sender=SenderType.USER if i % 2 else SenderType.SYSTEM,
+                ),
+                metadata,
+            )
+            for i in range(start, min(start + 1000, count))
+        ]
+        with session_factory() as db:
+            MessageRepository(db).create_messages_bulk(messages)
+
+
+def database_size(path):
+    return sum(
+        os.path.getsize(path + suffix)
+        for suffix in ("", "-wal")
+        if os.path.exists(path + suffix)
+    )
+
+
+def table_size(engine, pattern):
+    with engine.connect() as connection:
+        return connection.execute(
+            text("SELECT SUM(pgsize) FROM dbstat WHERE name GLOB :pattern"),
+            {"pattern": pattern},
+        ).scalar()
+
+
+def measure(session_factory, read, iterations):
+    timings = []
+    generator = random.Random(11)
+    with session_factory() as db:
+        service = MessageService(db)
+        for _ in range(iterations):
+            started = time.perf_counter()
+            read(service, generator)
+            timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    return statistics.median(timings) * 1000, timings[int(len(timings) * 0.95) - 1] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--size", type=int, default=8192)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    sessions = args.messages // SESSION_SIZE
+    reads = {
+        "page": lambda service, generator: service._render_messages_by_session(
+            f"session_{generator.randrange(sessions):05d}", args.limit, 0, None, None
+        ),
+        "message": lambda service, generator: service.get_message_by_id(
+            f"bench_{generator.randrange(args.messages):07d}"
+        ),
+    }
+
+    print(
+        f"{'mode':<6}{'db MB':>8}{'table MB':>10}{'index MB':>10}"
+        f"{'read':>9}{'p50 ms':>10}{'p95 ms':>10}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("off", "on"):
+            settings.compression_enabled = mode == "on"
+            path = os.path.join(tmp, f"{mode}.db")
+            engine = create_engine(f"sqlite:///{path}")
+            Base.metadata.create_all(bind=engine)
+            session_factory = sessionmaker(bind=engine, autoflush=False)
+            seed(session_factory, args.messages, args.size)
+
+            size_mb = database_size(path) / 1024 / 1024
+            table_mb = table_size(engine, "messages") / 1024 / 1024
+            # The FTS5 shadow tables: messages_fts_data, _idx, _docsize...
+            index_mb = table_size(engine, "messages_fts_*") / 1024 / 1024
+            for name, read in reads.items():
+                p50, p95 = measure(session_factory, read, args.iterations)
+                print(
+                    f"{mode:<6}{size_mb:>8.1f}{table_mb:>10.1f}{index_mb:>10.1f}{name:>9}"
+                    f"{p50:>10.3f}{p95:>10.3f}"
+                )
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Microbenchmark of serializing a 100-message session page
+
+Compares the ORM path (Message objects -> MessageResponse -> MessageListResponse
+-> JSON) with the Core path (column tuples -> orjson bytes) used on cache
+misses. Both run against the same seeded SQLite file, without the response
+cache.
+
+    python -m benchmarks.bench_read_path --iterations 500
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.repositories.message_repository import MessageRepository
+from app.schemas.message import MessageCreate, SenderType
+from app.services.message_service import MessageService
+from app.utils.content_filter import content_filter
+
+SESSION_ID = "bench_session"
+
+
+def seed(session_factory, count):
+    metadata = dict(content_filter.get_content_metadata("benchmark message"))
+    metadata.update({"processed": True, "processing_version": "1.0"})
+    messages = [
+        (
+            MessageCreate(
+                message_id=f"bench_{i:07d}",
+                session_id=SESSION_ID,
+                content=f"benchmark message number {i} with some extra text",
+                timestamp=datetime(2024, 1, 1) + timedelta(seconds=i),
+                sender=SenderType.USER if i % 2 else SenderType.SYSTEM,
+            ),
+            metadata,
+        )
+        for i in range(count)
+    ]
+    with session_factory() as db:
+        MessageRepository(db).create_messages_bulk(messages)
+
+
+def measure(session_factory, render, iterations):
+    timings = []
+    for _ in range(iterations):
+        with session_factory() as db:
+            service = MessageService(db)
+            started = time.perf_counter()
+            render(service)
+            timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    return {
+        "p50_ms": statistics.median(timings) * 1000,
+        "p95_ms": timings[int(len(timings) * 0.95) - 1] * 1000,
+        "pages_per_second": len(timings) / sum(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    paths = {
+        "orm": lambda service: service.get_messages_by_session(
+            SESSION_ID, args.limit
+        ).model_dump_json().encode(),
+        "core": lambda service: service._render_messages_by_session(
+            SESSION_ID, args.limit, 0, None, None
+        ),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine, autoflush=False)
+        seed(session_factory, args.messages)
+
+        results = {
+            name: measure(session_factory, render, args.iterations)
+            for name, render in paths.items()
+        }
+        engine.dispose()
+
+    print(f"{'path':<8}{'p50 ms':>10}{'p95 ms':>10}{'pages/s':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<8}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+            f"{result['pages_per_second']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Search latency: FTS5 index vs LIKE scan
+
+Seeds a SQLite file with a synthetic corpus (Zipf-distributed vocabulary,
+spread over many sessions) and times the first page of results for rare,
+common and two-word queries, corpus-wide and inside one session. FTS runs
+the repository's ranked search; LIKE runs the equivalent
+content LIKE '%word%' query ordered by recency.
+
+    python -m benchmarks.bench_search --rows 2000000 --iterations 20
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.models.message import Message
+from app.repositories.message_repository import MESSAGE_ROW_COLUMNS, MessageRepository
+from app.utils.search_query import build_match_query
+
+VOCABULARY_SIZE = 20000
+WORDS_PER_MESSAGE = 12
+SESSION_SIZE = 200
+
+
+def vocabulary():
+    return [f"w{i}" for i in range(VOCABULARY_SIZE)]
+
+
+def seed(engine, rows):
+    words = vocabulary()
+    cum_weights = list(
+        itertools.accumulate(1 / (rank + 1) for rank in range(len(words)))
+    )
+    generator = random.Random(42)
+    started = datetime(2024, 1, 1)
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        for start in range(0, rows, 50000):
+            batch = []
+            for i in range(start, min(start + 50000, rows)):
+                batch.append(
+                    (
+                        f"msg_{i:09d}",
+                        f"session_{i // SESSION_SIZE:07d}",
+                        " ".join(generator.choices(
+                            words, cum_weights=cum_weights, k=WORDS_PER_MESSAGE
+                        )),
+                        started + timedelta(seconds=i),
+                        "user" if i % 2 else "system",
+                        "{}",
+                        started,
+                    )
+                )
+            cursor.executemany(
+                "INSERT INTO messages (message_id, session_id, content, timestamp, "
+                "sender, message_metadata, processed_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def like_rows(db, words, session_id, limit):
+    criteria = [Message.content.like(f"%{word}%") for word in words]
+    if session_id is not None:
+        criteria.append(Message.session_id == session_id)
+    return db.execute(
+        select(*MESSAGE_ROW_COLUMNS)
+        .where(and_(*criteria))
+        .order_by(Message.timestamp.desc())
+        .limit(limit)
+    ).all()
+
+
+def fts_rows(db, words, session_id, limit):
+    match_query = build_match_query(" ".join(words), session_id)
+    return MessageRepository(db).search_message_rows(
+        match_query, session_id, None, limit
+    )
+
+
+def measure(session_factory, search, words, session_id, limit, iterations):
+    timings = []
+    with session_factory() as db:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            search(db, words, session_id, limit)
+            timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    return statistics.median(timings) * 1000, timings[-1] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    # Word ranks: w2 is very common, w5000 appears in a few hundred messages
+    # per million, w20 + w300 combines a frequent and a medium term.
+    queries = {
+        "rare": ["w5000"],
+        "common": ["w2"],
+        "two words": ["w20", "w300"],
+    }
+    middle_session = f"session_{args.rows // SESSION_SIZE // 2:07d}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine, autoflush=False)
+
+        started = time.perf_counter()
+        seed(engine, args.rows)
+        print(f"seeded {args.rows} messages in {time.perf_counter() - started:.1f}s\n")
+
+        print(f"{'query':<12}{'scope':<10}{'path':<6}{'p50 ms':>10}{'max ms':>10}")
+        for name, words in queries.items():
+            for scope, session_id in (("all", None), ("session", middle_session)):
+                for path, search in (("fts", fts_rows), ("like", like_rows)):
+                    p50, worst = measure(
+                        session_factory,
+                        search,
+                        words,
+                        session_id,
+                        args.limit,
+                        args.iterations,
+                    )
+                    print(f"{name:<12}{scope:<10}{path:<6}{p50:>10.2f}{worst:>10.2f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Mixed read/write throughput of each SQLite storage profile
+
+For every profile in STORAGE_PROFILES a fresh database file is seeded and
+then hammered for a fixed time by writer threads (one commit per message)
+and reader threads (session history pages), all through MessageService.
+
+    python -m benchmarks.bench_storage_profiles --seconds 5 --writers 4 --readers 8
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import (
+    STORAGE_PROFILES,
+    Base,
+    configure_sqlite_engine,
+    get_storage_pragmas,
+)
+from app.repositories.message_repository import MessageRepository
+from app.schemas.message import MessageCreate, SenderType
+from app.services.message_service import MessageService
+from app.utils.exceptions import DatabaseError
+
+SESSIONS = 20
+
+
+def make_message(index, prefix="seed"):
+    return MessageCreate(
+        message_id=f"{prefix}_{index:08d}",
+        session_id=f"bench_session_{index % SESSIONS}",
+        content=f"benchmark message number {index}",
+        timestamp=datetime(2024, 1, 1) + timedelta(seconds=index),
+        sender=SenderType.USER if index % 2 else SenderType.SYSTEM,
+    )
+
+
+def run_profile(profile, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            connect_args={"check_same_thread": False},
+            pool_size=args.writers + args.readers,
+        )
+        configure_sqlite_engine(engine, get_storage_pragmas(profile))
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine, autoflush=False)
+
+        with session_factory() as db:
+            MessageRepository(db).create_messages_bulk(
+                [(make_message(i), {"processed": True}) for i in range(args.seed)]
+            )
+
+        counters = {"writes": 0, "reads": 0, "errors": 0}
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def count(name):
+            with lock:
+                counters[name] += 1
+
+        def writer(worker_id):
+            index = 0
+            with session_factory() as db:
+                service = MessageService(db)
+                while not stop.is_set():
+                    try:
+                        service.create_message(
+                            make_message(index, prefix=f"w{worker_id}")
+                        )
+                        count("writes")
+                    except DatabaseError:
+                        count("errors")
+                    index += 1
+
+        def reader(worker_id):
+            index = worker_id
+            while not stop.is_set():
+                with session_factory() as db:
+                    try:
+                        MessageService(db).get_messages_by_session(
+                            f"bench_session_{index % SESSIONS}", limit=20
+                        )
+                        count("reads")
+                    except Exception:
+                        count("errors")
+                index += 1
+
+        threads = [
+            threading.Thread(target=writer, args=(i,)) for i in range(args.writers)
+        ] + [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    return {name: value / args.seconds for name, value in counters.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=10000)
+    parser.add_argument("--profiles", nargs="*", default=list(STORAGE_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{'profile':<14}{'writes/s':>10}{'reads/s':>10}{'errors/s':>10}")
+    for profile in args.profiles:
+        result = run_profile(profile, args)
+        print(
+            f"{profile:<14}{result['writes']:>10.1f}{result['reads']:>10.1f}"
+            f"{result['errors']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
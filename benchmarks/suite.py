@@ -0,0 +1,431 @@
+"""
+Benchmark suite with machine-readable results and regression baselines
+
+Generates deterministic synthetic datasets in temporary SQLite files (many
+short sessions, one long session, multi-kilobyte contents, a large word
+list) and measures:
+
+  content_filter  analyze() throughput, default and large word lists
+  api             POST / GET latency percentiles through the ASGI app
+  pagination      deep pages of a long session, offset vs cursor
+
+Results are written as JSON; with --baseline, every metric is compared
+against a stored run and the exit code is 1 if any regressed by more than
+--tolerance (p99 latencies are reported but not compared). Everything runs
+in-process and offline.
+
+    python -m benchmarks.suite --output results.json --save-baseline baseline.json
+    python -m benchmarks.suite --baseline baseline.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import string
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+from app.models.database import create_schema, get_async_db
+from app.repositories.message_repository import MessageRepository
+from app.schemas.message import MessageCreate, SenderType
+from app.services.message_service import MessageService
+from app.utils.content_filter import ContentFilter, content_filter
+from app.utils.pagination import encode_cursor
+from app.utils.response_cache import response_cache
+
+# Dataset sizes per --scale; "small" is for quick local checks.
+SCALES = {
+    "small": {
+        "filter_messages": 2000,
+        "filter_large_messages": 50,
+        "word_list": 2000,
+        "api_sessions": 20,
+        "api_messages": 200,
+        "api_large_messages": 20,
+        "api_reads": 100,
+        "long_session": 5000,
+        "page_iterations": 50,
+    },
+    "default": {
+        "filter_messages": 20000,
+        "filter_large_messages": 500,
+        "word_list": 5000,
+        "api_sessions": 200,
+        "api_messages": 2000,
+        "api_large_messages": 200,
+        "api_reads": 1000,
+        "long_session": 50000,
+        "page_iterations": 200,
+    },
+}
+
+LARGE_CONTENT_SIZE = 16 * 1024
+PAGE_SIZE = 50
+
+VOCABULARY_SIZE = 5000
+
+
+class Dataset:
+    """Deterministic synthetic messages drawn from a fixed vocabulary"""
+
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        # Without the configured words, so API requests are never rejected.
+        banned = set(content_filter.inappropriate_words)
+        self.vocabulary = []
+        while len(self.vocabulary) < VOCABULARY_SIZE:
+            word = self._word()
+            if word not in banned:
+                self.vocabulary.append(word)
+
+    def _word(self):
+        length = self.random.randint(3, 10)
+        return "".join(self.random.choices(string.ascii_lowercase, k=length))
+
+    def text(self, size):
+        words = []
+        length = 0
+        while length < size:
+            word = self.random.choice(self.vocabulary)
+            words.append(word)
+            length += len(word) + 1
+        return " ".join(words)[:size].strip()
+
+    def word_list(self, count):
+        return self.random.sample(self.vocabulary, count)
+
+    def message(self, message_id, session_id, timestamp, size=80):
+        return MessageCreate(
+            message_id=message_id,
+            session_id=session_id,
+            content=self.text(size),
+            timestamp=timestamp,
+            sender=SenderType.USER if self.random.random() < 0.5 else SenderType.SYSTEM,
+        )
+
+
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile of an already sorted list.
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def latency_metrics(prefix, timings):
+    timings = sorted(timings)
+    return {
+        f"{prefix}.p50_ms": (percentile(timings, 0.50) * 1000, "ms", "lower"),
+        f"{prefix}.p95_ms": (percentile(timings, 0.95) * 1000, "ms", "lower"),
+        # Reported only: a few hundred samples make p99 too noisy to gate on.
+        f"{prefix}.p99_ms": (percentile(timings, 0.99) * 1000, "ms", None),
+    }
+
+
+def bench_content_filter(dataset, scale):
+    small = [dataset.text(80) for _ in range(scale["filter_messages"])]
+    large = [dataset.text(LARGE_CONTENT_SIZE) for _ in range(scale["filter_large_messages"])]
+    large_bytes = sum(len(content) for content in large)
+
+    def throughput(filter_, contents):
+        started = time.perf_counter()
+        for content in contents:
+            filter_.analyze(content)
+        return time.perf_counter() - started
+
+    default_filter = ContentFilter(content_filter.inappropriate_words)
+    large_list_filter = ContentFilter(dataset.word_list(scale["word_list"]))
+
+    return {
+        "content_filter.default_words.msgs_per_s": (
+            len(small) / throughput(default_filter, small),
+            "msg/s",
+            "higher",
+        ),
+        "content_filter.large_word_list.msgs_per_s": (
+            len(small) / throughput(large_list_filter, small),
+            "msg/s",
+            "higher",
+        ),
+        "content_filter.large_word_list.large_content_mb_per_s": (
+            large_bytes / throughput(large_list_filter, large) / 1e6,
+            "MB/s",
+            "higher",
+        ),
+    }
+
+
+async def _api_requests(dataset, scale, database_url):
+    async_engine = create_async_engine(
+        database_url.replace("sqlite:", "sqlite+aiosqlite:", 1), poolclass=NullPool
+    )
+    session_factory = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    start = datetime(2024, 1, 1)
+    sessions = [f"api_session_{i:05d}" for i in range(scale["api_sessions"])]
+    timings = {"create": [], "create_large": [], "read": []}
+
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+            async def post(message, bucket):
+                payload = message.model_dump(mode="json")
+                started = time.perf_counter()
+                response = await client.post("/api/messages/", json=payload)
+                timings[bucket].append(time.perf_counter() - started)
+                response.raise_for_status()
+
+            for i in range(scale["api_messages"]):
+                message = dataset.message(
+                    f"api_{i:07d}", sessions[i % len(sessions)], start + timedelta(seconds=i)
+                )
+                await post(message, "create")
+
+            for i in range(scale["api_large_messages"]):
+                message = dataset.message(
+                    f"api_large_{i:07d}",
+                    sessions[i % len(sessions)],
+                    start + timedelta(days=1, seconds=i),
+                    size=LARGE_CONTENT_SIZE,
+                )
+                await post(message, "create_large")
+
+            for i in range(scale["api_reads"]):
+                session_id = sessions[dataset.random.randrange(len(sessions))]
+                started = time.perf_counter()
+                response = await client.get(f"/api/messages/{session_id}?limit={PAGE_SIZE}")
+                timings["read"].append(time.perf_counter() - started)
+                response.raise_for_status()
+    finally:
+        app.dependency_overrides.clear()
+        await async_engine.dispose()
+
+    return timings
+
+
+def bench_api(dataset, scale, directory):
+    database_url = f"sqlite:///{os.path.join(directory, 'api.db')}"
+    engine = create_engine(database_url)
+    create_schema(engine)
+    engine.dispose()
+
+    # Reads measure the database path, not the in-process response cache.
+    cache_enabled = response_cache.enabled
+    response_cache.enabled = False
+    try:
+        timings = asyncio.run(_api_requests(dataset, scale, database_url))
+    finally:
+        response_cache.enabled = cache_enabled
+
+    metrics = {}
+    for name, values in timings.items():
+        metrics.update(latency_metrics(f"api.{name}", values))
+    return metrics
+
+
+def bench_pagination(dataset, scale, directory):
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'pagination.db')}")
+    create_schema(engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+
+    session_id = "long_session"
+    count = scale["long_session"]
+    start = datetime(2024, 1, 1)
+    metadata = {"processed": True, "processing_version": "1.0"}
+    messages = [
+        (dataset.message(f"long_{i:07d}", session_id, start + timedelta(seconds=i)), metadata)
+        for i in range(count)
+    ]
+    with session_factory() as db:
+        MessageRepository(db).create_messages_bulk(messages)
+
+    # Pages are newest first, so the deep page ends near the oldest message.
+    depth = count - PAGE_SIZE * 2
+    newest_on_page = messages[count - 1 - depth][0]
+    cursor = encode_cursor(newest_on_page.timestamp, f"{newest_on_page.message_id}~")
+
+    def measure(render):
+        timings = []
+        for _ in range(scale["page_iterations"]):
+            with session_factory() as db:
+                started = time.perf_counter()
+                render(MessageService(db))
+                timings.append(time.perf_counter() - started)
+        return timings
+
+    first = measure(
+        lambda service: service._render_messages_by_session(session_id, PAGE_SIZE, 0, None, None)
+    )
+    deep_offset = measure(
+        lambda service: service._render_messages_by_session(
+            session_id, PAGE_SIZE, depth, None, None
+        )
+    )
+    deep_cursor = measure(
+        lambda service: service._render_messages_by_session(
+            session_id, PAGE_SIZE, 0, None, cursor
+        )
+    )
+    engine.dispose()
+
+    metrics = {}
+    metrics.update(latency_metrics("pagination.first_page", first))
+    metrics.update(latency_metrics("pagination.deep_offset", deep_offset))
+    metrics.update(latency_metrics("pagination.deep_cursor", deep_cursor))
+    return metrics
+
+
+BENCHMARKS = {
+    "content_filter": lambda dataset, scale, directory: bench_content_filter(
+        dataset, scale
+    ),
+    "api": bench_api,
+    "pagination": bench_pagination,
+}
+
+
+def run(names, scale_name, seed):
+    scale = SCALES[scale_name]
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name in names:
+            # A fresh dataset per benchmark keeps each one reproducible alone.
+            metrics = BENCHMARKS[name](Dataset(seed), scale, directory)
+            results.update(
+                {
+                    metric: {"value": value, "unit": unit, "better": better}
+                    for metric, (value, unit, better) in metrics.items()
+                }
+            )
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "scale": scale_name,
+            "seed": seed,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Checks every baseline metric against the current run
+
+    Returns:
+        List[dict]: one row per metric with the relative change and whether
+            it regressed beyond the tolerance; metrics missing from either
+            run are skipped
+    """
+    rows = []
+    for metric, base in baseline["results"].items():
+        current = results["results"].get(metric)
+        if current is None or not base["value"] or base["better"] is None:
+            continue
+
+        change = current["value"] / base["value"] - 1
+        worse = change if base["better"] == "lower" else -change
+        rows.append(
+            {
+                "metric": metric,
+                "baseline": base["value"],
+                "current": current["value"],
+                "unit": current["unit"],
+                "change": change,
+                "regressed": worse > tolerance,
+            }
+        )
+    return rows
+
+
+def print_results(results):
+    print(f"{'metric':<56}{'value':>12}  unit")
+    for metric, result in results["results"].items():
+        print(f"{metric:<56}{result['value']:>12.3f}  {result['unit']}")
+
+
+def print_comparison(rows, tolerance):
+    print(f"\n{'metric':<56}{'baseline':>12}{'current':>12}{'change':>9}")
+    for row in rows:
+        flag = "  REGRESSED" if row["regressed"] else ""
+        print(
+            f"{row['metric']:<56}{row['baseline']:>12.3f}{row['current']:>12.3f}"
+            f"{row['change']:>+9.1%}{flag}"
+        )
+    regressed = sum(row["regressed"] for row in rows)
+    print(f"\n{regressed} of {len(rows)} metrics regressed by more than {tolerance:.0%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.suite",
+        description=__doc__.strip().splitlines()[0],
+    )
+    parser.add_argument(
+        "--only",
+        action="append",
+        choices=list(BENCHMARKS),
+        help="run only this benchmark (repeatable)",
+    )
+    parser.add_argument("--scale", choices=list(SCALES), default="default")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed relative regression per metric (default 0.2 = 20%%)",
+    )
+    parser.add_argument("--save-baseline", help="also write the results here")
+    args = parser.parse_args(argv)
+
+    results = run(args.only or list(BENCHMARKS), args.scale, args.seed)
+    print_results(results)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as output:
+                json.dump(results, output, indent=2)
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline["meta"].get("scale") != results["meta"]["scale"]:
+        print(
+            f"baseline was recorded with --scale {baseline['meta'].get('scale')}",
+            file=sys.stderr,
+        )
+        return 2
+
+    rows = compare(results, baseline, args.tolerance)
+    print_comparison(rows, args.tolerance)
+    return 1 if any(row["regressed"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,13 +3,16 @@ import pytest
 from datetime import datetime
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from fastapi.testclient import TestClient
 
 from app.main import app
-from app.models.database import Base, get_db
+from app.models.database import Base, get_db, get_async_db
 from app.schemas.message import MessageCreate, SenderType
+from app.utils.response_cache import response_cache
 
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -20,6 +23,17 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# NullPool: every TestClient runs its own event loop, so async connections
+# must not outlive a request.
+async_engine = create_async_engine(
+    "sqlite+aiosqlite:///./test.db",
+    connect_args={"check_same_thread": False},
+    poolclass=NullPool,
+)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
 
 def override_get_db():
     try:
@@ -29,6 +43,11 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
 @pytest.fixture(scope="session")
 def db_engine():
     Base.metadata.create_all(bind=engine)
@@ -50,11 +69,22 @@ def db_session(db_engine):
 
 
 @pytest.fixture
-def client(db_session):
-    app.dependency_overrides[get_db] = lambda: db_session
+def clean_db(db_engine):
+    yield db_engine
+
+    with db_engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+
+
+@pytest.fixture
+def client(clean_db):
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
+    response_cache.clear()
 
 
 @pytest.fixture
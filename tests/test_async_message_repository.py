@@ -0,0 +1,63 @@
+import pytest
+
+from app.repositories.async_message_repository import AsyncMessageRepository
+from app.services.async_message_service import AsyncMessageService
+from app.utils.exceptions import SessionNotFoundError
+from tests.conftest import TestingAsyncSessionLocal
+
+
+class TestAsyncMessageRepository:
+
+    metadata = {"word_count": 5, "character_count": 25, "processed": True}
+
+    @pytest.mark.asyncio
+    async def test_create_and_get_message(self, clean_db, sample_message_data):
+        async with TestingAsyncSessionLocal() as db:
+            repository = AsyncMessageRepository(db)
+
+            await repository.create_message(sample_message_data, self.metadata)
+            result = await repository.get_message_by_id(sample_message_data.message_id)
+
+            assert result.message_id == sample_message_data.message_id
+            assert result.content == sample_message_data.content
+            assert await repository.session_exists(sample_message_data.session_id)
+
+    @pytest.mark.asyncio
+    async def test_service_get_messages_by_session(
+        self, clean_db, multiple_messages_data
+    ):
+        async with TestingAsyncSessionLocal() as db:
+            service = AsyncMessageService(db)
+
+            await service.create_messages_batch(multiple_messages_data)
+            response = await service.get_messages_by_session(
+                multiple_messages_data[0].session_id, limit=2
+            )
+
+            assert response.data["total_count"] == 5
+            assert len(response.data["messages"]) == 2
+
+            with pytest.raises(SessionNotFoundError):
+                await service.get_messages_by_session("nonexistent_session")
+
+    @pytest.mark.asyncio
+    async def test_iter_messages_by_time_range_in_batches(
+        self, clean_db, multiple_messages_data
+    ):
+        async with TestingAsyncSessionLocal() as db:
+            repository = AsyncMessageRepository(db)
+            await repository.create_messages_bulk(
+                [(msg_data, self.metadata) for msg_data in multiple_messages_data]
+            )
+
+            batches = [
+                [row.message_id for row in rows]
+                async for rows in repository.iter_messages_by_time_range(
+                    start=multiple_messages_data[1].timestamp, batch_size=2
+                )
+            ]
+
+        assert batches == [
+            ["test_msg_002", "test_msg_003"],
+            ["test_msg_004", "test_msg_005"],
+        ]
@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy import text
+
+from app.config import settings
+from app.models.types import ZLIB_FLAG, decode_stored_text, encode_stored_text
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def compression(monkeypatch):
+    monkeypatch.setattr(settings, "compression_enabled", True)
+    monkeypatch.setattr(settings, "compression_min_size", 64)
+
+
+class TestCompressedTypes:
+
+    def test_round_trip_above_threshold(self, compression):
+        content = "línea de log repetida\n" * 50
+
+        stored = encode_stored_text(content)
+
+        assert stored[:1] == ZLIB_FLAG
+        assert len(stored) < len(content)
+        assert decode_stored_text(stored) == content
+
+    def test_small_incompressible_or_disabled_values_stay_text(
+        self, compression, monkeypatch
+    ):
+        assert encode_stored_text("corto") == "corto"
+        noise = "".join(chr(0x4E00 + (i * 7919) % 20000) for i in range(40))
+        assert encode_stored_text(noise) == noise
+
+        monkeypatch.setattr(settings, "compression_enabled", False)
+        assert encode_stored_text("x" * 1000) == "x" * 1000
+
+    def test_unknown_flag(self):
+        with pytest.raises(ValueError):
+            decode_stored_text(b"\x7fdata")
+
+    def test_large_message_is_compressed_at_rest(self, client, compression):
+        content = ("Traza de error en el servicio de pagos. " * 40).strip()
+        payload = {
+            "message_id": "large_msg",
+            "session_id": "large_session",
+            "content": content,
+            "timestamp": "2023-12-01T10:00:00",
+            "sender": "user",
+        }
+
+        assert client.post("/api/messages/", json=payload).status_code == 201
+
+        with TestingSessionLocal() as db:
+            stored = db.execute(
+                text("SELECT content FROM messages WHERE message_id = 'large_msg'")
+            ).scalar()
+        assert isinstance(stored, bytes)
+        assert stored[:1] == ZLIB_FLAG
+
+        response = client.get("/api/messages/message/large_msg")
+        assert response.json()["data"]["content"] == content
+
+        response = client.get("/api/messages/large_session")
+        message = response.json()["data"]["messages"][0]
+        assert message["content"] == content
+        assert message["metadata"]["character_count"] == len(content)
+
+        response = client.get("/api/messages/search", params={"q": "pagos"})
+        assert [m["message_id"] for m in response.json()["data"]["messages"]] == [
+            "large_msg"
+        ]
+
+    def test_search_index_keeps_no_copy_of_the_text(self, client, compression):
+        content = ("Traza de error en el servicio de pagos. " * 40).strip()
+        payload = {
+            "message_id": "large_msg",
+            "session_id": "large_session",
+            "content": content,
+            "timestamp": "2023-12-01T10:00:00",
+            "sender": "user",
+        }
+        assert client.post("/api/messages/", json=payload).status_code == 201
+
+        with TestingSessionLocal() as db:
+            indexed = db.execute(text("SELECT content FROM messages_fts")).all()
+            db.execute(text("DELETE FROM messages WHERE message_id = 'large_msg'"))
+            db.commit()
+
+        assert indexed == [(None,)]
+        response = client.get("/api/messages/search", params={"q": "pagos"})
+        assert response.json()["data"]["messages"] == []
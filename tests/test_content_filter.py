@@ -0,0 +1,88 @@
+import pytest
+
+from app.utils.content_filter import ContentFilter
+from app.utils.lru_cache import LRUCache
+
+
+WORDS = ["bad", "inappropriate", "prohibited", "censored"]
+
+
+class TestContentFilter:
+
+    @pytest.mark.parametrize("engine", ["trie", "regex"])
+    def test_check_content(self, engine):
+        content_filter = ContentFilter(WORDS, engine=engine)
+
+        assert content_filter.check_content("Hola, todo bien") == (True, [])
+        assert content_filter.check_content("CENSORED and Bad, badly bad") == (
+            False,
+            ["bad", "censored"],
+        )
+
+    @pytest.mark.parametrize("engine", ["trie", "regex"])
+    def test_filter_content(self, engine):
+        content_filter = ContentFilter(WORDS, engine=engine)
+
+        assert (
+            content_filter.filter_content("a Bad, prohibited badge", "***")
+            == "a ***, *** badge"
+        )
+
+    def test_analyze_single_scan_result(self):
+        content_filter = ContentFilter(WORDS)
+        content = "this is bad and bad"
+
+        analysis = content_filter.analyze(content)
+
+        assert analysis.is_appropriate is False
+        assert analysis.inappropriate_words == ["bad"]
+        assert analysis.spans == [(8, 11), (16, 19)]
+        assert analysis.metadata == {
+            "length": 19,
+            "word_count": 5,
+            "character_count": 19,
+            "has_inappropriate_content": True,
+            "inappropriate_words": ["bad"],
+        }
+        assert content_filter.mask(content, analysis.spans, "#") == "this is # and #"
+
+    def test_trie_engine_shared_prefixes(self):
+        words = ["ab", "abc", "a", "b", "x.y"]
+        content = "abd ab abc a b x.y xxy"
+
+        trie = ContentFilter(words, engine="trie").analyze(content)
+        regex = ContentFilter(words, engine="regex").analyze(content)
+
+        assert trie.spans == regex.spans
+        assert trie.inappropriate_words == regex.inappropriate_words
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            ContentFilter(WORDS, engine="unknown")
+
+    def test_cached_analysis(self):
+        cache = LRUCache(max_entries=10)
+        content_filter = ContentFilter(WORDS, cache=cache)
+
+        first = content_filter.analyze("respuesta automática del sistema")
+        second = content_filter.analyze("respuesta automática del sistema")
+
+        assert second is first
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_cache_key_includes_word_list_version(self):
+        cache = LRUCache(max_entries=10)
+
+        assert ContentFilter(WORDS, cache=cache).check_content("hola")[0] is True
+        assert ContentFilter(["hola"], cache=cache).check_content("hola")[0] is False
+        assert cache.stats()["hits"] == 0
+
+    def test_empty_word_list_falls_back_to_settings(self):
+        default = ContentFilter([])
+        content_filter = ContentFilter(["hola"])
+
+        content_filter.reload([])
+
+        assert content_filter.inappropriate_words == default.inappropriate_words
+        assert content_filter.version == default.version
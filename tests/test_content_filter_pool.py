@@ -0,0 +1,104 @@
+import asyncio
+
+from app.utils import content_filter_pool as content_filter_pool_module
+from app.utils.content_filter import ContentFilter
+from app.utils.content_filter import content_filter as shared_filter
+from app.utils.content_filter_pool import (
+    ContentFilterPool,
+    analyze_in_worker,
+    content_filter_pool,
+    init_worker,
+)
+
+
+class TestContentFilterPool:
+
+    def test_large_content_is_analyzed_in_workers(self, monkeypatch):
+        content_filter = ContentFilter(["foo"])
+        pool = ContentFilterPool(content_filter, workers=1, min_size=100)
+        large = "bar foo " * 20
+        expected = content_filter.analyze(large)
+
+        def inline_analyze(content):
+            raise AssertionError("large content analyzed in the API process")
+
+        # Workers build their own filter, so this only trips inline scans.
+        monkeypatch.setattr(content_filter, "analyze", inline_analyze)
+
+        async def run():
+            small = await pool.analyze("foo bar")
+            offloaded = await pool.analyze(large)
+            content_filter.reload(["bar"])
+            # The workers still have the old words: scan inline, don't wait.
+            pending = await pool.analyze(large)
+            return small, offloaded, pending
+
+        pool.start()
+        try:
+            small, offloaded, pending = asyncio.run(run())
+            # What DictionaryWatcher runs after a reload; waits for the
+            # refresh started by analyze() if that one is still going.
+            pool.refresh()
+            reloaded = asyncio.run(pool.analyze(large))
+        finally:
+            pool.stop()
+
+        assert small is None
+        assert offloaded.inappropriate_words == ["foo"]
+        assert offloaded.metadata == expected.metadata
+        assert pending is None
+        assert reloaded.inappropriate_words == ["bar"]
+        assert reloaded.version == content_filter.version
+
+    def test_workers_reuse_the_shared_filter(self, monkeypatch):
+        monkeypatch.setattr(content_filter_pool_module, "_worker_filter", None)
+
+        init_worker(shared_filter.inappropriate_words, shared_filter.engine)
+        assert content_filter_pool_module._worker_filter is shared_filter
+
+        init_worker(["foo"], shared_filter.engine)
+        assert content_filter_pool_module._worker_filter is not shared_filter
+        assert analyze_in_worker("foo").inappropriate_words == ["foo"]
+
+    def test_disabled_pool_leaves_everything_inline(self):
+        pool = ContentFilterPool(ContentFilter(["foo"]), workers=0, min_size=1)
+        pool.start()
+
+        assert not pool.is_running
+        assert asyncio.run(pool.analyze("foo " * 100)) is None
+
+    def test_api_offloads_large_messages(self, client, monkeypatch, sample_message_data):
+        monkeypatch.setattr(content_filter_pool, "workers", 1)
+        monkeypatch.setattr(content_filter_pool, "min_size", 64)
+        payload = sample_message_data.model_dump(mode="json")
+        large = "contenido largo " * 10 + "fin"
+
+        content_filter_pool.start()
+        try:
+            created = client.post("/api/messages/", json={**payload, "content": large})
+            rejected = client.post(
+                "/api/messages/",
+                json={**payload, "message_id": "large_bad", "content": large + " bad"},
+            )
+            batch = client.post(
+                "/api/messages/batch",
+                json={
+                    "messages": [
+                        {**payload, "message_id": "large_ok", "content": large},
+                        {
+                            **payload,
+                            "message_id": "large_censored",
+                            "content": large + " censored",
+                        },
+                        {**payload, "message_id": "small_ok", "content": "hola"},
+                    ]
+                },
+            ).json()["data"]
+        finally:
+            content_filter_pool.stop()
+
+        assert created.status_code == 201
+        assert created.json()["data"]["metadata"]["character_count"] == len(large)
+        assert rejected.status_code == 400
+        assert rejected.json()["error"]["code"] == "CONTENT_FILTER_ERROR"
+        assert [r["status"] for r in batch["results"]] == ["created", "rejected", "created"]
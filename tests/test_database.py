@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.models import database
+from app.models.database import (
+    build_async_engine,
+    configure_sqlite_engine,
+    create_async_tables,
+    get_pool_options,
+    get_storage_pragmas,
+)
+
+
+def _pragma(connection, name):
+    return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+
+class TestStorageProfiles:
+
+    def test_wal_profile_is_applied_to_new_connections(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'wal.db'}")
+        pragmas = get_storage_pragmas("wal", {"cache_size": -2000})
+        configure_sqlite_engine(engine, pragmas)
+
+        with engine.connect() as connection:
+            assert _pragma(connection, "journal_mode") == "wal"
+            assert _pragma(connection, "busy_timeout") == pragmas["busy_timeout"]
+            # synchronous=NORMAL, temp_store=MEMORY
+            assert _pragma(connection, "synchronous") == 1
+            assert _pragma(connection, "temp_store") == 2
+            assert _pragma(connection, "cache_size") == -2000
+        engine.dispose()
+
+    def test_default_profile_sets_nothing(self):
+        assert get_storage_pragmas("default") == {}
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError, match="unknown storage profile"):
+            get_storage_pragmas("fast")
+
+    @pytest.mark.parametrize(
+        "name", ["journal_mode; DROP TABLE messages", "Cache_Size", "x\n"]
+    )
+    def test_invalid_pragma_name(self, name):
+        with pytest.raises(ValueError, match="invalid SQLite pragma name"):
+            get_storage_pragmas("default", {name: 1})
+
+    @pytest.mark.parametrize(
+        "value", ["WAL; DROP TABLE messages", "1.5", "'x'", "WAL\n", True, ""]
+    )
+    def test_invalid_pragma_value(self, value):
+        with pytest.raises(ValueError, match="invalid value for SQLite pragma"):
+            get_storage_pragmas("default", {"journal_mode": value})
+
+    def test_pool_sizing_skipped_for_in_memory_databases(self):
+        assert get_pool_options("sqlite://") == {}
+        assert get_pool_options("sqlite:///:memory:") == {}
+        assert set(get_pool_options("sqlite:///./chat.db")) == {
+            "pool_size",
+            "max_overflow",
+            "pool_recycle",
+        }
+
+    def test_in_memory_async_database_is_shared_and_gets_the_schema(self, monkeypatch):
+        url = "sqlite+aiosqlite://"
+        engine = build_async_engine(url)
+        monkeypatch.setattr(database, "async_engine", engine)
+        monkeypatch.setattr(database, "async_database_url", url)
+
+        async def run():
+            await create_async_tables()
+            tables = []
+            # Each connection of a queue pool would open its own empty database.
+            async with engine.connect() as first, engine.connect() as second:
+                for connection in (first, second):
+                    result = await connection.execute(
+                        text("SELECT COUNT(*) FROM sqlite_master WHERE name = 'messages'")
+                    )
+                    tables.append(result.scalar())
+            await engine.dispose()
+            return tables
+
+        assert isinstance(engine.pool, StaticPool)
+        assert asyncio.run(run()) == [1, 1]
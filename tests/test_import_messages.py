@@ -0,0 +1,81 @@
+import io
+import json
+
+from app.models.session import ChatSession
+from app.repositories.message_repository import MessageRepository
+from app.tools.import_messages import MessageImporter, read_messages
+from tests.conftest import TestingSessionLocal
+
+
+def _line(message_id, content="Hola, mensaje importado", session_id="import_session"):
+    return json.dumps({
+        "message_id": message_id,
+        "session_id": session_id,
+        "content": content,
+        "timestamp": "2023-12-01T10:00:00",
+        "sender": "user",
+    })
+
+
+class TestImportMessages:
+
+    def test_read_messages_reports_invalid_lines(self):
+        lines = [_line("import_001"), "", "{not json", json.dumps({"message_id": "x"})]
+
+        parsed = list(read_messages(lines))
+
+        assert [line_number for line_number, _, _ in parsed] == [1, 3, 4]
+        assert parsed[0][1].message_id == "import_001"
+        assert parsed[1][2]["code"] == "INVALID_JSON"
+        assert parsed[2][2]["code"] == "MESSAGE_VALIDATION_ERROR"
+
+    def test_import_in_chunks(self, clean_db):
+        lines = [_line(f"import_{i:03d}") for i in range(5)]
+        lines += [_line("import_001"), _line("import_bad", content="esto es bad"), "{oops"]
+        report = io.StringIO()
+        progress = io.StringIO()
+
+        stats = MessageImporter(
+            TestingSessionLocal, chunk_size=2, report=report, progress=progress
+        ).run(lines)
+
+        assert stats == {
+            "rows": 8,
+            "created": 5,
+            "duplicates": 1,
+            "rejected": 1,
+            "invalid": 1,
+        }
+        entries = [json.loads(line) for line in report.getvalue().splitlines()]
+        assert sorted((entry["line"], entry["status"]) for entry in entries) == [
+            (6, "duplicate"),
+            (7, "rejected"),
+            (8, "invalid"),
+        ]
+        assert "rows/s" in progress.getvalue()
+
+        with TestingSessionLocal() as db:
+            summary = db.get(ChatSession, "import_session")
+            assert summary.message_count == 5
+            assert MessageRepository(db).message_exists("import_004")
+
+    def test_import_skip_duplicates(self, clean_db):
+        lines = [_line("import_001"), _line("import_001")]
+        report = io.StringIO()
+
+        stats = MessageImporter(
+            TestingSessionLocal, skip_duplicates=True, report=report
+        ).run(lines)
+
+        assert stats["created"] == 1
+        assert stats["duplicates"] == 1
+        assert report.getvalue() == ""
+
+    def test_import_with_worker_processes(self, clean_db):
+        lines = [_line(f"import_{i:03d}") for i in range(4)]
+        lines.append(_line("import_bad", content="esto es bad"))
+
+        stats = MessageImporter(TestingSessionLocal, chunk_size=3, workers=2).run(lines)
+
+        assert stats["created"] == 4
+        assert stats["rejected"] == 1
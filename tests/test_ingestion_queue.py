@@ -0,0 +1,131 @@
+from collections import OrderedDict
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.models.session import ChatSession
+from app.models.database import get_async_db, get_db
+from app.services.ingestion_queue import IngestionQueue, ingestion_queue
+from app.utils.content_filter import content_filter
+from app.utils.exceptions import IngestionQueueFullError
+from app.utils.response_cache import response_cache
+from tests.conftest import (
+    TestingAsyncSessionLocal,
+    TestingSessionLocal,
+    override_get_async_db,
+    override_get_db,
+)
+
+
+@pytest.fixture
+def async_client(clean_db, monkeypatch):
+    monkeypatch.setattr(settings, "ingestion_mode", "async")
+    monkeypatch.setattr(ingestion_queue, "session_factory", TestingAsyncSessionLocal)
+    monkeypatch.setattr(ingestion_queue, "_statuses", OrderedDict())
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+    response_cache.clear()
+
+
+def _payload(sample_message_data):
+    payload = sample_message_data.model_dump()
+    payload["timestamp"] = sample_message_data.timestamp.isoformat()
+    return payload
+
+
+def _wait_for_status(client, message_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        data = client.get(f"/api/messages/message/{message_id}/status").json()["data"]
+        if data["status"] != "queued" or time.monotonic() > deadline:
+            return data
+        time.sleep(0.01)
+
+
+class TestIngestionQueue:
+
+    def test_post_returns_accepted_and_is_written(
+        self, async_client, sample_message_data
+    ):
+        response = async_client.post("/api/messages/", json=_payload(sample_message_data))
+
+        assert response.status_code == 202
+        assert response.json() == {
+            "status": "accepted",
+            "data": {"message_id": sample_message_data.message_id, "status": "queued"},
+        }
+
+        status = _wait_for_status(async_client, sample_message_data.message_id)
+        assert status["status"] == "created"
+
+        response = async_client.get(
+            f"/api/messages/message/{sample_message_data.message_id}"
+        )
+        assert response.status_code == 200
+        assert response.json()["data"]["content"] == sample_message_data.content
+
+    def test_queued_duplicate_and_filtered_content_are_rejected(
+        self, async_client, sample_message_data
+    ):
+        payload = _payload(sample_message_data)
+
+        assert async_client.post("/api/messages/", json=payload).status_code == 202
+        _wait_for_status(async_client, sample_message_data.message_id)
+        assert async_client.post("/api/messages/", json=payload).status_code == 422
+
+        payload["message_id"] = "filtered_msg"
+        payload["content"] = f"this is {content_filter.inappropriate_words[0]}"
+        response = async_client.post("/api/messages/", json=payload)
+        assert response.status_code == 400
+        assert response.json()["error"]["code"] == "CONTENT_FILTER_ERROR"
+
+    def test_status_of_unknown_message(self, async_client):
+        response = async_client.get("/api/messages/message/missing/status")
+
+        assert response.status_code == 404
+
+    def test_status_in_sync_mode(self, client, sample_message_data):
+        client.post("/api/messages/", json=_payload(sample_message_data))
+
+        response = client.get(
+            f"/api/messages/message/{sample_message_data.message_id}/status"
+        )
+
+        assert response.status_code == 200
+        assert response.json()["data"]["status"] == "created"
+
+    @pytest.mark.asyncio
+    async def test_stop_drains_queue_in_one_batch(
+        self, clean_db, multiple_messages_data
+    ):
+        queue = IngestionQueue(
+            TestingAsyncSessionLocal,
+            max_size=len(multiple_messages_data),
+            batch_size=100,
+            flush_interval=60,
+            status_max_entries=100,
+        )
+        queue.start()
+
+        for message_data in multiple_messages_data:
+            queue.put(message_data, content_filter.analyze(message_data.content))
+        with pytest.raises(IngestionQueueFullError):
+            queue.put(
+                multiple_messages_data[0].model_copy(update={"message_id": "overflow"}),
+                None,
+            )
+
+        await queue.stop()
+
+        assert not queue.is_running
+        for message_data in multiple_messages_data:
+            assert queue.get_status(message_data.message_id)["status"] == "created"
+        with TestingSessionLocal() as db:
+            summary = db.get(ChatSession, multiple_messages_data[0].session_id)
+            assert summary.message_count == len(multiple_messages_data)
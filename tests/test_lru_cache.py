@@ -0,0 +1,69 @@
+from app.utils.lru_cache import LRUCache
+
+
+class TestLRUCache:
+
+    def test_get_counts_hits_and_misses(self):
+        cache = LRUCache(max_entries=2)
+
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_evicts_least_recently_used_entry(self):
+        cache = LRUCache(max_entries=2)
+
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_byte_limit(self):
+        cache = LRUCache(max_entries=10, max_bytes=100)
+
+        cache.set("a", 1, size=60)
+        cache.set("b", 2, size=60)
+        cache.set("too_big", 3, size=101)
+
+        assert len(cache) == 1
+        assert cache.get("a") is None
+        assert cache.get("too_big") is None
+        assert cache.stats()["bytes"] == 60
+
+    def test_delete_and_clear(self):
+        cache = LRUCache(max_entries=10, max_bytes=100)
+
+        cache.set("a", 1, size=10)
+        cache.set("b", 2, size=10)
+        cache.delete("a")
+
+        assert cache.get("a") is None
+        assert cache.stats()["bytes"] == 10
+
+        cache.clear()
+
+        assert len(cache) == 0
+        assert cache.stats()["bytes"] == 0
+
+    def test_entries_expire_after_max_age(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr("app.utils.lru_cache.time.monotonic", lambda: now[0])
+        cache = LRUCache(max_entries=10, max_bytes=100, max_age=5)
+
+        cache.set("a", 1, size=10)
+        now[0] += 4.9
+        assert cache.get("a") == 1
+
+        now[0] += 0.1
+        assert cache.get("a") is None
+        assert cache.stats()["entries"] == 0
+        assert cache.stats()["bytes"] == 0
+        assert cache.stats()["misses"] == 1
@@ -1,5 +1,14 @@
+import json
+
 from fastapi.testclient import TestClient
 
+from app.config import settings
+from app.repositories.message_repository import MessageRepository
+from app.schemas.message import SenderType
+from app.services.message_service import MessageService
+from app.utils.content_filter import content_filter
+from tests.conftest import TestingSessionLocal
+
 
 class TestMessageController:
 
@@ -26,6 +35,10 @@ class TestMessageController:
         assert "metadata" in reponse_data["data"]
         assert reponse_data["data"]["metadata"]["word_count"] == 7
         assert reponse_data["data"]["metadata"]["has_inappropriate_content"] is False
+        assert (
+            reponse_data["data"]["metadata"]["dictionary_version"]
+            == content_filter.version
+        )
 
     def test_create_message_duplicate_id(self, client: TestClient, sample_message_data):
         client.post(
@@ -53,6 +66,53 @@ class TestMessageController:
         assert response.status_code == 422
         response_data = response.json()
         assert response_data["error"]["code"] == "MESSAGE_VALIDATION_ERROR"
+        assert response_data["error"]["details"] == {
+            "message_id": sample_message_data.message_id
+        }
+
+    def test_create_message_duplicate_id_with_inappropriate_content(
+        self, client: TestClient, sample_message_data
+    ):
+        payload = {
+            "message_id": sample_message_data.message_id,
+            "session_id": sample_message_data.session_id,
+            "content": sample_message_data.content,
+            "timestamp": sample_message_data.timestamp.isoformat(),
+            "sender": sample_message_data.sender.value,
+        }
+        client.post("/api/messages/", json=payload)
+
+        response = client.post(
+            "/api/messages/", json={**payload, "content": "censored content"}
+        )
+
+        assert response.status_code == 422
+        response_data = response.json()
+        assert response_data["error"]["code"] == "MESSAGE_VALIDATION_ERROR"
+        assert response_data["error"]["details"] == {
+            "message_id": sample_message_data.message_id
+        }
+
+    def test_create_message_idempotent_mode(
+        self, client: TestClient, sample_message_data, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "idempotent_create", True)
+        payload = {
+            "message_id": sample_message_data.message_id,
+            "session_id": sample_message_data.session_id,
+            "content": sample_message_data.content,
+            "timestamp": sample_message_data.timestamp.isoformat(),
+            "sender": sample_message_data.sender.value,
+        }
+
+        first = client.post("/api/messages/", json=payload)
+        retry = client.post("/api/messages/", json={**payload, "content": "Reintento"})
+
+        assert retry.status_code == 201
+        assert retry.json() == first.json()
+
+        response = client.get(f"/api/sessions/{sample_message_data.session_id}")
+        assert response.json()["data"]["message_count"] == 1
 
     def test_create_message_inappropriate_content(
         self, client: TestClient, sample_inappropriate_message_data
@@ -205,3 +265,383 @@ class TestMessageController:
         assert response.status_code == 404
         response_data = response.json()
         assert response_data["error"]["code"] == "MESSAGE_NOT_FOUND"
+
+    def test_create_messages_batch(
+        self, client: TestClient, sample_message_data, multiple_messages_data
+    ):
+        client.post(
+            "/api/messages/",
+            json={
+                "message_id": sample_message_data.message_id,
+                "session_id": sample_message_data.session_id,
+                "content": sample_message_data.content,
+                "timestamp": sample_message_data.timestamp.isoformat(),
+                "sender": sample_message_data.sender.value,
+            },
+        )
+
+        batch = [
+            {
+                "message_id": msg_data.message_id,
+                "session_id": msg_data.session_id,
+                "content": msg_data.content,
+                "timestamp": msg_data.timestamp.isoformat(),
+                "sender": msg_data.sender.value,
+            }
+            for msg_data in multiple_messages_data
+        ]
+        batch.append(dict(batch[1]))
+        batch.append(
+            {
+                "message_id": "test_msg_bad",
+                "session_id": "test_session_003",
+                "content": "this is bad",
+                "timestamp": sample_message_data.timestamp.isoformat(),
+                "sender": "user",
+            }
+        )
+
+        response = client.post("/api/messages/batch", json={"messages": batch})
+
+        assert response.status_code == 200
+        response_data = response.json()["data"]
+        assert response_data["created"] == 4
+        assert response_data["duplicates"] == 2
+        assert response_data["rejected"] == 1
+        statuses = [result["status"] for result in response_data["results"]]
+        assert statuses == ["duplicate"] + ["created"] * 4 + ["duplicate", "rejected"]
+        assert response_data["results"][-1]["error"]["code"] == "CONTENT_FILTER_ERROR"
+
+        response = client.get("/api/messages/test_session_003")
+        assert response.json()["data"]["total_count"] == 4
+
+    def test_create_messages_batch_races_single_insert(
+        self, client: TestClient, monkeypatch, multiple_messages_data
+    ):
+        batch = [msg_data.model_dump(mode="json") for msg_data in multiple_messages_data]
+        assert client.post("/api/messages/", json=batch[2]).status_code == 201
+        # The single POST lands between the batch's existence check and insert.
+        monkeypatch.setattr(
+            MessageRepository, "get_existing_message_ids", lambda self, ids: set()
+        )
+
+        response = client.post("/api/messages/batch", json={"messages": batch})
+
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert (data["created"], data["duplicates"]) == (4, 1)
+        assert [r["status"] for r in data["results"]] == [
+            "created",
+            "created",
+            "duplicate",
+            "created",
+            "created",
+        ]
+        response = client.get("/api/messages/test_session_003")
+        assert response.json()["data"]["total_count"] == 5
+
+    def test_create_messages_batch_empty(self, client: TestClient):
+        response = client.post("/api/messages/batch", json={"messages": []})
+
+        assert response.status_code == 422
+
+    def test_get_messages_by_session_with_cursor(
+        self, client: TestClient, multiple_messages_data
+    ):
+        for msg_data in multiple_messages_data:
+            client.post(
+                "/api/messages/",
+                json={
+                    "message_id": msg_data.message_id,
+                    "session_id": msg_data.session_id,
+                    "content": msg_data.content,
+                    "timestamp": msg_data.timestamp.isoformat(),
+                    "sender": msg_data.sender.value,
+                },
+            )
+
+        session_id = multiple_messages_data[0].session_id
+        seen_ids = []
+        before = None
+
+        while True:
+            url = f"/api/messages/{session_id}?limit=2"
+            if before:
+                url += f"&before={before}"
+            response = client.get(url)
+
+            assert response.status_code == 200
+            response_data = response.json()["data"]
+            seen_ids.extend(msg["message_id"] for msg in response_data["messages"])
+            before = response_data["next_cursor"]
+            if not response_data["has_more"]:
+                assert before is None
+                break
+
+        assert seen_ids == [
+            msg_data.message_id for msg_data in reversed(multiple_messages_data)
+        ]
+
+    def test_get_messages_by_session_invalid_cursor(
+        self, client: TestClient, sample_message_data
+    ):
+        response = client.get(
+            f"/api/messages/{sample_message_data.session_id}?before=not-a-cursor"
+        )
+
+        assert response.status_code == 422
+        assert response.json()["error"]["code"] == "MESSAGE_VALIDATION_ERROR"
+
+    def test_get_session_summary(self, client: TestClient, multiple_messages_data):
+        for msg_data in multiple_messages_data:
+            client.post(
+                "/api/messages/",
+                json={
+                    "message_id": msg_data.message_id,
+                    "session_id": msg_data.session_id,
+                    "content": msg_data.content,
+                    "timestamp": msg_data.timestamp.isoformat(),
+                    "sender": msg_data.sender.value,
+                },
+            )
+
+        response = client.get(f"/api/sessions/{multiple_messages_data[0].session_id}")
+
+        assert response.status_code == 200
+        response_data = response.json()["data"]
+        assert response_data["message_count"] == 5
+        assert response_data["user_message_count"] == 2
+        assert response_data["system_message_count"] == 3
+        assert response_data["last_message_id"] == multiple_messages_data[-1].message_id
+
+    def test_get_session_summary_not_found(self, client: TestClient):
+        response = client.get("/api/sessions/nonexistent_session")
+
+        assert response.status_code == 404
+        assert response.json()["error"]["code"] == "SESSION_NOT_FOUND"
+
+    def test_get_messages_by_session_etag(
+        self, client: TestClient, sample_message_data, sample_system_message_data
+    ):
+        client.post(
+            "/api/messages/",
+            json={
+                "message_id": sample_message_data.message_id,
+                "session_id": sample_message_data.session_id,
+                "content": sample_message_data.content,
+                "timestamp": sample_message_data.timestamp.isoformat(),
+                "sender": sample_message_data.sender.value,
+            },
+        )
+        url = f"/api/messages/{sample_message_data.session_id}"
+
+        response = client.get(url)
+        etag = response.headers["etag"]
+
+        assert response.status_code == 200
+        assert client.get(url).headers["etag"] == etag
+
+        response = client.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+
+        client.post(
+            "/api/messages/",
+            json={
+                "message_id": sample_system_message_data.message_id,
+                "session_id": sample_system_message_data.session_id,
+                "content": sample_system_message_data.content,
+                "timestamp": sample_system_message_data.timestamp.isoformat(),
+                "sender": sample_system_message_data.sender.value,
+            },
+        )
+
+        response = client.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json()["data"]["total_count"] == 2
+
+    def test_get_message_by_id_etag(self, client: TestClient, sample_message_data):
+        client.post(
+            "/api/messages/",
+            json={
+                "message_id": sample_message_data.message_id,
+                "session_id": sample_message_data.session_id,
+                "content": sample_message_data.content,
+                "timestamp": sample_message_data.timestamp.isoformat(),
+                "sender": sample_message_data.sender.value,
+            },
+        )
+        url = f"/api/messages/message/{sample_message_data.message_id}"
+
+        etag = client.get(url).headers["etag"]
+        response = client.get(url, headers={"If-None-Match": f'W/{etag}, "other"'})
+
+        assert response.status_code == 304
+
+    def test_get_messages_by_session_matches_orm_serialization(
+        self, client: TestClient, multiple_messages_data
+    ):
+        for msg_data in multiple_messages_data:
+            client.post(
+                "/api/messages/",
+                json={
+                    "message_id": msg_data.message_id,
+                    "session_id": msg_data.session_id,
+                    "content": msg_data.content,
+                    "timestamp": msg_data.timestamp.isoformat(),
+                    "sender": msg_data.sender.value,
+                },
+            )
+        session_id = multiple_messages_data[0].session_id
+
+        response = client.get(f"/api/messages/{session_id}?limit=3&sender=system")
+
+        with TestingSessionLocal() as db:
+            expected = MessageService(db).get_messages_by_session(
+                session_id, limit=3, sender=SenderType.SYSTEM
+            )
+        assert response.json() == expected.model_dump(mode="json")
+
+    def test_export_session(self, client: TestClient, multiple_messages_data):
+        for msg_data in reversed(multiple_messages_data):
+            client.post(
+                "/api/messages/",
+                json={
+                    "message_id": msg_data.message_id,
+                    "session_id": msg_data.session_id,
+                    "content": msg_data.content,
+                    "timestamp": msg_data.timestamp.isoformat(),
+                    "sender": msg_data.sender.value,
+                },
+            )
+
+        response = client.get(
+            f"/api/messages/{multiple_messages_data[0].session_id}/export"
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["message_id"] for line in lines] == [
+            msg_data.message_id for msg_data in multiple_messages_data
+        ]
+        assert lines[0]["metadata"]["processed"] is True
+
+    def test_export_session_not_found(self, client: TestClient):
+        response = client.get("/api/messages/nonexistent_session/export")
+
+        assert response.status_code == 404
+        assert response.json()["error"]["code"] == "SESSION_NOT_FOUND"
+
+    def test_search_messages(
+        self, client: TestClient, sample_message_data, multiple_messages_data
+    ):
+        for msg_data in [sample_message_data, *multiple_messages_data]:
+            client.post(
+                "/api/messages/",
+                json={
+                    "message_id": msg_data.message_id,
+                    "session_id": msg_data.session_id,
+                    "content": msg_data.content,
+                    "timestamp": msg_data.timestamp.isoformat(),
+                    "sender": msg_data.sender.value,
+                },
+            )
+        session_id = multiple_messages_data[0].session_id
+
+        response = client.get("/api/messages/search", params={"q": "numero"})
+
+        assert response.status_code == 200
+        data = response.json()["data"]
+        # test_msg_001 is taken by sample_message_data, "Hola, este es un mensaje..."
+        assert len(data["messages"]) == 4
+        assert data["has_more"] is False
+        assert all("score" in message for message in data["messages"])
+
+        response = client.get("/api/messages/search", params={"q": "mensaje"})
+        assert len(response.json()["data"]["messages"]) == 5
+
+        response = client.get(
+            "/api/messages/search",
+            params={"q": "mensaje", "session_id": session_id, "sender": "system"},
+        )
+        assert sorted(m["message_id"] for m in response.json()["data"]["messages"]) == [
+            "test_msg_003",
+            "test_msg_005",
+        ]
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"q": "mens*", "limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            data = client.get("/api/messages/search", params=params).json()["data"]
+            seen.extend(message["message_id"] for message in data["messages"])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        assert len(seen) == 5
+        assert len(set(seen)) == 5
+
+    def test_search_messages_invalid_input(self, client: TestClient):
+        response = client.get("/api/messages/search", params={"q": "?!"})
+        assert response.status_code == 422
+
+        response = client.get(
+            "/api/messages/search", params={"q": "hola", "session_id": "missing"}
+        )
+        assert response.status_code == 404
+
+        response = client.get(
+            "/api/messages/search", params={"q": "hola", "cursor": "@@"}
+        )
+        assert response.status_code == 422
+
+    def test_get_messages_by_time_range(
+        self, client: TestClient, sample_message_data, multiple_messages_data
+    ):
+        for msg_data in [sample_message_data, *multiple_messages_data]:
+            client.post(
+                "/api/messages/",
+                json={
+                    "message_id": msg_data.message_id,
+                    "session_id": msg_data.session_id,
+                    "content": msg_data.content,
+                    "timestamp": msg_data.timestamp.isoformat(),
+                    "sender": msg_data.sender.value,
+                },
+            )
+
+        response = client.get(
+            "/api/messages",
+            params={"from": "2023-12-01T10:01:00", "to": "2023-12-01T10:05:00"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["message_id"] for line in lines] == [
+            "test_msg_002",
+            "test_msg_003",
+            "test_msg_004",
+        ]
+
+        response = client.get(
+            "/api/messages",
+            params={"from": "2023-12-01T10:00:00Z", "sender": "user", "limit": 2},
+        )
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["message_id"] for line in lines] == ["test_msg_001", "test_msg_002"]
+
+    def test_get_messages_by_time_range_invalid(self, client: TestClient):
+        response = client.get(
+            "/api/messages",
+            params={"from": "2023-12-02T00:00:00", "to": "2023-12-01T00:00:00"},
+        )
+
+        assert response.status_code == 422
+        assert response.json()["error"]["code"] == "MESSAGE_VALIDATION_ERROR"
@@ -1,4 +1,11 @@
+import json
 from datetime import datetime
+
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.models.message import Message
 from app.repositories.message_repository import MessageRepository
 from app.schemas.message import MessageCreate, SenderType
 
@@ -96,6 +103,112 @@ class TestMessageRepository:
         assert all(msg.sender == "system" for msg in messages2)
         assert total_count2 == 3
 
+    def test_create_messages_bulk(self, db_session, multiple_messages_data):
+        repository = MessageRepository(db_session)
+
+        created = repository.create_messages_bulk(
+            [(msg_data, self.metadata) for msg_data in multiple_messages_data]
+        )
+
+        assert sorted(created) == [msg.message_id for msg in multiple_messages_data]
+        assert (
+            repository.get_session_message_count(multiple_messages_data[0].session_id)
+            == 5
+        )
+
+    def test_create_messages_bulk_skips_stored_ids(
+        self, db_session, multiple_messages_data
+    ):
+        repository = MessageRepository(db_session)
+        repository.create_message(multiple_messages_data[1], self.metadata)
+
+        created = repository.create_messages_bulk(
+            [(msg_data, self.metadata) for msg_data in multiple_messages_data]
+        )
+
+        assert sorted(created) == [
+            msg.message_id for i, msg in enumerate(multiple_messages_data) if i != 1
+        ]
+        assert (
+            repository.get_session_message_count(multiple_messages_data[0].session_id)
+            == 5
+        )
+
+    def test_get_existing_message_ids(self, db_session, multiple_messages_data):
+        repository = MessageRepository(db_session)
+
+        repository.create_messages_bulk(
+            [(msg_data, self.metadata) for msg_data in multiple_messages_data[:2]]
+        )
+
+        existing = repository.get_existing_message_ids(
+            [msg_data.message_id for msg_data in multiple_messages_data]
+        )
+
+        assert existing == {msg.message_id for msg in multiple_messages_data[:2]}
+
+    def test_get_messages_by_session_with_cursor(
+        self, db_session, multiple_messages_data
+    ):
+        repository = MessageRepository(db_session)
+
+        for msg_data in multiple_messages_data:
+            repository.create_message(msg_data, self.metadata)
+
+        last = multiple_messages_data[2]
+        messages, total_count = repository.get_messages_by_session(
+            last.session_id, limit=10, before=(last.timestamp, last.message_id)
+        )
+
+        assert total_count == 5
+        assert [msg.message_id for msg in messages] == [
+            multiple_messages_data[1].message_id,
+            multiple_messages_data[0].message_id,
+        ]
+
+    def test_get_message_rows_by_session(self, db_session, multiple_messages_data):
+        repository = MessageRepository(db_session)
+
+        for msg_data in multiple_messages_data:
+            repository.create_message(msg_data, self.metadata)
+
+        rows, total_count = repository.get_message_rows_by_session(
+            multiple_messages_data[0].session_id, limit=2, sender=SenderType.USER
+        )
+
+        assert total_count == 2
+        assert [row.message_id for row in rows] == ["test_msg_004", "test_msg_002"]
+        assert json.loads(rows[0].metadata) == self.metadata
+
+    def test_create_message_duplicate_returns_none(
+        self, db_session, sample_message_data
+    ):
+        repository = MessageRepository(db_session)
+
+        repository.create_message(sample_message_data, self.metadata)
+        duplicate = sample_message_data.model_copy(update={"content": "otro"})
+
+        assert repository.create_message(duplicate, self.metadata) is None
+        assert repository.get_message_by_id(duplicate.message_id).content == (
+            sample_message_data.content
+        )
+        assert repository.get_session_message_count(duplicate.session_id) == 1
+
+    def test_create_message_is_single_insert(self, db_session, sample_message_data):
+        repository = MessageRepository(db_session)
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+
+        try:
+            result = repository.create_message(sample_message_data, self.metadata)
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+
+        assert result.processed_at is not None
+        assert [statement.split()[0] for statement in statements] == ["INSERT", "INSERT"]
+        assert "RETURNING" in statements[0]
+
     def test_message_exists_true(self, db_session, sample_message_data):
         repository = MessageRepository(db_session)
 
@@ -132,6 +245,49 @@ class TestMessageRepository:
 
         assert count == 5
 
+    def test_session_summary_tracks_creates(self, db_session, multiple_messages_data):
+        repository = MessageRepository(db_session)
+
+        repository.create_message(multiple_messages_data[2], self.metadata)
+        repository.create_messages_bulk(
+            [
+                (msg_data, self.metadata)
+                for msg_data in multiple_messages_data
+                if msg_data is not multiple_messages_data[2]
+            ]
+        )
+
+        summary = repository.get_session_summary(multiple_messages_data[0].session_id)
+
+        assert summary.message_count == 5
+        assert summary.user_message_count == 2
+        assert summary.system_message_count == 3
+        assert summary.first_timestamp == multiple_messages_data[0].timestamp
+        assert summary.last_timestamp == multiple_messages_data[-1].timestamp
+        assert summary.last_message_id == multiple_messages_data[-1].message_id
+
+    def test_delete_message_updates_session_summary(
+        self, db_session, multiple_messages_data
+    ):
+        repository = MessageRepository(db_session)
+        session_id = multiple_messages_data[0].session_id
+
+        for msg_data in multiple_messages_data:
+            repository.create_message(msg_data, self.metadata)
+
+        assert repository.delete_message(multiple_messages_data[-1].message_id) is True
+        assert repository.delete_message("nonexistent_id") is False
+
+        summary = repository.get_session_summary(session_id)
+        assert summary.message_count == 4
+        assert summary.system_message_count == 2
+        assert summary.last_message_id == multiple_messages_data[-2].message_id
+
+        for msg_data in multiple_messages_data[:-1]:
+            repository.delete_message(msg_data.message_id)
+
+        assert repository.session_exists(session_id) is False
+
     def test_messages_ordered_by_timestamp_desc(self, db_session):
         repository = MessageRepository(db_session)
 
@@ -170,3 +326,73 @@ class TestMessageRepository:
         assert messages[1].timestamp > messages[2].timestamp
         assert messages[0].message_id == "msg_003"
         assert messages[2].message_id == "msg_001"
+
+    def test_search_index_follows_deletes(self, db_session, multiple_messages_data):
+        repository = MessageRepository(db_session)
+        for msg_data in multiple_messages_data:
+            repository.create_message(msg_data, self.metadata)
+
+        rows = repository.search_message_rows('"mensaje"')
+        assert len(rows) == 5
+        assert rows[0].score <= rows[-1].score
+
+        repository.delete_message("test_msg_002")
+
+        rows = repository.search_message_rows('"mensaje"')
+        assert "test_msg_002" not in [row.message_id for row in rows]
+        assert len(rows) == 4
+
+    def test_search_index_follows_content_updates(self, db_session, sample_message_data):
+        repository = MessageRepository(db_session)
+        repository.create_message(sample_message_data, self.metadata)
+
+        db_session.execute(
+            text("UPDATE messages SET content = 'texto nuevo' WHERE message_id = :id"),
+            {"id": sample_message_data.message_id},
+        )
+
+        assert repository.search_message_rows('"mensaje"') == []
+        assert [row.message_id for row in repository.search_message_rows('"nuevo"')] == [
+            sample_message_data.message_id
+        ]
+
+    def test_legacy_search_index_is_replaced(self, tmp_path, sample_message_data):
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            connection.execute(text("DROP TABLE messages_fts"))
+            connection.execute(
+                text(
+                    "CREATE VIRTUAL TABLE messages_fts USING fts5("
+                    "content, session_id, message_id UNINDEXED)"
+                )
+            )
+        with sessionmaker(bind=engine)() as db:
+            MessageRepository(db).create_message(sample_message_data, self.metadata)
+            db.commit()
+
+        Base.metadata.create_all(bind=engine)
+
+        with sessionmaker(bind=engine)() as db:
+            definition = db.execute(
+                text("SELECT sql FROM sqlite_master WHERE name = 'messages_fts'")
+            ).scalar()
+            rows = MessageRepository(db).search_message_rows('"mensaje"')
+        engine.dispose()
+
+        assert "message_id" not in definition
+        assert [row.message_id for row in rows] == [sample_message_data.message_id]
+
+    def test_time_range_query_uses_timestamp_index(self, db_session):
+        repository = MessageRepository(db_session)
+        statement = str(
+            select(Message.message_id)
+            .where(Message.timestamp >= datetime(2023, 12, 1))
+            .order_by(Message.timestamp, Message.message_id)
+            .compile(compile_kwargs={"literal_binds": True})
+        )
+
+        plan = db_session.execute(text(f"EXPLAIN QUERY PLAN {statement}")).all()
+
+        assert "ix_messages_timestamp" in " ".join(row[-1] for row in plan)
+        assert repository.get_message_rows_by_time_range(datetime(2023, 12, 1)) == []
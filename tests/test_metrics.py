@@ -0,0 +1,112 @@
+from app.utils import metrics
+from app.utils.lru_cache import LRUCache
+from app.utils.metrics import (
+    FILTER_REJECTIONS,
+    MESSAGE_DUPLICATES,
+    MESSAGES_CREATED,
+    STAGE_LATENCY,
+    MetricsRegistry,
+)
+from app.utils.response_cache import response_cache
+
+
+class TestMetricsRegistry:
+
+    def test_counter(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("events_total", "Events", ("kind",))
+
+        counter.inc("a")
+        counter.inc("a", amount=2)
+        counter.inc('quo"te')
+
+        text = registry.render().decode()
+        assert "# HELP events_total Events\n# TYPE events_total counter\n" in text
+        assert 'events_total{kind="a"} 3\n' in text
+        assert 'events_total{kind="quo\\"te"} 1\n' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+        for value in (0.05, 0.5, 0.7, 3.0):
+            histogram.observe(value)
+
+        lines = registry.render().decode().splitlines()
+        assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{le="1.0"} 3' in lines
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+        assert "latency_seconds_sum 4.25" in lines
+        assert "latency_seconds_count 4" in lines
+
+    def test_timer_and_gauge(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("stage_seconds", "Stages", ("stage",))
+        registry.gauge("depth", "Depth", lambda: {("q",): 7}, ("queue",))
+
+        with histogram.time("parse"):
+            pass
+
+        assert histogram.count("parse") == 1
+        assert 'depth{queue="q"} 7' in registry.render().decode()
+
+    def test_disabled_registry_records_nothing(self):
+        registry = MetricsRegistry(enabled=False)
+        counter = registry.counter("events_total", "Events")
+        histogram = registry.histogram("latency_seconds", "Latency")
+
+        counter.inc()
+        histogram.observe(0.1)
+
+        assert counter.value() == 0
+        assert histogram.count() == 0
+
+
+class TestMetricsEndpoint:
+
+    def test_message_creation_is_instrumented(self, client, sample_message_data):
+        created = MESSAGES_CREATED.value()
+        duplicates = MESSAGE_DUPLICATES.value()
+        rejected = FILTER_REJECTIONS.value("bad")
+        inserts = STAGE_LATENCY.count("insert")
+
+        payload = sample_message_data.model_dump(mode="json")
+        assert client.post("/api/messages/", json=payload).status_code == 201
+        assert client.post("/api/messages/", json=payload).status_code == 422
+        bad = {**payload, "message_id": "bad_msg", "content": "bad words"}
+        assert client.post("/api/messages/", json=bad).status_code == 400
+
+        assert MESSAGES_CREATED.value() == created + 1
+        assert MESSAGE_DUPLICATES.value() == duplicates + 1
+        assert FILTER_REJECTIONS.value("bad") == rejected + 1
+        assert STAGE_LATENCY.count("insert") == inserts + 2
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        for stage in ("validation", "content_filter", "insert", "commit", "serialization"):
+            assert f'message_stage_duration_seconds_count{{stage="{stage}"}}' in response.text
+        assert (
+            'http_request_duration_seconds_count{method="POST",'
+            'route="/api/messages/",status="201"}'
+        ) in response.text
+        assert 'db_pool_connections{engine="sync",state="idle"}' in response.text
+        assert "ingestion_queue_depth 0" in response.text
+
+    def test_cache_stats_are_exposed(self, client, monkeypatch, sample_message_data):
+        filter_cache = LRUCache(max_entries=10)
+        filter_cache.get("missing")
+        monkeypatch.setitem(metrics._caches, "content_filter", filter_cache)
+        hits = response_cache.stats()["hits"]
+
+        payload = sample_message_data.model_dump(mode="json")
+        client.post("/api/messages/", json=payload)
+        for _ in range(2):
+            client.get(f"/api/messages/message/{sample_message_data.message_id}")
+
+        text = client.get("/metrics").text
+
+        assert f'cache_hits{{cache="response"}} {hits + 1}' in text
+        assert 'cache_misses{cache="content_filter"} 1' in text
+        assert 'cache_evictions{cache="response"}' in text
@@ -0,0 +1,94 @@
+import json
+import logging
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+import app.main  # noqa: F401  (registers the engine event hooks)
+from app.config import settings
+
+
+class TestProfilingMiddleware:
+
+    def _enable(self, monkeypatch, tmp_path, **overrides):
+        monkeypatch.setattr(settings, "profiling_header_enabled", True)
+        monkeypatch.setattr(settings, "profiling_dir", str(tmp_path))
+        for name, value in overrides.items():
+            monkeypatch.setattr(settings, name, value)
+
+    def test_profiled_request_reports_queries(
+        self, client, monkeypatch, tmp_path, sample_message_data
+    ):
+        self._enable(monkeypatch, tmp_path)
+        payload = sample_message_data.model_dump(mode="json")
+        client.post("/api/messages/", json=payload)
+
+        response = client.get(
+            f"/api/messages/{sample_message_data.session_id}",
+            headers={"X-Profile": "1"},
+        )
+
+        assert response.status_code == 200
+        # Session summary and page, read through the async session.
+        assert int(response.headers["X-DB-Queries"]) >= 2
+        assert float(response.headers["X-DB-Time-ms"]) > 0
+
+        reports = list(tmp_path.glob("*.json"))
+        assert len(reports) == 1
+        report = json.loads(reports[0].read_text())
+        assert report["id"] == response.headers["X-Profile-Id"]
+        assert report["status"] == 200
+        assert report["db_queries"] == int(response.headers["X-DB-Queries"])
+        assert any("FROM messages" in query["statement"] for query in report["queries"])
+        assert not list(tmp_path.glob("*.prof"))
+
+    def test_cpu_profile(self, client, monkeypatch, tmp_path):
+        self._enable(monkeypatch, tmp_path)
+
+        response = client.get("/api/messages/missing", headers={"X-Profile": "cpu"})
+
+        assert response.status_code == 404
+        assert [path.suffix for path in tmp_path.iterdir()].count(".prof") == 1
+
+    def test_header_ignored_unless_enabled(self, client, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "profiling_dir", str(tmp_path))
+
+        response = client.get("/api/messages/missing", headers={"X-Profile": "1"})
+
+        assert "X-DB-Queries" not in response.headers
+        assert list(tmp_path.iterdir()) == []
+
+    def test_sampling(self, client, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "profiling_dir", str(tmp_path))
+        monkeypatch.setattr(settings, "profiling_sample_rate", 1.0)
+
+        response = client.get("/api/messages/missing")
+
+        assert "X-DB-Queries" in response.headers
+
+    def test_slow_query_log(self, client, monkeypatch, caplog):
+        monkeypatch.setattr(settings, "slow_query_threshold_ms", 0.0)
+
+        with caplog.at_level(logging.WARNING, logger="app.utils.profiling"):
+            client.get("/api/messages/missing")
+
+        assert any("slow query" in record.message for record in caplog.records)
+
+    @pytest.mark.parametrize("threshold", [None, 0.0])
+    def test_database_errors_pass_through(self, monkeypatch, threshold):
+        monkeypatch.setattr(settings, "slow_query_threshold_ms", threshold)
+        engine = create_engine("sqlite://")
+
+        with engine.connect() as connection:
+            with pytest.raises(exc.OperationalError, match="no such table"):
+                connection.execute(text("SELECT * FROM missing"))
+            connection.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+            connection.execute(text("INSERT INTO t VALUES (1)"))
+            with pytest.raises(exc.IntegrityError):
+                connection.execute(text("INSERT INTO t VALUES (1)"))
+
+            # The failed statements' timers are gone; later ones still pair up.
+            assert not connection.info.get("query_start_time")
+            connection.execute(text("SELECT 1"))
+            assert not connection.info.get("query_start_time")
+        engine.dispose()
@@ -0,0 +1,37 @@
+from sqlalchemy import create_engine, text
+
+from app.models.database import create_schema
+from app.services.message_service import MessageService
+from app.tools.explain_queries import QueryPlanChecker, main
+
+
+class TestQueryPlans:
+
+    def test_every_repository_query_uses_its_index(self, db_session, multiple_messages_data):
+        service = MessageService(db_session)
+        for message in multiple_messages_data:
+            service.create_message(message)
+
+        results = QueryPlanChecker(db_session.connection()).run()
+
+        assert {result["case"] for result in results} >= {
+            "session_bounds",
+            "get_message_rows_by_session.sender.cursor",
+            "time_range.from.to.sender.after",
+            "search.session.all.first",
+        }
+        assert [result for result in results if not result["ok"]] == []
+
+    def test_missing_index_fails(self, tmp_path, capsys):
+        url = f"sqlite:///{tmp_path / 'plans.db'}"
+        engine = create_engine(url)
+        create_schema(engine)
+        with engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_messages_session_sender_timestamp"))
+        engine.dispose()
+
+        assert main(["--database-url", url]) == 1
+
+        output = capsys.readouterr().out
+        assert "FAIL  get_message_rows_by_session.sender.offset" in output
+        assert "expected index not used: ix_messages_session_sender_timestamp" in output
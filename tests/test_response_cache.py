@@ -0,0 +1,63 @@
+from app.utils.response_cache import ResponseCache, make_cached_response
+
+
+class TestResponseCache:
+
+    def test_session_page_hit_until_invalidated(self):
+        cache = ResponseCache(max_entries=10, max_bytes=1024)
+        cached = make_cached_response(b'{"status":"success"}')
+        generation = cache.session_generation("session_1")
+
+        cache.set_session_page("session_1", generation, (10, 0), cached)
+
+        assert cache.get_session_page("session_1", generation, (10, 0)) == cached
+
+        cache.invalidate_session("session_1")
+        generation = cache.session_generation("session_1")
+
+        assert cache.get_session_page("session_1", generation, (10, 0)) is None
+
+    def test_page_read_during_write_is_not_stored(self):
+        cache = ResponseCache(max_entries=10, max_bytes=1024)
+        generation = cache.session_generation("session_1")
+
+        cache.invalidate_session("session_1")
+        cache.set_session_page(
+            "session_1", generation, (10, 0), make_cached_response(b"stale")
+        )
+
+        assert len(cache._cache) == 0
+
+    def test_evicted_session_generations_do_not_resurrect_pages(self):
+        cache = ResponseCache(max_entries=10, max_bytes=1024, max_tracked_sessions=1)
+        generation = cache.session_generation("session_1")
+        cache.set_session_page(
+            "session_1", generation, (10, 0), make_cached_response(b"old")
+        )
+
+        cache.invalidate_session("session_1")
+        cache.invalidate_session("session_2")
+
+        generation = cache.session_generation("session_1")
+        assert cache.get_session_page("session_1", generation, (10, 0)) is None
+
+    def test_disabled_cache(self):
+        cache = ResponseCache(max_entries=0, max_bytes=1024)
+
+        cache.set_message("msg_1", make_cached_response(b"{}"))
+
+        assert cache.get_message("msg_1") is None
+
+    def test_pages_expire_after_max_age(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr("app.utils.lru_cache.time.monotonic", lambda: now[0])
+        cache = ResponseCache(max_entries=10, max_bytes=1024, max_age=5)
+        generation = cache.session_generation("session_1")
+        cached = make_cached_response(b"{}")
+
+        # Written by another process: nothing invalidates the page here.
+        cache.set_session_page("session_1", generation, (10, 0), cached)
+        assert cache.get_session_page("session_1", generation, (10, 0)) == cached
+
+        now[0] += 5
+        assert cache.get_session_page("session_1", generation, (10, 0)) is None
@@ -0,0 +1,115 @@
+import json
+import os
+from datetime import datetime
+
+from app.config import settings
+from app.models.archive import ArchiveSegment
+from app.models.message import Message
+from app.models.session import ChatSession
+from app.repositories.message_repository import MessageRepository
+from app.schemas.message import MessageCreate, SenderType
+from app.services.retention_service import RetentionService
+from tests.conftest import TestingSessionLocal
+
+
+class TestRetentionService:
+
+    metadata = {"word_count": 2, "character_count": 16, "processed": True}
+
+    def _seed(self, messages):
+        with TestingSessionLocal() as db:
+            MessageRepository(db).create_messages_bulk(
+                [(message_data, self.metadata) for message_data in messages]
+            )
+
+    def _recent_message(self):
+        return MessageCreate(
+            message_id="recent_msg",
+            session_id="test_session_003",
+            content="Mensaje reciente",
+            timestamp=datetime.now(),
+            sender=SenderType.USER,
+        )
+
+    def test_archive_older_than(self, clean_db, tmp_path, multiple_messages_data):
+        self._seed([*multiple_messages_data, self._recent_message()])
+
+        with TestingSessionLocal() as db:
+            stats = RetentionService(db, str(tmp_path)).archive_older_than(
+                30, batch_size=2, pause=0
+            )
+
+            assert stats["archived"] == 5
+            assert stats["batches"] == 3
+            assert [message.message_id for message in db.query(Message).all()] == [
+                "recent_msg"
+            ]
+            summary = db.get(ChatSession, "test_session_003")
+            assert summary.message_count == 1
+            assert summary.first_timestamp == summary.last_timestamp
+
+            segments = db.query(ArchiveSegment).order_by(ArchiveSegment.id).all()
+            assert [segment.path for segment in segments] == ["2023/12/01.ndjson.gz"] * 3
+            assert [segment.offset for segment in segments] == [
+                0,
+                segments[0].length,
+                segments[0].length + segments[1].length,
+            ]
+
+            lines = b"".join(
+                RetentionService(db, str(tmp_path)).archived_session_lines(
+                    "test_session_003"
+                )
+            ).splitlines()
+
+        archived = [json.loads(line) for line in lines]
+        assert [message["message_id"] for message in archived] == [
+            message_data.message_id for message_data in multiple_messages_data
+        ]
+        assert archived[0]["metadata"] == self.metadata
+
+    def test_unindexed_bytes_are_overwritten(
+        self, clean_db, tmp_path, multiple_messages_data
+    ):
+        self._seed(multiple_messages_data[:2])
+        with TestingSessionLocal() as db:
+            RetentionService(db, str(tmp_path)).archive_older_than(30, pause=0)
+
+        path = tmp_path / "2023" / "12" / "01.ndjson.gz"
+        indexed_size = os.path.getsize(path)
+        with open(path, "ab") as archive_file:
+            archive_file.write(b"partial member from a failed batch")
+
+        self._seed(multiple_messages_data[2:])
+        with TestingSessionLocal() as db:
+            RetentionService(db, str(tmp_path)).archive_older_than(30, pause=0)
+            segments = db.query(ArchiveSegment).order_by(ArchiveSegment.id).all()
+            lines = b"".join(
+                RetentionService(db, str(tmp_path)).archived_session_lines(
+                    "test_session_003"
+                )
+            ).splitlines()
+
+        assert segments[1].offset == indexed_size
+        assert os.path.getsize(path) == indexed_size + segments[1].length
+        assert len(lines) == len(multiple_messages_data)
+
+    def test_get_archived_session(
+        self, client, tmp_path, monkeypatch, multiple_messages_data
+    ):
+        monkeypatch.setattr(settings, "archive_dir", str(tmp_path))
+        self._seed(multiple_messages_data)
+        with TestingSessionLocal() as db:
+            RetentionService(db).archive_older_than(30, pause=0)
+
+        response = client.get("/api/messages/test_session_003/archive")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert len(response.text.splitlines()) == len(multiple_messages_data)
+
+        response = client.get("/api/messages/test_session_003")
+        assert response.status_code == 404
+
+        response = client.get("/api/messages/unknown_session/archive")
+        assert response.status_code == 404
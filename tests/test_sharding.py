@@ -0,0 +1,252 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.models.database import create_schema
+from app.models.message import Message
+from app.models.message_location import MessageLocation
+from app.models.session import ChatSession
+from app.models.sharding import RoutedSession, ShardRouter, shard_for_session
+from app.repositories.async_message_repository import AsyncMessageRepository
+from app.repositories.message_repository import MessageRepository
+from app.schemas.message import MessageCreate, SenderType
+from app.tools.rebalance_shards import ShardRebalancer, main as rebalance_main
+from app.utils.search_query import build_match_query
+
+METADATA = {"word_count": 2, "character_count": 10, "processed": True}
+
+
+def _database_url(tmp_path, name):
+    return f"sqlite:///{tmp_path / name}.db"
+
+
+def _engine(url):
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    create_schema(engine)
+    return engine
+
+
+def _session_factory(tmp_path, shard_count):
+    router = ShardRouter(
+        _engine(_database_url(tmp_path, f"shard{n}")) for n in range(shard_count)
+    )
+    return sessionmaker(
+        class_=RoutedSession,
+        router=router,
+        autoflush=False,
+        bind=_engine(_database_url(tmp_path, "catalog")),
+    )
+
+
+def _message(i, session_id=None, content=None):
+    return MessageCreate(
+        message_id=f"msg_{i:03d}",
+        session_id=session_id or f"session_{i % 6}",
+        content=content or f"Mensaje número {i}",
+        timestamp=datetime(2023, 12, 1, 10, i % 60, i // 60),
+        sender=SenderType.USER if i % 2 == 0 else SenderType.SYSTEM,
+    )
+
+
+def _stored_ids(engine):
+    with engine.connect() as connection:
+        return set(connection.scalars(select(Message.message_id)))
+
+
+@pytest.fixture
+def sharded(tmp_path):
+    session_factory = _session_factory(tmp_path, 3)
+    with session_factory() as db:
+        MessageRepository(db).create_messages_bulk(
+            [(_message(i), METADATA) for i in range(30)]
+        )
+    return session_factory
+
+
+class TestShardRouting:
+
+    def test_shard_for_session_is_stable(self):
+        assert shard_for_session("test_session_001", 8) == shard_for_session(
+            "test_session_001", 8
+        )
+        assert {shard_for_session(f"session_{i}", 4) for i in range(50)} == {0, 1, 2, 3}
+
+    def test_messages_are_stored_on_the_session_shard(self, sharded):
+        router = sharded.kw["router"]
+
+        for shard_id, engine in enumerate(router.engines):
+            assert _stored_ids(engine) == {
+                f"msg_{i:03d}"
+                for i in range(30)
+                if router.shard_for(f"session_{i % 6}") == shard_id
+            }
+        assert _stored_ids(sharded.kw["bind"]) == set()
+
+        with sharded() as db:
+            assert db.scalar(
+                select(MessageLocation.session_id).where(
+                    MessageLocation.message_id == "msg_007"
+                )
+            ) == "session_1"
+
+    def test_create_and_read_by_id(self, sharded):
+        with sharded() as db:
+            repository = MessageRepository(db)
+            created = repository.create_message(_message(100, "new_session"), METADATA)
+
+            assert created.message_id == "msg_100"
+            assert repository.get_message_by_id("msg_100").content == "Mensaje número 100"
+            assert repository.get_message_row_by_id("msg_100").session_id == "new_session"
+            assert repository.get_message_by_id("missing") is None
+            assert repository.get_session_summary("new_session").message_count == 1
+
+    def test_duplicate_id_in_another_session_is_rejected(self, sharded):
+        with sharded() as db:
+            repository = MessageRepository(db)
+
+            assert repository.create_message(_message(7, "other_session"), METADATA) is None
+            assert repository.message_exists("msg_007")
+            assert repository.get_existing_message_ids(["msg_007", "nope"]) == {"msg_007"}
+            assert repository.session_exists("other_session") is False
+
+    def test_session_page_and_summary(self, sharded):
+        with sharded() as db:
+            messages, total = MessageRepository(db).get_messages_by_session(
+                "session_2", limit=3
+            )
+
+            assert total == 5
+            assert [message.message_id for message in messages] == [
+                "msg_026",
+                "msg_020",
+                "msg_014",
+            ]
+
+    def test_time_range_merges_shards(self, sharded):
+        with sharded() as db:
+            rows = MessageRepository(db).get_message_rows_by_time_range(
+                start=datetime(2023, 12, 1, 10, 5), limit=10
+            )
+
+        assert [row.message_id for row in rows] == [f"msg_{i:03d}" for i in range(5, 15)]
+
+    def test_search_across_shards(self, sharded):
+        with sharded() as db:
+            repository = MessageRepository(db)
+            rows = repository.search_message_rows(build_match_query("mensaje"), limit=50)
+            in_session = repository.search_message_rows(
+                build_match_query("mensaje", "session_4"), session_id="session_4"
+            )
+
+        assert len(rows) == 30
+        assert [(row.score, row.message_id) for row in rows] == sorted(
+            (row.score, row.message_id) for row in rows
+        )
+        assert {row.session_id for row in in_session} == {"session_4"}
+
+    def test_delete_message(self, sharded):
+        with sharded() as db:
+            repository = MessageRepository(db)
+
+            assert repository.delete_message("msg_012") is True
+            assert repository.get_message_by_id("msg_012") is None
+            assert repository.message_exists("msg_012") is False
+            assert repository.get_session_message_count("session_0") == 4
+            assert repository.delete_message("msg_012") is False
+
+    def test_async_session(self, sharded, tmp_path):
+        router = ShardRouter(
+            create_async_engine(
+                _database_url(tmp_path, f"shard{n}").replace("sqlite:", "sqlite+aiosqlite:"),
+                poolclass=NullPool,
+            ).sync_engine
+            for n in range(3)
+        )
+        session_factory = async_sessionmaker(
+            bind=create_async_engine(
+                "sqlite+aiosqlite:///" + str(tmp_path / "catalog.db"), poolclass=NullPool
+            ),
+            sync_session_class=RoutedSession,
+            router=router,
+            expire_on_commit=False,
+        )
+
+        async def run():
+            async with session_factory() as db:
+                repository = AsyncMessageRepository(db)
+                await repository.create_message(_message(200, "async_session"), METADATA)
+                message = await repository.get_message_by_id("msg_200")
+                exported = [
+                    row.message_id
+                    async for partition in repository.stream_session_messages("session_3")
+                    for row in partition
+                ]
+                return message.session_id, exported
+
+        session_id, exported = asyncio.run(run())
+
+        assert session_id == "async_session"
+        assert exported == ["msg_003", "msg_009", "msg_015", "msg_021", "msg_027"]
+
+
+class TestRebalanceShards:
+
+    def test_rebalance_to_more_shards(self, sharded, tmp_path):
+        old_router = sharded.kw["router"]
+        grown = _session_factory(tmp_path, 5)
+        new_router = grown.kw["router"]
+
+        stats = ShardRebalancer(
+            sharded.kw["bind"], old_router.engines, new_router.engines
+        ).run()
+
+        moved = [
+            f"session_{i}"
+            for i in range(6)
+            if shard_for_session(f"session_{i}", 3) != shard_for_session(f"session_{i}", 5)
+        ]
+        assert stats["sessions"] == 6
+        assert stats["moved_sessions"] == len(moved)
+        assert stats["moved_messages"] == 5 * len(moved)
+
+        with grown() as db:
+            repository = MessageRepository(db)
+            for i in range(30):
+                assert repository.get_message_by_id(f"msg_{i:03d}") is not None
+            for i in range(6):
+                assert repository.get_session_message_count(f"session_{i}") == 5
+
+        assert sum(len(_stored_ids(engine)) for engine in new_router.engines) == 30
+
+    def test_split_single_database(self, tmp_path, capsys):
+        single = _engine(_database_url(tmp_path, "single"))
+        with sessionmaker(bind=single)() as db:
+            MessageRepository(db).create_messages_bulk(
+                [(_message(i), METADATA) for i in range(12)]
+            )
+
+        targets = [_database_url(tmp_path, f"new{n}") for n in range(2)]
+        argv = ["--catalog-url", _database_url(tmp_path, "single"), "--from"]
+        argv += [_database_url(tmp_path, "single")]
+        for url in targets:
+            argv += ["--to", url]
+
+        assert rebalance_main([*argv, "--dry-run"]) == 0
+        assert '"moved_messages": 12' in capsys.readouterr().out
+        assert len(_stored_ids(single)) == 12
+
+        assert rebalance_main(argv) == 0
+        assert _stored_ids(single) == set()
+        with single.connect() as connection:
+            location = connection.scalar(
+                select(MessageLocation.session_id).where(
+                    MessageLocation.message_id == "msg_005"
+                )
+            )
+            assert location == "session_5"
+            assert connection.scalars(select(ChatSession.session_id)).all() == []
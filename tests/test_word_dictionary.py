@@ -0,0 +1,57 @@
+import os
+
+from app.utils.content_filter import ContentFilter
+from app.utils.word_dictionary import DictionaryWatcher, load_word_list
+
+
+class TestWordDictionary:
+
+    def test_load_text_word_list(self, tmp_path):
+        path = tmp_path / "words.txt"
+        path.write_text("# banned words\nbad\n\n  spam  \n", encoding="utf-8")
+
+        assert load_word_list(str(path)) == ["bad", "spam"]
+
+    def test_load_json_word_list(self, tmp_path):
+        path = tmp_path / "words.json"
+        path.write_text('["bad", " spam ", ""]', encoding="utf-8")
+
+        assert load_word_list(str(path)) == ["bad", "spam"]
+
+    def test_watcher_swaps_dictionary_on_change(self, tmp_path):
+        path = tmp_path / "words.txt"
+        path.write_text("bad\n", encoding="utf-8")
+        content_filter = ContentFilter(load_word_list(str(path)))
+        reloaded = []
+        watcher = DictionaryWatcher(
+            content_filter,
+            str(path),
+            interval=60,
+            on_reload=lambda: reloaded.append(content_filter.version),
+        )
+        old_version = content_filter.version
+
+        assert watcher.check() is False
+
+        path.write_text("bad\nspam\n", encoding="utf-8")
+        os.utime(path, ns=(0, 1_000_000_000))
+
+        assert watcher.check() is True
+        assert content_filter.version != old_version
+        assert reloaded == [content_filter.version]
+        analysis = content_filter.analyze("no spam please")
+        assert analysis.inappropriate_words == ["spam"]
+        assert analysis.version == content_filter.version
+
+    def test_watcher_keeps_dictionary_when_file_is_invalid(self, tmp_path):
+        path = tmp_path / "words.json"
+        path.write_text('["bad"]', encoding="utf-8")
+        content_filter = ContentFilter(load_word_list(str(path)))
+        watcher = DictionaryWatcher(content_filter, str(path), interval=60)
+        version = content_filter.version
+
+        path.write_text("{not json", encoding="utf-8")
+        os.utime(path, ns=(0, 1_000_000_000))
+
+        assert watcher.check() is False
+        assert content_filter.version == version
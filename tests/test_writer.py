@@ -0,0 +1,171 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services import writer
+from app.services.message_service import MessageService
+from app.services.writer import WriteServer, WriterClient, writer_client
+from app.utils.response_cache import ResponseCache, make_cached_response
+from tests.conftest import TestingAsyncSessionLocal
+
+
+@pytest.fixture
+def writer_server(clean_db, tmp_path, monkeypatch):
+    path = str(tmp_path / "writer.sock")
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    # The API runs in this same process, so the writer's invalidations
+    # already reach its cache; nothing needs to be broadcast back.
+    server = WriteServer(
+        path, TestingAsyncSessionLocal, 100, 0.001, cache=ResponseCache(0, 0)
+    )
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result()
+    monkeypatch.setattr(writer_client, "path", path)
+
+    yield server
+
+    asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+class TestWriteServer:
+
+    def test_concurrent_requests_share_a_transaction(
+        self, clean_db, tmp_path, monkeypatch, multiple_messages_data
+    ):
+        transactions = []
+        ingest_messages = MessageService.ingest_messages
+
+        def counting_ingest(self, messages, analyses=None):
+            transactions.append(len(messages))
+            return ingest_messages(self, messages, analyses)
+
+        monkeypatch.setattr(MessageService, "ingest_messages", counting_ingest)
+
+        path = str(tmp_path / "writer.sock")
+        cache = ResponseCache(10, 10000)
+        generation = cache.session_generation("test_session_003")
+        first = multiple_messages_data[:3]
+        second = multiple_messages_data[2:]
+        second[-1] = second[-1].model_copy(update={"content": "bad words"})
+
+        async def run():
+            server = WriteServer(path, TestingAsyncSessionLocal, 100, 0.05)
+            await server.start()
+            client = WriterClient(path, 5, cache=cache)
+            try:
+                return await asyncio.gather(
+                    client.ingest(first, MessageService.analyze_messages(first)),
+                    client.ingest(second, MessageService.analyze_messages(second)),
+                )
+            finally:
+                await client.close()
+                await server.stop()
+
+        first_outcome, second_outcome = asyncio.run(run())
+
+        assert transactions == [6]
+        assert first_outcome["created"] == 3
+        assert [r["status"] for r in second_outcome["results"]] == [
+            "duplicate",
+            "created",
+            "rejected",
+        ]
+        assert second_outcome["results"][2]["error"]["code"] == "CONTENT_FILTER_ERROR"
+        # Invalidations made by the writer reach the client's cache.
+        assert cache.session_generation("test_session_003") != generation
+
+
+    def test_subscribed_client_follows_the_writer(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(writer, "RECONNECT_INTERVAL", 0.01)
+        path = str(tmp_path / "writer.sock")
+        cache = ResponseCache(10, 10000)
+
+        async def wait_for(condition):
+            for _ in range(200):
+                if condition():
+                    return True
+                await asyncio.sleep(0.01)
+            return False
+
+        async def run():
+            server_cache = ResponseCache(0, 0)
+            server = WriteServer(
+                path, TestingAsyncSessionLocal, 100, 0.001, cache=server_cache
+            )
+            await server.start()
+            client = WriterClient(path, 5, cache=cache)
+            # A worker that never writes still gets the invalidations.
+            await client.subscribe()
+            await wait_for(lambda: server._streams)
+            generation = cache.session_generation("read_only")
+            server_cache.invalidate_session("read_only")
+            invalidated = await wait_for(
+                lambda: cache.session_generation("read_only") != generation
+            )
+
+            # Invalidations sent while disconnected are lost: clear everything.
+            cache.set_message("cached", make_cached_response(b"{}"))
+            await server.stop()
+            cleared = await wait_for(lambda: cache.get_message("cached") is None)
+
+            server = WriteServer(
+                path, TestingAsyncSessionLocal, 100, 0.001, cache=server_cache
+            )
+            await server.start()
+            reconnected = await wait_for(lambda: server._streams)
+            generation = cache.session_generation("read_only")
+            server_cache.invalidate_session("read_only")
+            invalidated_again = await wait_for(
+                lambda: cache.session_generation("read_only") != generation
+            )
+
+            await client.close()
+            await server.stop()
+            return invalidated, cleared, reconnected, invalidated_again
+
+        assert asyncio.run(run()) == (True, True, True, True)
+
+
+class TestForwardedWrites:
+
+    def test_api_forwards_writes(self, writer_server, client, sample_message_data):
+        payload = sample_message_data.model_dump(mode="json")
+
+        response = client.post("/api/messages/", json=payload)
+
+        assert response.status_code == 201
+        data = response.json()["data"]
+        assert data["content"] == sample_message_data.content
+        assert data["metadata"]["processed"] is True
+        assert client.post("/api/messages/", json=payload).status_code == 422
+
+        batch = client.post(
+            "/api/messages/batch",
+            json={
+                "messages": [
+                    payload,
+                    {**payload, "message_id": "forwarded_2"},
+                    {**payload, "message_id": "forwarded_3", "content": "bad words"},
+                ]
+            },
+        ).json()["data"]
+
+        assert (batch["created"], batch["duplicates"], batch["rejected"]) == (1, 1, 1)
+        page = client.get(f"/api/messages/{sample_message_data.session_id}").json()
+        assert page["data"]["total_count"] == 2
+
+    def test_writer_unavailable(self, client, tmp_path, monkeypatch, sample_message_data):
+        monkeypatch.setattr(writer_client, "path", str(tmp_path / "missing.sock"))
+
+        response = client.post(
+            "/api/messages/", json=sample_message_data.model_dump(mode="json")
+        )
+
+        assert response.status_code == 503
+        assert response.json()["error"]["code"] == "WRITER_UNAVAILABLE"